@@ -0,0 +1,307 @@
+# Winsford ASC Club Champs Scoring System
+#   benchmark.py
+#   Times each stage of the scripts on synthetic swim lists of
+#   increasing size, and writes the results out as JSON so that they
+#   can be compared between versions.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+# Each size is generated once with synthetic_data.py, into its own
+# folder.  Then each stage is benchmarked in a fresh process, so that the
+# peak RSS figures are for that stage alone.  The swim list is streamed
+# through the reports just as the scripts do, so a report's timings
+# include reading the swim list, which 'parse' times on its own.  The
+# per swimmer progress messages that the scripts print are thrown away
+# while timing.
+
+import contextlib
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+
+import helpers
+import synthetic_data
+
+from swim_list_reader import read_swim_list
+from swim_list_reader import open_swim_list
+from pipeline import run_pipeline
+from consideration_times_report import ConsiderationTimesReport
+from race_times_report import RaceTimesReport
+from qualifiers_report import QualifiersReport
+from qualifiers_report import BatchQualifiersReport
+from scores_report import ScoresReport
+
+try:
+  import resource
+except ImportError:
+  resource = None # Not available on Windows
+
+folder = 'f:/SwimLists/benchmark/'
+sizes = [ 1000, 10000, 100000, 1000000 ] # Numbers of swimmers
+seed = 1
+results_path = folder + 'benchmark_results.json'
+club_champs_start_date_str = '12/9/2015'
+club_champs_date_str = '19/9/2015'
+maximum_age = 21
+age_on_date_str = '31/12/2016'
+earliest_pb_date_str = '8/6/2015'
+
+club_champs_start_date = helpers.ParseDate_dmY( club_champs_start_date_str )
+club_champs_date = helpers.ParseDate_dmY( club_champs_date_str )
+age_on_date = helpers.ParseDate_dmY( age_on_date_str )
+earliest_pb_date = helpers.ParseDate_dmY( earliest_pb_date_str )
+
+# Peak resident set size of this process so far, in MB, or None if we
+# can't tell.
+def _peak_rss_mb():
+  if resource is None:
+    return None
+  peak = resource.getrusage( resource.RUSAGE_SELF ).ru_maxrss
+  if sys.platform == 'darwin':
+    return peak / (1024.0 * 1024.0) # Bytes
+  return peak / 1024.0 # KB
+
+class _Timings():
+  def __init__(self):
+    self.stages = []
+
+  # Calls function, and records how long it took to get through
+  # num_items of unit, e.g. swims or files.  num_items can instead be a
+  # function of what function returns, for when it's not known up front.
+  def time(self, stage, unit, num_items, function):
+    with open( os.devnull, 'w' ) as devnull:
+      with contextlib.redirect_stdout( devnull ):
+        start = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - start
+    if callable( num_items ):
+      num_items = num_items( result )
+    per_second = None
+    if seconds > 0:
+      per_second = num_items / seconds
+    self.stages.append( { 'stage' : stage, 'seconds' : seconds, 'unit' : unit, 'items' : num_items, 'per_second' : per_second, 'peak_rss_mb' : _peak_rss_mb() } )
+    return result
+
+class _CountedBlocks():
+  """Passes on the (swimmer, swims) blocks from blocks, counting the
+  swimmers and swims as they go by."""
+  def __init__(self, blocks):
+    self.blocks = blocks
+    self.num_swimmers = 0
+    self.num_swims = 0
+
+  def __iter__(self):
+    for swimmer, swims in self.blocks:
+      self.num_swimmers += 1
+      self.num_swims += len( swims )
+      yield swimmer, swims
+
+def _read_all( blocks ):
+  for swimmer, swims in blocks:
+    pass
+
+def _make_html_folder( data_folder ):
+  html_folder = data_folder + 'individual_consideration_times_' + str( club_champs_date.year ) + '/'
+  if not os.path.exists( html_folder ):
+    os.mkdir( html_folder )
+
+def _create_reports( data_folder ):
+  consideration = ConsiderationTimesReport( data_folder, club_champs_start_date, club_champs_date, maximum_age )
+  race_times = RaceTimesReport( data_folder, club_champs_start_date, club_champs_date, synthetic_data.CLUB_CHAMPS_MEET_NAME, maximum_age )
+  qualifiers = QualifiersReport( data_folder, age_on_date, earliest_pb_date, maximum_age, set( [ synthetic_data.CLUB_CHAMPS_MEET_NAME ] ), set() )
+  return consideration, race_times, qualifiers
+
+# Each of these benchmarks one stage, for the data in data_folder, and
+# returns a dict of anything else to go in the results.
+
+def _benchmark_parse( timings, data_folder ):
+  with open( data_folder + 'SwimList.txt', 'r' ) as swim_list_file:
+    blocks = _CountedBlocks( read_swim_list( swim_list_file ) )
+    timings.time( 'parse', 'swims', lambda result: blocks.num_swims, lambda: _read_all( blocks ) )
+  return { 'num_swimmers' : blocks.num_swimmers, 'num_swims' : blocks.num_swims }
+
+def _benchmark_swim_list_cache( timings, data_folder ):
+  from swim_list_cache import get_cache_folder
+  from swim_list_cache import load_swim_list_cache
+  swim_list_path = data_folder + 'SwimList.txt'
+  # Time building it from scratch
+  cache_folder = get_cache_folder( swim_list_path )
+  if os.path.exists( cache_folder ):
+    shutil.rmtree( cache_folder )
+  cache = timings.time( 'swim_list_cache_build', 'swims', lambda cache: cache.num_swims(), lambda: load_swim_list_cache( swim_list_path ) )
+  blocks = _CountedBlocks( cache.read_swim_list() )
+  timings.time( 'parse_cache', 'swims', lambda result: blocks.num_swims, lambda: _read_all( blocks ) )
+  return {}
+
+def _benchmark_swim_store( timings, data_folder ):
+  from swim_store import get_store_path
+  from swim_store import load_swim_store
+  swim_list_path = data_folder + 'SwimList.txt'
+  # Time building it from scratch
+  store_path = get_store_path( swim_list_path )
+  if os.path.exists( store_path ):
+    os.remove( store_path )
+  store = timings.time( 'swim_store_build', 'swims', lambda store: store.num_swims(), lambda: load_swim_store( swim_list_path ) )
+  blocks = _CountedBlocks( store.read_swim_list() )
+  timings.time( 'parse_store', 'swims', lambda result: blocks.num_swims, lambda: _read_all( blocks ) )
+  store.close()
+  return {}
+
+def _benchmark_scoring( timings, data_folder ):
+  scores = ScoresReport( data_folder, club_champs_date )
+  timings.time( 'scoring_read', 'swimmers', lambda result: len( scores.swimmer_times_by_name ), scores.read_times )
+  timings.time( 'scoring', 'swimmers', lambda result: len( scores.swimmer_times_by_name ), scores.score )
+  timings.time( 'scoring_write', 'swimmers', lambda result: len( scores.swimmer_times_by_name ), scores.write )
+  return {}
+
+def _benchmark_consideration_times( timings, data_folder ):
+  consideration = ConsiderationTimesReport( data_folder, club_champs_start_date, club_champs_date, maximum_age )
+  blocks = _CountedBlocks( open_swim_list( data_folder + 'SwimList.txt', consideration.swim_filter ) )
+  timings.time( 'consideration_times', 'swims', lambda result: blocks.num_swims, lambda: consideration.calculate( blocks ) )
+  timings.time( 'consideration_times_text', 'swimmers', len( consideration.all_swimmer_times ), lambda: (consideration.write_text(), consideration.write_verbose_text()) )
+  _make_html_folder( data_folder )
+  # One page per swimmer, plus the index
+  timings.time( 'consideration_times_html', 'files', len( consideration.all_swimmer_times ) + 1, consideration.write_html )
+  return {}
+
+def _benchmark_race_times( timings, data_folder ):
+  race_times = RaceTimesReport( data_folder, club_champs_start_date, club_champs_date, synthetic_data.CLUB_CHAMPS_MEET_NAME, maximum_age )
+  blocks = _CountedBlocks( open_swim_list( data_folder + 'SwimList.txt', race_times.swim_filter ) )
+  timings.time( 'race_times', 'swims', lambda result: blocks.num_swims, lambda: race_times.run( blocks ) )
+  return {}
+
+def _benchmark_qualifier_search( timings, data_folder ):
+  qualifiers = QualifiersReport( data_folder, age_on_date, earliest_pb_date, maximum_age, set( [ synthetic_data.CLUB_CHAMPS_MEET_NAME ] ), set() )
+  blocks = _CountedBlocks( open_swim_list( data_folder + 'SwimList.txt', qualifiers.swim_filter ) )
+  timings.time( 'qualifier_search', 'swims', lambda result: blocks.num_swims, lambda: qualifiers.run( blocks ) )
+  return {}
+
+def _benchmark_batch_qualifier_search( timings, data_folder ):
+  from swim_list_cache import load_swim_list_cache
+  cache = load_swim_list_cache( data_folder + 'SwimList.txt' )
+  qualifiers = BatchQualifiersReport( data_folder, age_on_date, earliest_pb_date, maximum_age, set( [ synthetic_data.CLUB_CHAMPS_MEET_NAME ] ), set() )
+  timings.time( 'batch_qualifier_search', 'swims', cache.num_swims(), lambda: qualifiers.run( cache ) )
+  return {}
+
+# All three swim list reports together, as make_reports.py runs them,
+# reading the swim list in each of the ways it can.
+def _benchmark_reports( timings, data_folder, stage, use_cache, use_store ):
+  _make_html_folder( data_folder )
+  stages = _create_reports( data_folder )
+  timings.time( stage, 'swimmers', lambda result: len( stages[0].all_swimmer_times ), lambda: run_pipeline( data_folder + 'SwimList.txt', stages, use_cache, use_store ) )
+  return {}
+
+def _benchmark_reports_text( timings, data_folder ):
+  return _benchmark_reports( timings, data_folder, 'reports', False, False )
+
+def _benchmark_reports_cache( timings, data_folder ):
+  return _benchmark_reports( timings, data_folder, 'reports_cache', True, False )
+
+def _benchmark_reports_store( timings, data_folder ):
+  return _benchmark_reports( timings, data_folder, 'reports_store', False, True )
+
+# In the order they're run.  The scoring goes first, before the
+# consideration times are written over with real ones.  The batch
+# qualifier search and the reports through the cache and store use the
+# ones that were built before them.
+_STAGES = [
+  ( 'parse', _benchmark_parse ),
+  ( 'scoring', _benchmark_scoring ),
+  ( 'consideration_times', _benchmark_consideration_times ),
+  ( 'race_times', _benchmark_race_times ),
+  ( 'qualifier_search', _benchmark_qualifier_search ),
+  ( 'swim_list_cache', _benchmark_swim_list_cache ),
+  ( 'swim_store', _benchmark_swim_store ),
+  ( 'batch_qualifier_search', _benchmark_batch_qualifier_search ),
+  ( 'reports', _benchmark_reports_text ),
+  ( 'reports_cache', _benchmark_reports_cache ),
+  ( 'reports_store', _benchmark_reports_store ),
+]
+
+# Benchmarks one stage for one size, whose data is already in
+# data_folder.  Run in its own process.
+def _benchmark_stage( data_folder, stage_name ):
+  timings = _Timings()
+  result = dict( _STAGES )[ stage_name ]( timings, data_folder )
+  result[ 'stages' ] = timings.stages
+  return result
+
+# Benchmarks each stage for one size in turn, each in a fresh process.
+def _benchmark_folder( data_folder ):
+  result = { 'stages' : [] }
+  for stage_name, unused in _STAGES:
+    subprocess.check_call( [ sys.executable, os.path.abspath( __file__ ), data_folder, stage_name ] )
+    with open( data_folder + 'benchmark.json', 'r' ) as f:
+      stage_result = json.load( f )
+    result[ 'stages' ] += stage_result.pop( 'stages' )
+    result.update( stage_result )
+  return result
+
+def _git_commit():
+  try:
+    return subprocess.check_output( [ 'git', 'rev-parse', 'HEAD' ], cwd=os.path.dirname( os.path.abspath( __file__ ) ), stderr=subprocess.DEVNULL ).decode().strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+def _print_summary( results ):
+  print( '%10s  %-26s %10s %14s %12s' % ('swimmers', 'stage', 'seconds', 'per second', 'peak RSS MB') )
+  for result in results:
+    for stage in result[ 'stages' ]:
+      per_second = '-'
+      if stage[ 'per_second' ] is not None:
+        per_second = '%.0f %s' % (stage[ 'per_second' ], stage[ 'unit' ])
+      peak_rss = '-'
+      if stage[ 'peak_rss_mb' ] is not None:
+        peak_rss = '%.1f' % stage[ 'peak_rss_mb' ]
+      print( '%10d  %-26s %10.3f %14s %12s' % (result[ 'num_swimmers' ], stage[ 'stage' ], stage[ 'seconds' ], per_second, peak_rss) )
+
+def main():
+  results = []
+  for size in sizes:
+    data_folder = folder + str( size ) + '/'
+    if not os.path.exists( data_folder + 'SwimList.txt' ):
+      print( 'Generating ' + str( size ) + ' swimmers' )
+      synthetic_data.generate( data_folder, size, seed, club_champs_start_date, club_champs_date )
+    print( 'Benchmarking ' + str( size ) + ' swimmers' )
+    results.append( _benchmark_folder( data_folder ) )
+
+  report = {
+    'git_commit' : _git_commit(),
+    'python' : platform.python_version(),
+    'platform' : platform.platform(),
+    'date' : datetime.datetime.now().isoformat(),
+    'results' : results,
+  }
+  with open( results_path, 'w' ) as f:
+    json.dump( report, f, indent=2 )
+  _print_summary( results )
+
+if __name__ == '__main__':
+  if len( sys.argv ) > 2:
+    # We're the child process for one stage of one size
+    data_folder = sys.argv[1]
+    result = _benchmark_stage( data_folder, sys.argv[2] )
+    with open( data_folder + 'benchmark.json', 'w' ) as f:
+      json.dump( result, f, indent=2 )
+  else:
+    main()
@@ -0,0 +1,51 @@
+# Winsford ASC Club Champs Scoring System
+#   calculate_live_scores.py
+#   Follows the race results as they come in on club champs day, keeping
+#   LiveScoresBoys.txt and LiveScoresGirls.txt up to date.
+#   Reads ConsiderationTimes.txt, as written by make_consideration_times.py,
+#   and RaceResultsFeed.txt, which has a line per race, e.g.
+#     123456|50 Free|31.25
+#   and is only ever appended to.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import helpers
+import instrumentation
+
+from live_scoring import LiveScores
+from live_scoring import read_feed
+
+folder = 'f:/SwimLists/'
+club_champs_date_str = '19/9/2015'
+num_leaders = 10 # How many swimmers to show on each leaderboard.  0 shows everybody.
+poll_interval = 0.1 # Seconds to wait between checks for new results
+follow = True # Set to False to stop once all of the results so far have been read
+instrument = False # Set to True to print a summary of where the time went at the end of the run, and write it to LiveScoresStats.json
+profile = False # With instrument set, also profile the run with cProfile
+trace_memory = False # With instrument set, also find the peak memory use with tracemalloc, which is very slow
+
+club_champs_date = helpers.ParseDate_dmY( club_champs_date_str )
+
+if instrument:
+  instrumentation.enable( folder + 'LiveScoresStats.json', profile, trace_memory )
+live_scores = LiveScores( folder, club_champs_date, num_leaders )
+live_scores.publish_all()
+for line in read_feed( folder + 'RaceResultsFeed.txt', poll_interval, follow ):
+  leaderboard = live_scores.apply_result( line )
+  if leaderboard is not None:
+    live_scores.publish( leaderboard )
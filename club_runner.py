@@ -0,0 +1,136 @@
+# Winsford ASC Club Champs Scoring System
+#   club_runner.py
+#   Runs the reports for every club in a county league, each in its own
+#   folder, in parallel worker processes, and sums them up.  Used by
+#   make_county_reports.py.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import contextlib
+import heapq
+import importlib
+import os
+import time
+import traceback
+
+from concurrent.futures import ProcessPoolExecutor
+
+from incremental import open_output_file
+from season_runner import run_seasons
+
+# Number of swimmers each club sends back for the county leader boards
+_NUM_TOP_SWIMMERS = 10
+
+class ClubResult():
+  """What a club's worker process sends back to be summed up."""
+  def __init__(self, name):
+    self.name = name
+    self.error = None
+    self.seconds = 0.0
+    self.num_swimmers = 0
+    self.num_qualified = 0
+    # (full_name, points), highest first
+    self.top_boys = []
+    self.top_girls = []
+
+# Returns (name, folder) for each folder in county_folder with a
+# SwimList.txt in it, biggest swim list first, so that the slowest clubs
+# get started first.
+def find_club_folders( county_folder ):
+  clubs = []
+  for name in sorted( os.listdir( county_folder ) ):
+    folder = os.path.join( county_folder, name ) + '/'
+    if os.path.exists( folder + 'SwimList.txt' ):
+      clubs.append( ( os.path.getsize( folder + 'SwimList.txt' ), name, folder ) )
+  clubs.sort( key=lambda club: -club[0] )
+  return [ ( name, folder ) for size, name, folder in clubs ]
+
+# Builds the QT, NT and points lookup tensors, which is done when
+# lookup_tensors is first imported.  Calling this before the worker
+# processes are started only helps where they're forked (Linux), as the
+# workers then share the parent's copy.  Where they're spawned (the
+# default on Windows) each worker imports it afresh and builds its own.
+def _build_lookup_tensors():
+  importlib.import_module( 'lookup_tensors' )
+
+def _top_swimmers( sorted_scores ):
+  return [ ( swimmer_times.full_name, swimmer_times.points ) for swimmer_times in sorted_scores[ :_NUM_TOP_SWIMMERS ] ]
+
+# Runs in a worker process.  Everything the reports print goes to the
+# club's Log.txt, so the clubs' output doesn't get mixed up.
+def _run_club( name, season, maximum_age, use_cache, use_store, fuzzy_entry_matching ):
+  result = ClubResult( name )
+  start_time = time.perf_counter()
+  with open( season.folder + 'Log.txt', 'w' ) as log_file:
+    with contextlib.redirect_stdout( log_file ):
+      try:
+        season_reports = run_seasons( season.folder + 'SwimList.txt', [ season ], maximum_age, use_cache, use_store, fuzzy_entry_matching=fuzzy_entry_matching )[0]
+        if season_reports.consideration_times is not None:
+          result.num_swimmers = len( season_reports.consideration_times.all_swimmer_times )
+        result.num_qualified = season_reports.qualifiers.num_qualified
+        if season_reports.scores is not None:
+          result.top_boys = _top_swimmers( season_reports.scores.sorted_scores_boys )
+          result.top_girls = _top_swimmers( season_reports.scores.sorted_scores_girls )
+      except Exception:
+        traceback.print_exc( file=log_file )
+        result.error = traceback.format_exc().splitlines()[-1]
+  result.seconds = time.perf_counter() - start_time
+  return result
+
+# Runs the reports for every club in county_folder in num_workers
+# processes, and writes CountySummary.txt to county_folder.
+# create_season( name, folder ) returns the Season for a club, which sets
+# the dates and meet names for it.
+# A club that fails is noted in the summary, and doesn't stop the others.
+# Returns a ClubResult for each club, in name order.
+def run_clubs( county_folder, create_season, maximum_age, num_workers, use_cache=False, use_store=False, fuzzy_entry_matching=False ):
+  clubs = find_club_folders( county_folder )
+  print( 'Running ' + str( len( clubs ) ) + ' clubs in ' + str( num_workers ) + ' processes' )
+  _build_lookup_tensors()
+  futures = []
+  with ProcessPoolExecutor( max_workers=num_workers ) as executor:
+    for name, folder in clubs:
+      futures.append( executor.submit( _run_club, name, create_season( name, folder ), maximum_age, use_cache, use_store, fuzzy_entry_matching ) )
+    results = []
+    for future in futures:
+      result = future.result()
+      if result.error is None:
+        print( result.name + ' done in %.1fs' % result.seconds )
+      else:
+        print( result.name + ' failed: ' + result.error )
+      results.append( result )
+  results.sort( key=lambda result: result.name )
+  write_county_summary( county_folder + 'CountySummary.txt', results )
+  return results
+
+def _write_top_swimmers( summary_file, title, results, get_top_swimmers ):
+  summary_file.write( '\n' + title + '\n' )
+  all_top_swimmers = [ ( full_name, result.name, points ) for result in results for full_name, points in get_top_swimmers( result ) ]
+  for full_name, club_name, points in heapq.nlargest( _NUM_TOP_SWIMMERS, all_top_swimmers, key=lambda swimmer: swimmer[2] ):
+    summary_file.write( full_name + ' (' + club_name + '): ' + str( points ) + '\n' )
+
+def write_county_summary( path, results ):
+  summary_file = open_output_file( path )
+  for result in results:
+    if result.error is not None:
+      summary_file.write( result.name + ': failed, ' + result.error + '\n' )
+    else:
+      summary_file.write( result.name + ': ' + str( result.num_swimmers ) + ' swimmers with consideration times, ' + str( result.num_qualified ) + ' with qualifying times\n' )
+  _write_top_swimmers( summary_file, 'Top boys', results, lambda result: result.top_boys )
+  _write_top_swimmers( summary_file, 'Top girls', results, lambda result: result.top_girls )
+  summary_file.close()
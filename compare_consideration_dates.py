@@ -0,0 +1,63 @@
+# Winsford ASC Club Champs Scoring System
+#   compare_consideration_dates.py
+#   Works out consideration times for a range of candidate consideration
+#   dates in one go, to see how moving the date would change things.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import datetime
+import helpers
+import instrumentation
+
+from pipeline import run_pipeline
+from consideration_dates_report import ConsiderationDatesReport
+
+folder = 'f:/SwimLists/'
+swim_list_path = folder + 'SwimList.txt'
+use_swim_list_cache = False # Set to True to read SwimList.txt through a memory-mapped copy, SwimList.txt.cache, which is built next to it on the first run.  Needs numpy.
+use_swim_store = False # Set to True to read SwimList.txt through an indexed SQLite copy, SwimList.txt.sqlite, instead.
+club_champs_start_date_str = '12/9/2015'
+club_champs_date_str = '19/9/2015'
+maximum_age = 21 # Any swimmer older will be excluded
+fuzzy_entry_matching = False # Set to True to match swimmers to misspelt names in EntryList.txt, as a last resort
+# Candidate consideration dates, every consideration_date_step_days from
+# first_consideration_date_str to last_consideration_date_str, plus any
+# in extra_consideration_date_strs.  They're all compared with the usual
+# date, one year before the club champs.
+first_consideration_date_str = '19/6/2014'
+last_consideration_date_str = '19/12/2014'
+consideration_date_step_days = 7
+extra_consideration_date_strs = []
+instrument = False # Set to True to print a summary of where the time went at the end of the run, and write it to ConsiderationDatesStats.json
+profile = False # With instrument set, also profile the run with cProfile
+trace_memory = False # With instrument set, also find the peak memory use with tracemalloc, which is very slow
+
+club_champs_start_date = helpers.ParseDate_dmY( club_champs_start_date_str )
+club_champs_date = helpers.ParseDate_dmY( club_champs_date_str )
+
+consideration_dates = [ helpers.ParseDate_dmY( date_str ) for date_str in extra_consideration_date_strs ]
+consideration_date = helpers.ParseDate_dmY( first_consideration_date_str )
+last_consideration_date = helpers.ParseDate_dmY( last_consideration_date_str )
+while consideration_date <= last_consideration_date:
+  consideration_dates.append( consideration_date )
+  consideration_date += datetime.timedelta( days=consideration_date_step_days )
+
+if instrument:
+  instrumentation.enable( folder + 'ConsiderationDatesStats.json', profile, trace_memory )
+report = ConsiderationDatesReport( folder, club_champs_start_date, club_champs_date, consideration_dates, maximum_age, fuzzy_entry_matching )
+run_pipeline( swim_list_path, [ report ], use_swim_list_cache, use_swim_store )
@@ -0,0 +1,158 @@
+# Winsford ASC Club Champs Scoring System
+#   consideration_dates_report.py
+#   Works out everybody's consideration times for lots of candidate
+#   consideration dates in one pass over the swim list, and compares them
+#   with the usual consideration date.  Used by compare_consideration_dates.py.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import datetime
+import numpy
+import os
+
+import helpers
+import instrumentation
+
+from race_time import format_race_time
+
+from event import short_course_events
+from swim_list_reader import SwimFilter
+from consideration_times import calculate_consideration_time_matrix
+from entry_list import read_entry_list
+from entry_list import find_entry
+from incremental import open_output_file
+
+num_events = len( short_course_events )
+
+# Number of the biggest changes listed for each date
+_NUM_CHANGES_LISTED = 5
+
+def _date_str( date ):
+  return date.strftime( '%d/%m/%Y' )
+
+def _time_str( time ):
+  if numpy.isnan( time ):
+    return 'none'
+  return format_race_time( float( time ) )
+
+class ConsiderationDatesReport():
+  """Pipeline stage that works out consideration times for everybody in
+  EntryList.txt as of each of consideration_dates, as well as the usual
+  one year before club_champs_date, which is the baseline.
+  Writes ConsiderationDates.npz, which holds the times as a
+  [date, swimmer, event] matrix, and ConsiderationDatesDiff.txt, which
+  sums up how each date differs from the baseline."""
+  def __init__(self, folder, club_champs_start_date, club_champs_date, consideration_dates, maximum_age, fuzzy_entry_matching=False):
+    self.folder = folder
+    self.club_champs_start_date = club_champs_start_date
+    self.club_champs_date = club_champs_date
+    self.baseline_date = datetime.date( club_champs_date.year - 1, club_champs_date.month, club_champs_date.day )
+    # The baseline always comes first
+    self.consideration_dates = [ self.baseline_date ] + sorted( set( consideration_dates ) - set( [ self.baseline_date ] ) )
+    self.maximum_age = maximum_age
+    self.fuzzy_entry_matching = fuzzy_entry_matching
+    self.swim_filter = SwimFilter( latest_date=club_champs_start_date - datetime.timedelta( days=1 ), maximum_age=maximum_age, age_on_date=club_champs_date )
+    self.swimmers = []
+    self.full_names = []
+    self.times = None
+    self.is_nt = None
+
+  def run(self, blocks):
+    with instrumentation.stage( 'consideration_dates.calculate' ):
+      self.calculate( blocks )
+    with instrumentation.stage( 'consideration_dates.write' ):
+      self.write()
+
+  # Fills in times and is_nt, [date, swimmer, event] matrices, for
+  # everybody in blocks that has entered.
+  def calculate(self, blocks):
+    entries = read_entry_list( self.folder + 'EntryList.txt' )
+    date_ordinals = numpy.array( [ date.toordinal() for date in self.consideration_dates ], dtype=numpy.int64 )
+    all_times = []
+    all_is_nt = []
+    for swimmer, swims in blocks:
+      age = helpers.CalcAge( swimmer.date_of_birth, self.club_champs_date )
+      full_name = find_entry( entries, swimmer, self.fuzzy_entry_matching )
+      if full_name is None:
+        instrumentation.count( 'consideration_dates.swimmers_not_entered' )
+        continue
+      if age > self.maximum_age:
+        instrumentation.count( 'consideration_dates.swimmers_too_old' )
+        continue
+      times, is_nt = calculate_consideration_time_matrix( swimmer, swims, age, self.club_champs_start_date, date_ordinals )
+      self.swimmers.append( swimmer )
+      self.full_names.append( full_name )
+      all_times.append( times )
+      all_is_nt.append( is_nt )
+    instrumentation.count( 'consideration_dates.swimmers', len( self.swimmers ) )
+    print( 'Calculated consideration times for ' + str( len( self.swimmers ) ) + ' swimmers on ' + str( len( self.consideration_dates ) ) + ' dates' )
+    if len( all_times ) == 0:
+      self.times = numpy.full( (len( self.consideration_dates ), 0, num_events), numpy.nan )
+      self.is_nt = numpy.zeros( self.times.shape, dtype=numpy.bool_ )
+    else:
+      self.times = numpy.stack( all_times, axis=1 )
+      self.is_nt = numpy.stack( all_is_nt, axis=1 )
+
+  def write(self):
+    self.write_matrix()
+    self.write_diff()
+
+  # The times are saved as float32, which is plenty for comparing them,
+  # to halve the size of the file.
+  def write_matrix(self):
+    path = self.folder + 'ConsiderationDates.npz'
+    temp_path = path + '.tmp'
+    with open( temp_path, 'wb' ) as f:
+      numpy.savez( f,
+        dates=numpy.array( [ date.toordinal() for date in self.consideration_dates ], dtype=numpy.int64 ),
+        asa_numbers=numpy.array( [ swimmer.asa_number for swimmer in self.swimmers ], dtype=numpy.int64 ),
+        names=numpy.array( self.full_names, dtype=str ),
+        events=numpy.array( [ event.short_name_without_course() for event in short_course_events ], dtype=str ),
+        times=self.times.astype( numpy.float32 ),
+        is_nt=self.is_nt )
+    os.replace( temp_path, path )
+
+  def write_diff(self):
+    diff_file = open_output_file( self.folder + 'ConsiderationDatesDiff.txt' )
+    baseline_times = self.times[0]
+    baseline_is_nt = self.is_nt[0]
+    num_times = int( numpy.count_nonzero( ~numpy.isnan( baseline_times ) ) )
+    diff_file.write( 'Baseline ' + _date_str( self.baseline_date ) + ': ' + str( num_times ) + ' consideration times for ' + str( len( self.swimmers ) ) + ' swimmers, ' + str( int( numpy.count_nonzero( baseline_is_nt ) ) ) + ' from the NT table\n' )
+    for date_index in range( 1, len( self.consideration_dates ) ):
+      times = self.times[ date_index ]
+      is_nt = self.is_nt[ date_index ]
+      both_missing = numpy.isnan( times ) & numpy.isnan( baseline_times )
+      is_changed = (times != baseline_times) & ~both_missing
+      num_changed = int( numpy.count_nonzero( is_changed ) )
+      line = '\n' + _date_str( self.consideration_dates[ date_index ] ) + ': ' + str( num_changed ) + ' changed'
+      line += ', ' + str( int( numpy.count_nonzero( is_nt & ~baseline_is_nt ) ) ) + ' more from the NT table'
+      line += ', ' + str( int( numpy.count_nonzero( baseline_is_nt & ~is_nt ) ) ) + ' fewer'
+      changes = times - baseline_times
+      has_change = is_changed & ~numpy.isnan( changes )
+      if numpy.any( has_change ):
+        line += ', mean change %+.2fs' % float( numpy.mean( changes[ has_change ] ) )
+      diff_file.write( line + '\n' )
+
+      # The biggest changes, by size
+      swimmer_indices, event_codes = numpy.nonzero( has_change )
+      sizes = numpy.abs( changes[ swimmer_indices, event_codes ] )
+      for i in numpy.argsort( -sizes, kind='stable' )[ :_NUM_CHANGES_LISTED ]:
+        swimmer_index = swimmer_indices[i]
+        event_code = event_codes[i]
+        diff_file.write( '  ' + self.full_names[ swimmer_index ] + ', ' + short_course_events[ event_code ].short_name_without_course() + ': ' + _time_str( baseline_times[ swimmer_index, event_code ] ) + ' -> ' + _time_str( times[ swimmer_index, event_code ] ) + ' (%+.2fs)' % float( changes[ swimmer_index, event_code ] ) + '\n' )
+    diff_file.close()
@@ -0,0 +1,207 @@
+# Winsford ASC Club Champs Scoring System
+#   consideration_times.py
+#   Works out a scoring consideration time for each event for a swimmer,
+#   based on their PB, or an interpolated PB, as of the consideration
+#   date.  Used by consideration_times_report.py.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import collections
+import datetime
+import instrumentation
+
+from concurrent.futures import ProcessPoolExecutor
+from operator import attrgetter
+
+from race_time import format_race_time
+
+from event import short_course_events
+from nt_consideration_times import get_nt_consideration_time
+from pb_index import index_swims_by_event
+
+num_events = len( short_course_events )
+
+_get_short_course_race_time = attrgetter( 'short_course_race_time' )
+
+class ConsiderationTime():
+  def __init__(self, event, time, reason, is_nt):
+    self.event = event
+    self.time = time
+    self.reason = reason
+    self.is_nt = is_nt
+
+# Returns a list of ConsiderationTimes for the swimmer, one per event.
+# Swims on or after club_champs_start_date are disregarded.
+# indexes can be given to reuse the swimmer's pb_index.EventPBIndexes by
+# short course time, from index_swims_by_event(), rather than building
+# them again from swims.  They can include swims on or after
+# club_champs_start_date, as they're never looked at.
+def calculate_consideration_times( swimmer, swims, age, club_champs_start_date, consideration_date, indexes=None ):
+  consideration_date_str = consideration_date.strftime( '%d/%m/%Y' )
+
+  # Swims on or after club_champs_start_date are disregarded for any PB
+  # consideration
+  latest_pb_date = min( consideration_date, club_champs_start_date - datetime.timedelta( days=1 ) )
+  if indexes is None:
+    indexes = index_swims_by_event( swims, _get_short_course_race_time )
+
+  consideration_times = []
+  for i in range( 0, num_events ):
+    event = short_course_events[i]
+    # The PB as of the consideration date, and the first swim after the
+    # consideration date that's a PB
+    pb_swim = indexes[i].pb_as_of( latest_pb_date )
+    interp_swim = indexes[i].first_pb_after( consideration_date )
+    if (interp_swim is not None) and (interp_swim.date >= club_champs_start_date):
+      interp_swim = None
+    consideration_time = None
+    if pb_swim is None:
+      nt_time = get_nt_consideration_time( i, swimmer.is_male, age )
+      if nt_time is None:
+        consideration_time = ConsiderationTime( event, None, 'No PB as of ' + consideration_date_str + ', and no time specified in the NT table', True )
+      else:
+        consideration_time = ConsiderationTime( event, nt_time, 'No PB as of ' + consideration_date_str + ', so consideration time taken from the NT table', True )
+    else:
+      if interp_swim is not None:
+        # Interpolate the PB between the pre-consideration-date PB and the first PB
+        # race after the consideration date
+        interpolation_val = float( (consideration_date - pb_swim.date).days ) / float( (interp_swim.date - pb_swim.date).days )
+        consideration_race_time = (interp_swim.short_course_race_time * interpolation_val) + (pb_swim.short_course_race_time * (1 - interpolation_val))
+        consideration_time = ConsiderationTime( event, consideration_race_time, 'Interpolated between ' + pb_swim.meet + ' ' + pb_swim.date.strftime( "%d/%m/%Y" ) + ' (' + format_race_time( pb_swim.short_course_race_time ) + ') and ' + interp_swim.meet + ' ' + interp_swim.date.strftime( "%d/%m/%Y" )+ ' (' + format_race_time( interp_swim.short_course_race_time ) + ')', False )
+      else:
+        consideration_time = ConsiderationTime( event, pb_swim.short_course_race_time, 'From ' + pb_swim.meet + ' on ' + pb_swim.date.strftime( "%d/%m/%Y" ), False )
+    consideration_times.append( consideration_time )
+  return consideration_times
+
+# Works out the swimmer's consideration times for several seasons at
+# once, building their PB indexes only once.  seasons is a list of
+# (age, club_champs_start_date, consideration_date), and swims must
+# include all of the swims before the latest club_champs_start_date.
+# Returns a list of ConsiderationTimes lists, one per season.
+def calculate_consideration_times_for_seasons( swimmer, swims, seasons ):
+  indexes = index_swims_by_event( swims, _get_short_course_race_time )
+  return [ calculate_consideration_times( swimmer, swims, age, club_champs_start_date, consideration_date, indexes ) for age, club_champs_start_date, consideration_date in seasons ]
+
+# Batch version of calculate_consideration_times() for lots of
+# consideration dates at once, without the reasons.
+# consideration_dates is a NumPy array of date ordinals.
+# Returns (times, is_nt), which are [date, event] arrays, with NaN times
+# where there's no PB and nothing in the NT table.  The times are bit for
+# bit the same as calculate_consideration_times() gives for each date.
+# Needs numpy, unlike the rest of this file.
+def calculate_consideration_time_matrix( swimmer, swims, age, club_champs_start_date, consideration_dates ):
+  import numpy
+  start_ordinal = club_champs_start_date.toordinal()
+  consideration_dates = numpy.asarray( consideration_dates, dtype=numpy.int64 )
+  latest_pb_dates = numpy.minimum( consideration_dates, start_ordinal - 1 )
+  indexes = index_swims_by_event( swims, _get_short_course_race_time )
+
+  times = numpy.full( (len( consideration_dates ), num_events), numpy.nan )
+  is_nt = numpy.zeros( (len( consideration_dates ), num_events), dtype=numpy.bool_ )
+  for i in range( 0, num_events ):
+    index = indexes[i]
+    has_pb = numpy.zeros( len( consideration_dates ), dtype=numpy.bool_ )
+    if len( index ) > 0:
+      ordinals, event_times = index.get_date_ordinals_and_times()
+      pb_positions = index.get_pb_positions_as_of( latest_pb_dates )
+      interp_positions = index.get_first_pb_positions_after( consideration_dates )
+      has_pb = pb_positions >= 0
+      has_interp = has_pb & (interp_positions >= 0) & (ordinals[ interp_positions ] < start_ordinal)
+      pb_dates = ordinals[ pb_positions ]
+      pb_times = event_times[ pb_positions ]
+      with numpy.errstate( divide='ignore', invalid='ignore' ):
+        interpolation_vals = (consideration_dates - pb_dates).astype( numpy.float64 ) / (ordinals[ interp_positions ] - pb_dates).astype( numpy.float64 )
+        interpolated_times = (event_times[ interp_positions ] * interpolation_vals) + (pb_times * (1 - interpolation_vals))
+      times[ :, i ] = numpy.where( has_interp, interpolated_times, numpy.where( has_pb, pb_times, numpy.nan ) )
+    nt_time = get_nt_consideration_time( i, swimmer.is_male, age )
+    if nt_time is not None:
+      times[ ~has_pb, i ] = nt_time
+    is_nt[ :, i ] = ~has_pb
+  return times, is_nt
+
+# Runs in a worker process
+def _calculate_chunk( chunk, club_champs_start_date, consideration_date ):
+  results = []
+  for swimmer, swims, age in chunk:
+    results.append( calculate_consideration_times( swimmer, swims, age, club_champs_start_date, consideration_date ) )
+  return results
+
+# Runs in a worker process
+def _calculate_seasons_chunk( chunk ):
+  results = []
+  for swimmer, swims, seasons in chunk:
+    results.append( calculate_consideration_times_for_seasons( swimmer, swims, seasons ) )
+  return results
+
+def _chunks( iterable, chunk_size ):
+  chunk = []
+  for item in iterable:
+    chunk.append( item )
+    if len( chunk ) == chunk_size:
+      yield chunk
+      chunk = []
+  if len( chunk ) > 0:
+    yield chunk
+
+# Sends jobs to a pool of num_workers worker processes in chunks of
+# chunk_size, calling calculate_chunk( chunk, *args ) on each, and yields
+# the results in the same order as the jobs.  Only a couple of chunks per
+# worker are read ahead of the results, so the jobs can be streamed
+# straight from the swim list.
+def _calculate_in_workers( calculate_chunk, jobs, args, num_workers, chunk_size ):
+  in_flight = collections.deque()
+  with ProcessPoolExecutor( max_workers=num_workers ) as executor:
+    for chunk in _chunks( jobs, chunk_size ):
+      in_flight.append( executor.submit( calculate_chunk, chunk, *args ) )
+      if len( in_flight ) >= num_workers * 2:
+        for result in in_flight.popleft().result():
+          yield result
+    while len( in_flight ) > 0:
+      for result in in_flight.popleft().result():
+        yield result
+
+# jobs is an iterable of (swimmer, swims, age).
+# Yields the list of ConsiderationTimes for each job, in the same order
+# as the jobs, so the results are identical whatever num_workers is.
+# With num_workers > 1 the jobs are sent to a pool of worker processes
+# in chunks of chunk_size swimmers.
+def calculate_all_consideration_times( jobs, club_champs_start_date, consideration_date, num_workers=1, chunk_size=16 ):
+  if num_workers <= 1:
+    for swimmer, swims, age in jobs:
+      with instrumentation.stage( 'consideration_times.pb_search' ):
+        consideration_times = calculate_consideration_times( swimmer, swims, age, club_champs_start_date, consideration_date )
+      yield consideration_times
+    return
+
+  for consideration_times in _calculate_in_workers( _calculate_chunk, jobs, ( club_champs_start_date, consideration_date ), num_workers, chunk_size ):
+    yield consideration_times
+
+# As calculate_all_consideration_times(), but for several seasons at
+# once.  jobs is an iterable of (swimmer, swims, seasons), as for
+# calculate_consideration_times_for_seasons(), and a list of
+# ConsiderationTimes lists is yielded for each job.
+def calculate_all_seasons_consideration_times( jobs, num_workers=1, chunk_size=16 ):
+  if num_workers <= 1:
+    for swimmer, swims, seasons in jobs:
+      with instrumentation.stage( 'consideration_times.pb_search' ):
+        results = calculate_consideration_times_for_seasons( swimmer, swims, seasons )
+      yield results
+    return
+
+  for results in _calculate_in_workers( _calculate_seasons_chunk, jobs, (), num_workers, chunk_size ):
+    yield results
@@ -0,0 +1,269 @@
+# Winsford ASC Club Champs Scoring System
+#   consideration_times_report.py
+#   Report stage that writes out each entered swimmer's consideration
+#   times, as text, verbose text and a set of HTML pages.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import datetime
+import helpers
+import instrumentation
+
+from race_time import format_race_times
+
+from swim_list_reader import SwimFilter
+from consideration_times import calculate_all_consideration_times
+from entry_list import read_entry_list
+from entry_list import find_entry
+from entry_list import write_missing_entries
+from incremental import IncrementalState
+from incremental import calculate_incrementally
+from incremental import hash_swimmer_block
+from incremental import open_output_file
+from html_renderer import Template
+from html_renderer import PageRenderer
+
+class SwimmerTimes():
+  def __init__(self, swimmer, full_name):
+    self.swimmer = swimmer
+    self.full_name = full_name
+    self.consideration_times = []
+    # The formatted consideration times, or None where there's no time
+    self.time_strs = []
+
+_HTML_TOP = """<!DOCTYPE html>
+<html>
+<head>
+	<title>Club Champs {year} Consideration Times</title>
+</head>
+<body>
+<h1>Winsford ASC Club Championships {year} Scoring Consideration Times</h1>
+"""
+_HTML_DESCRIPTION = """<p>The scoring for Best Boy and Best Girl for the Club Champs will be done slightly differently this year. We want to encourage swimmers to improve themselves, so we're basing the scores on how much they've improved over the year.</p>
+<p>To do this we take each swimmers' PB in each event from one year before the date of the Club Champs as a consideration time. Points are then awarded according to how much they improve on that time. The time needed for each point is set by the coaches, and varies with age and event. This is because a 10 year old might knock 20s off their 200 Breast time, whereas it's very difficult for a 16 year old to knock 1s off their 50 free time for example.</p>
+<p>Consideration times are calculated by looking for PBs around {consideration_date}. We find their PB race before this date, then we find their first PB race after this date, then we interpolate to get a fair PB for {consideration_date}. This is to make it as fair as possible, to eliminate any effect of 'when' the PB was set.</p>
+<p>Where there is no PB set after {consideration_date}, we take the PB before that date. Where there is no PB before that date, we take a consideration time from a table of times defined by the coaches, based on the North Mids qualifying times for 2014. In those cases, the swimmer will not be eligible for a maximum score tally because we're not able to measure an improvement.</p>
+<p>Below is a list of links to each swimmer's consideration times and how they have been calculated.</p>
+<p>There are some swimmers missing from this list. Possible causes are...</p>
+<ul>
+  <li>Swimmer is listed as Cat 1 on the <a href="https://www.swimmingresults.org/membershipcheck/">ASA database</a>.</li>
+  <li>Swimmer has recently switched to Cat 2.</li>
+  <li>Somebody pressed the wrong button.</li>
+</ul>
+<p>We will try to make sure that all swimmers get correct consideration times.  Swimmers that compete in the Club Champs but are not listed here, will be given consideration times by the coaches.</p>
+<p>If you have any questions, or if a swimmer is not listed but <em>does</em> have PBs from before {consideration_date}, please contact <a href="mailto:ol.wright@gmail.com?Subject=Club%20Champs%20Scoring%20Query">Oli Wright</a>.</p>
+"""
+
+_HTML_BOTTOM = """</body></html>"""
+
+# Each swimmer's page
+_PAGE_TEMPLATE = Template( _HTML_TOP + '<h2>{full_name}, {age}</h2>{consideration_times}' + _HTML_BOTTOM )
+_CONSIDERATION_TIME_TEMPLATE = Template( '<h3>{event}: {time}</h3><p>{reason}</p>' )
+
+class ConsiderationTimesReport():
+  """Pipeline stage that works out consideration times for everybody in
+  EntryList.txt, as of one year before club_champs_date, and writes
+  ConsiderationTimes.txt, ConsiderationTimesVerbose.txt, the HTML index
+  and per-swimmer pages, and MissingEntriesForConsideration.txt to folder."""
+  def __init__(self, folder, club_champs_start_date, club_champs_date, maximum_age, num_workers=1, chunk_size=16, incremental=False, fuzzy_entry_matching=False):
+    self.folder = folder
+    self.club_champs_start_date = club_champs_start_date
+    self.club_champs_date = club_champs_date
+    self.consideration_date = datetime.date( club_champs_date.year - 1, club_champs_date.month, club_champs_date.day )
+    self.maximum_age = maximum_age
+    self.num_workers = num_workers
+    self.chunk_size = chunk_size
+    self.incremental = incremental
+    self.fuzzy_entry_matching = fuzzy_entry_matching
+    # Swims from the start of the club champs onwards are disregarded for any
+    # PB consideration, so we don't even build them.
+    self.swim_filter = SwimFilter( latest_date=club_champs_start_date - datetime.timedelta( days=1 ), maximum_age=maximum_age, age_on_date=club_champs_date, report_too_old=True )
+    self.all_swimmer_times = []
+    self.entries = {}
+    self.state = None
+
+  # Returns the swimmer's age if they're in the entry list and aren't too
+  # old, adding a SwimmerTimes for them to all_swimmer_times, or None.
+  def enter_swimmer(self, swimmer):
+    age = helpers.CalcAge( swimmer.date_of_birth, self.club_champs_date )
+
+    full_name = find_entry( self.entries, swimmer, self.fuzzy_entry_matching )
+    if full_name is None:
+      print( 'Excluding ' + swimmer.alternate_name() + ', ' + str( age ) + '. Not in entry list.' )
+      instrumentation.count( 'consideration_times.swimmers_not_entered' )
+      return None
+
+    if age > self.maximum_age:
+      print( 'Excluding ' + full_name + ', ' + str( age ) + '. Too old.' )
+      instrumentation.count( 'consideration_times.swimmers_too_old' )
+      return None
+
+    self.entries[ full_name ] = True
+
+    self.all_swimmer_times.append( SwimmerTimes( swimmer, full_name ) )
+    print( full_name + ', ' + str( age ) )
+    return age
+
+  # Yields (swimmer, swims, age) for each swimmer in blocks that's in the
+  # entry list and isn't too old, adding a SwimmerTimes for them to
+  # all_swimmer_times as it goes.
+  def _entered_swimmers(self, blocks):
+    for swimmer, swims in blocks:
+      age = self.enter_swimmer( swimmer )
+      if age is not None:
+        yield swimmer, swims, age
+
+  # The (key, input hash) that the swimmer's consideration times are saved
+  # under in state, with incremental.
+  def get_key_and_hash(self, swimmer, swims):
+    return swimmer.asa_number, hash_swimmer_block( swimmer, swims )
+
+  # blocks is an iterable of (swimmer, swims) that have been through
+  # swim_filter.
+  def run(self, blocks):
+    with instrumentation.stage( 'consideration_times.calculate' ):
+      self.calculate( blocks )
+    self.write()
+
+  # Reads the entry list, and with incremental, the saved results into
+  # state, ready for calculate(), or for the consideration times to be
+  # worked out elsewhere, a swimmer at a time.  In that case
+  # enter_swimmer() must be called for each block that passes swim_filter,
+  # and the consideration times set on the SwimmerTimes it adds, then
+  # finish() called.
+  def begin(self):
+    self.entries = read_entry_list( self.folder + 'EntryList.txt' )
+    self.state = None
+    if self.incremental:
+      # Anything that changes the results for every swimmer goes in the
+      # parameters, so that changing it throws the saved results away.
+      from lookup_tensors import nt_consideration_time_tensor
+      parameters = ( self.club_champs_start_date, self.club_champs_date, self.consideration_date, nt_consideration_time_tensor.tobytes() )
+      self.state = IncrementalState( self.folder + 'ConsiderationTimes.state', parameters )
+
+  # Works out the consideration times for everybody in blocks that has
+  # entered, without writing anything out.
+  def calculate(self, blocks):
+    self.begin()
+    jobs = self._entered_swimmers( blocks )
+    calculate_all = lambda jobs: calculate_all_consideration_times( jobs, self.club_champs_start_date, self.consideration_date, self.num_workers, self.chunk_size )
+    if self.incremental:
+      get_key_and_hash = lambda job: self.get_key_and_hash( job[0], job[1] )
+      results = calculate_incrementally( self.state, jobs, get_key_and_hash, calculate_all )
+    else:
+      results = calculate_all( jobs )
+    for swimmer_index, consideration_times in enumerate( results ):
+      self.all_swimmer_times[ swimmer_index ].consideration_times = consideration_times
+    self.finish()
+
+  def finish(self):
+    if instrumentation.enabled:
+      for swimmer_times in self.all_swimmer_times:
+        instrumentation.count( 'consideration_times.nt_fallbacks', len( [ c for c in swimmer_times.consideration_times if c.is_nt ] ) )
+    instrumentation.count( 'consideration_times.swimmers', len( self.all_swimmer_times ) )
+    with instrumentation.stage( 'consideration_times.format' ):
+      self._format_times()
+    if self.incremental:
+      self.state.save()
+      print( 'Reused ' + str( self.state.num_reused ) + ' swimmers, calculated ' + str( self.state.num_calculated ) )
+
+  # Every consideration time appears in all of the outputs, so they're
+  # formatted once, in one batch, rather than once per output.
+  def _format_times(self):
+    times = [ c.time for swimmer_times in self.all_swimmer_times for c in swimmer_times.consideration_times if c.time is not None ]
+    time_strs = iter( format_race_times( times ) )
+    for swimmer_times in self.all_swimmer_times:
+      swimmer_times.time_strs = [ (next( time_strs ) if c.time is not None else None) for c in swimmer_times.consideration_times ]
+
+  def write(self):
+    print( 'Writing file' )
+    with instrumentation.stage( 'consideration_times.write_text' ):
+      self.write_text()
+      self.write_verbose_text()
+    with instrumentation.stage( 'consideration_times.write_html' ):
+      self.write_html()
+    write_missing_entries( self.folder + 'MissingEntriesForConsideration.txt', self.entries )
+
+  def write_text(self):
+    consideration_times_file = open_output_file( self.folder + 'ConsiderationTimes.txt' )
+    first = True
+    for swimmer_times in self.all_swimmer_times:
+      if not first:
+        consideration_times_file.write( '\n' )
+      swimmer = swimmer_times.swimmer
+      consideration_times_file.write( str( swimmer ) + '\n' )
+      for consideration_time, time_str in zip( swimmer_times.consideration_times, swimmer_times.time_strs ):
+        if consideration_time.time is not None:
+          is_pb_str = 'pb'
+          if consideration_time.is_nt:
+            is_pb_str = 'nt'
+          consideration_times_file.write( consideration_time.event.short_name_without_course() + '|' + time_str + '|' + is_pb_str + '\n' )
+      first = False
+    consideration_times_file.close()
+
+  def write_verbose_text(self):
+    consideration_times_verbose_file = open_output_file( self.folder + 'ConsiderationTimesVerbose.txt' )
+    first = True
+    for swimmer_times in self.all_swimmer_times:
+      if not first:
+        consideration_times_verbose_file.write( '\n' )
+      swimmer = swimmer_times.swimmer
+      age = helpers.CalcAge( swimmer.date_of_birth, self.club_champs_date )
+      consideration_times_verbose_file.write( swimmer_times.full_name + ', ' + str( age ) + '\n' )
+      for consideration_time, time_str in zip( swimmer_times.consideration_times, swimmer_times.time_strs ):
+        if consideration_time.time is not None:
+          consideration_times_verbose_file.write( '\n' + consideration_time.event.short_name_without_course() + ': ' + time_str + '\n' )
+          consideration_times_verbose_file.write( consideration_time.reason + '\n' )
+      first = False
+    consideration_times_verbose_file.close()
+
+  def write_html(self):
+    year = self.club_champs_date.year
+    consideration_date = self.consideration_date
+    html_top = _HTML_TOP.format( year=year )
+    html_description = _HTML_DESCRIPTION.format( consideration_date='%d/%d/%d' % (consideration_date.day, consideration_date.month, consideration_date.year) )
+    page_folder = 'individual_consideration_times_' + str( year ) + '/'
+
+    consideration_times_html_index_file = open_output_file( self.folder + 'consideration_times_' + str( year ) + '_index.html' )
+    consideration_times_html_index_file.write( html_top )
+    consideration_times_html_index_file.write( html_description )
+    consideration_times_html_index_file.write( '<ul>' )
+    # The swimmers' pages are written on other threads, as we go
+    page_renderer = PageRenderer( self.folder + 'consideration_times_' + str( year ) + '_pages.state' )
+    for swimmer_times in self.all_swimmer_times:
+      swimmer = swimmer_times.swimmer
+      age = helpers.CalcAge( swimmer.date_of_birth, self.club_champs_date )
+
+      html = '<li><a href="'
+      page_name = page_folder + str( swimmer.asa_number ) + '.html'
+      html += page_name
+      html += '">' + swimmer_times.full_name + '</a></li>'
+      consideration_times_html_index_file.write( html + '\n' )
+
+      consideration_times_html = []
+      for consideration_time, time_str in zip( swimmer_times.consideration_times, swimmer_times.time_strs ):
+        if consideration_time.time is not None:
+          consideration_times_html.append( _CONSIDERATION_TIME_TEMPLATE.render( { 'event' : consideration_time.event.short_name_without_course(), 'time' : time_str, 'reason' : consideration_time.reason } ) )
+      page_renderer.add( self.folder + page_name, _PAGE_TEMPLATE, { 'year' : year, 'full_name' : swimmer_times.full_name, 'age' : age, 'consideration_times' : ''.join( consideration_times_html ) } )
+
+    page_renderer.close()
+    print( 'Wrote ' + str( page_renderer.num_written ) + ' swimmer pages, ' + str( page_renderer.num_unchanged ) + ' unchanged' )
+
+    consideration_times_html_index_file.write( '</ul>' )
+    consideration_times_html_index_file.write( _HTML_BOTTOM )
+    consideration_times_html_index_file.close()
@@ -0,0 +1,128 @@
+# Winsford ASC Club Champs Scoring System
+#   entry_list.py
+#   Reading the club champs entry list, and keeping track of which
+#   entries we've found swim data for.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import re
+
+import instrumentation
+
+from incremental import open_output_file
+from name_index import NameIndex
+
+class EntryList(dict):
+  """Dict from full name ('first_name last_name') to False, to be set
+  to True as each entry is matched up with a swimmer.  Also keeps a
+  NameIndex of the entries for find_entry()."""
+  def __init__(self):
+    dict.__init__(self)
+    self.index = NameIndex()
+
+  def add(self, full_name):
+    self[ full_name ] = False
+    self.index.add( full_name, full_name )
+
+# Reads the entry list at path.  Each line is 'last_name,first_name'.
+# Returns an EntryList.
+def read_entry_list( path ):
+  entries = EntryList()
+  print( 'Reading entry list' )
+  with instrumentation.stage( 'entry_list.read' ):
+    for line in open( path, 'r' ):
+      #line = line.split('\n')[0]
+      #names = line.split()
+      names = re.split('[,\n ]', line)
+      print( names )
+      full_name = names[1] + ' ' + names[0]
+      entries.add( full_name )
+  return entries
+
+# Reports name, and returns True, if more than one entry has it once
+# case, accents, spacing and punctuation are ignored, so we can't tell
+# which is meant.
+def _is_ambiguous( entries, name ):
+  if not entries.index.is_ambiguous( name ):
+    return False
+  print( 'Not matching ' + name + ' to an entry, as more than one entry has that name' )
+  instrumentation.count( 'entry_list.ambiguous_names' )
+  return True
+
+# Returns entry, unless another swimmer has already been matched to it,
+# in which case that's reported and None is returned.  For anything but
+# an exact match on a swimmer's full name, as two swimmers can share a
+# known as name or be spelt alike.
+def _unclaimed( entries, entry, name ):
+  if not entries[ entry ]:
+    return entry
+  print( 'Not matching ' + name + ' to entry ' + entry + ', as another swimmer has already been matched to it' )
+  instrumentation.count( 'entry_list.already_matched' )
+  return None
+
+# Returns the name that swimmer is down as in entries, or None if they
+# haven't entered.  Tries their full name and then the name they're known
+# as, first exactly and then ignoring case, accents, spacing and
+# punctuation, as long as that only matches one entry.  With fuzzy set, a
+# close enough misspelling of their full name is accepted as a last
+# resort.  Only an exact match on their full name can take an entry that
+# another swimmer has already been matched to.
+def find_entry( entries, swimmer, fuzzy=False ):
+  full_name = swimmer.full_name()
+  if full_name in entries:
+    return full_name
+  alternate_name = swimmer.alternate_name()
+  if alternate_name in entries:
+    entry = _unclaimed( entries, alternate_name, full_name )
+    if entry is not None:
+      instrumentation.count( 'entry_list.matched_by_known_as' )
+    return entry
+  entry = entries.index.find( full_name )
+  if entry is not None:
+    entry = _unclaimed( entries, entry, full_name )
+    if entry is not None:
+      instrumentation.count( 'entry_list.matched_by_normalized_name' )
+    return entry
+  if _is_ambiguous( entries, full_name ):
+    return None
+  entry = entries.index.find( alternate_name )
+  if entry is not None:
+    entry = _unclaimed( entries, entry, full_name )
+    if entry is not None:
+      instrumentation.count( 'entry_list.matched_by_known_as' )
+      instrumentation.count( 'entry_list.matched_by_normalized_name' )
+    return entry
+  if _is_ambiguous( entries, alternate_name ):
+    return None
+  if fuzzy:
+    entry = entries.index.find_fuzzy( full_name )
+    if entry is not None:
+      entry = _unclaimed( entries, entry, full_name )
+      if entry is not None:
+        print( 'Matched ' + full_name + ' to entry ' + entry + ' by spelling' )
+        instrumentation.count( 'entry_list.matched_by_spelling' )
+      return entry
+  return None
+
+# Writes out the list of entries that we haven't processed any data for
+def write_missing_entries( path, entries ):
+  missing_entries_file = open_output_file( path )
+  for entry, processed in entries.items():
+    if not processed:
+      missing_entries_file.write( entry + '\n' )
+  missing_entries_file.close()
@@ -20,6 +20,7 @@
 # with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 
+import functools
 import logging
 import math
 
@@ -50,27 +51,46 @@ stroke_id_to_string = ( "Freestyle", "Breaststroke", "Butterfly", "Backstroke",
 stroke_id_to_short_string = ( "Free", "Breast", "Fly", "Back", "IM" )
 course_id_to_string = ( "Short", "Long" )
 
-class Event:
-  """Encapsulation of a swimming event type and course"""
+# How many strings Event.create_from_str() remembers the Events for
+_EVENT_STR_CACHE_SIZE = 1024
+
+class Event(object):
+  """Encapsulation of a swimming event type and course.
+  Events are immutable, so rather than constructing new ones, use
+  get_event() or the create methods, which all hand out the shared
+  instances from a registry."""
   # Lower 8 bits is the ASA event code minus one
   # Bit 8 is 0 for short course, 1 for long course
   event_code = 0
 
   def __init__(self, event_code): 
     self.event_code = event_code
+    # Cache everything that's derived from the event code, so that hot
+    # loops don't have to keep digging it out of the tables.
+    self.stroke_id = None
+    self.distance = None
+    self.turn_factor = None
+    self._string = None
+    self._short_name_without_course = None
+    if (event_code & 0xff) < len( strokeDistanceAndTurnFactors ):
+      strokeDistanceAndTurnFactor = strokeDistanceAndTurnFactors[event_code & 0xff]
+      self.stroke_id = strokeDistanceAndTurnFactor[0]
+      self.distance = strokeDistanceAndTurnFactor[1]
+      self.turn_factor = strokeDistanceAndTurnFactor[2]
+      self._short_name_without_course = str( self.distance ) + " " + stroke_id_to_short_string[ self.stroke_id ]
+      self._string = str( self.distance ) + " " + stroke_id_to_string[ self.stroke_id ] + " " + course_id_to_string[ (event_code & 0x100) >> 8 ] + " Course"
 
   @classmethod
   def create(cls, stroke_id, distance, course_code): 
-    event_code = 0
-    for stroke_id_and_distance in strokeDistanceAndTurnFactors:
-      if (stroke_id_and_distance[0] == stroke_id) and (stroke_id_and_distance[1] == distance):
-        break
-      event_code = event_code + 1
+    event_code = _event_code_by_stroke_and_distance.get( (stroke_id, distance), len( strokeDistanceAndTurnFactors ) )
     if course_code == "L":
       event_code = event_code | 0x100
-    return cls( event_code )
+    return get_event( event_code )
   
+  # Only a few different event strings turn up in the files we read, so
+  # this is memoized, but bounded, in case a file has lots of junk in it.
   @classmethod
+  @functools.lru_cache( maxsize=_EVENT_STR_CACHE_SIZE )
   def create_from_str( cls, string, course_code ):
     # Parse event of the form "50 Freestyle" from swimmingresults.org
     substrings = string.split()
@@ -86,15 +106,16 @@ class Event:
       stroke_id = 3
     elif substrings[1].lower().startswith( 'i' ): # "Medley" would be in substrings[2]
       stroke_id = 4
-    if stroke_id is None:
-      return
-    return cls.create( stroke_id, distance, course_code )
+    event = None
+    if stroke_id is not None:
+      event = cls.create( stroke_id, distance, course_code )
+    return event
   
   @classmethod
   def create_from_code( cls, event_code, course_code ):
     if course_code == "L":
       event_code = event_code | 0x100
-    return cls( event_code )
+    return get_event( event_code )
   
   def to_asa_event_number(self):
     return (self.event_code & 0xff) + 1
@@ -109,10 +130,7 @@ class Event:
       return "S"
 
   def __str__(self):
-    strokeDistanceAndTurnFactor = strokeDistanceAndTurnFactors[self.event_code & 0xff]
-    stroke_id = strokeDistanceAndTurnFactor[0]
-    distance = strokeDistanceAndTurnFactor[1]
-    return str( distance ) + " " + stroke_id_to_string[ stroke_id ] + " " + course_id_to_string[ (self.event_code & 0x100) >> 8 ] + " Course"
+    return self._string
 
   def to_string(self):
     return str(self)
@@ -121,18 +139,14 @@ class Event:
     return self.event_code
 
   def short_name_without_course(self):
-    strokeDistanceAndTurnFactor = strokeDistanceAndTurnFactors[self.event_code & 0xff]
-    stroke_id = strokeDistanceAndTurnFactor[0]
-    distance = strokeDistanceAndTurnFactor[1]
-    return str( distance ) + " " + stroke_id_to_short_string[ stroke_id ]
+    return self._short_name_without_course
     
   def key(self):
     return self.event_code + 1
 
   def convert_time( self, raceTime ):
-    strokeDistanceAndTurnFactor = strokeDistanceAndTurnFactors[self.event_code & 0xff]
-    distance = strokeDistanceAndTurnFactor[1]
-    turnFactor = strokeDistanceAndTurnFactor[2]
+    distance = self.distance
+    turnFactor = self.turn_factor
     if self.event_code & 0x100:
       # Convert long course to short course
       turnVal = (distance * 0.01) * turnFactor / raceTime
@@ -152,14 +166,53 @@ class Event:
       return (raceTime + math.sqrt( (raceTime * raceTime) + (distance * distance * turnFactor * 0.0008) )) * 0.5;
 
   def getDistance(self):
-    return strokeDistanceAndTurnFactors[self.event_code & 0xff][1]
+    return self.distance
     
   def is_long_course(self):
     if self.event_code & 0x100:
       return True
     else:
       return False
-    
+
+  # When pickled, e.g. to send to a worker process, come back out as the
+  # shared instance from the registry rather than a copy.
+  def __reduce__(self):
+    return (get_event, (self.event_code,))
+
+# The registry of shared Event instances.
+# Indexed by event code, so it covers all 512 possible codes, but only
+# the short and long course versions of the events in
+# strokeDistanceAndTurnFactors are populated.  The rest are None.
+_events_by_code = [ None ] * 0x200
+_event_code_by_stroke_and_distance = {}
+
+for _event_code in range( 0, len( strokeDistanceAndTurnFactors ) ):
+  _stroke_id = strokeDistanceAndTurnFactors[ _event_code ][0]
+  _distance = strokeDistanceAndTurnFactors[ _event_code ][1]
+  _event_code_by_stroke_and_distance[ (_stroke_id, _distance) ] = _event_code
+  for _course_code, _course_bit in ( ("S", 0), ("L", 0x100) ):
+    _event = Event( _event_code | _course_bit )
+    _events_by_code[ _event_code | _course_bit ] = _event
+
+# Returns the shared Event for an event code.
+# Codes that aren't in the registry get a new Event, just as
+# Event( event_code ) would give you.
+def get_event( event_code ):
+  if 0 <= event_code < len( _events_by_code ):
+    event = _events_by_code[ event_code ]
+    if event is not None:
+      return event
+  return Event( event_code )
+
+# The same times turn up over and over again in imported swim lists, so
+# conversions are memoized.
+_CONVERSION_CACHE_SIZE = 65536
+
+# Memoized get_event( event_code ).convert_time( race_time )
+@functools.lru_cache( maxsize=_CONVERSION_CACHE_SIZE )
+def convert_race_time( event_code, race_time ):
+  return get_event( event_code ).convert_time( race_time )
+
 short_course_events = (
 Event.create( 0, 50, "S" ),
 Event.create( 0, 100, "S" ),
@@ -0,0 +1,74 @@
+# Winsford ASC Club Champs Scoring System
+#   event_arrays.py
+#   NumPy versions of the per-event calculations in event.py, for
+#   working on whole columns of swims at once.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import numpy
+
+from event import strokeDistanceAndTurnFactors
+
+# Lookup arrays indexed by short course event code (event_code & 0xff)
+stroke_by_event_code = numpy.array( [ x[0] for x in strokeDistanceAndTurnFactors ], dtype=numpy.int32 )
+distance_by_event_code = numpy.array( [ x[1] for x in strokeDistanceAndTurnFactors ], dtype=numpy.float64 )
+turn_factor_by_event_code = numpy.array( [ x[2] for x in strokeDistanceAndTurnFactors ], dtype=numpy.float64 )
+
+def is_long_course( event_codes ):
+  return (numpy.asarray( event_codes ) & 0x100) != 0
+
+# Batch version of Event.convert_time().
+# event_codes are full event codes, so long course swims are converted to
+# short course and short course swims to long course, in the same call.
+# The arithmetic is done in exactly the same order as the scalar version,
+# so the results are bit for bit identical to it.
+def convert_times( event_codes, race_times ):
+  event_codes = numpy.asarray( event_codes )
+  race_times = numpy.asarray( race_times, dtype=numpy.float64 )
+  distance = distance_by_event_code[ event_codes & 0xff ]
+  turn_factor = turn_factor_by_event_code[ event_codes & 0xff ]
+  long_course = is_long_course( event_codes )
+  short_course = ~long_course
+  converted = numpy.empty( race_times.shape, dtype=numpy.float64 )
+
+  # Convert long course to short course
+  race_time = race_times[ long_course ]
+  lc_distance = distance[ long_course ]
+  turn_val = (lc_distance * 0.01) * turn_factor[ long_course ] / race_time
+  num_extra_turn_sc = lc_distance * 0.02
+  converted[ long_course ] = race_time - (turn_val * num_extra_turn_sc)
+
+  # Convert short course to long course.  See Event.convert_time() for
+  # the derivation.
+  race_time = race_times[ short_course ]
+  sc_distance = distance[ short_course ]
+  converted[ short_course ] = (race_time + numpy.sqrt( (race_time * race_time) + (sc_distance * sc_distance * turn_factor[ short_course ] * 0.0008) )) * 0.5
+  return converted
+
+# Batch equivalent of Swim.short_course_race_time.  Long course times are
+# converted, short course times are passed through untouched.
+def short_course_race_times( event_codes, race_times ):
+  race_times = numpy.asarray( race_times, dtype=numpy.float64 )
+  return numpy.where( is_long_course( event_codes ), convert_times( event_codes, race_times ), race_times )
+
+# Batch equivalent of the long course times that find_qualifiers.py
+# works with.  Short course times are converted, long course times are
+# passed through untouched.
+def long_course_race_times( event_codes, race_times ):
+  race_times = numpy.asarray( race_times, dtype=numpy.float64 )
+  return numpy.where( is_long_course( event_codes ), race_times, convert_times( event_codes, race_times ) )
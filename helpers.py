@@ -21,6 +21,7 @@
 
 import time
 import datetime
+import functools
 import re
 import logging
 
@@ -42,7 +43,14 @@ def NewLine( response ):
   response.out.write( """
 """)
 
+# The same few dates get parsed over and over again (every swim at a
+# gala has the same date), so the date parsers are memoized on the raw
+# string.  lru_cache is thread safe, and dates are immutable, so the
+# results can be shared.
+_DATE_CACHE_SIZE = 4096
+
 # Parse a dd/mm/yy string
+@functools.lru_cache( maxsize=_DATE_CACHE_SIZE )
 def ParseDate_dmy( day_month_year ):
   # We should be able to use the time.strptime to parse this date like this
   # ts = time.strptime( day_month_year, "%d/%m/%y")
@@ -58,6 +66,7 @@ def ParseDate_dmy( day_month_year ):
   return datetime.date( year, int( fields[1] ), int( fields[0] ) )
 
 # Parse a dd/mm/yyyy string
+@functools.lru_cache( maxsize=_DATE_CACHE_SIZE )
 def ParseDate_dmY( day_month_Year ):
   # We should be able to use the time.strptime to parse this date like this
   # ts = time.strptime( day_month_year, "%d/%m/%Y")
@@ -65,15 +74,48 @@ def ParseDate_dmY( day_month_Year ):
   fields = day_month_Year.split( "/" )
   return datetime.date( int( fields[2] ), int( fields[1] ), int( fields[0] ) )
 
+# Batch version of ParseDate_dmY for the columnar code.  Returns a NumPy
+# int32 array of date.toordinal() day numbers, parsing each distinct
+# string only once.
+def ParseDates_dmY_ToOrdinals( day_month_Years ):
+  import numpy
+  strings, inverse = numpy.unique( numpy.asarray( day_month_Years, dtype=str ), return_inverse=True )
+  ordinals = numpy.array( [ ParseDate_dmY( string ).toordinal() for string in strings.tolist() ], dtype=numpy.int32 )
+  return ordinals[ inverse.reshape( -1 ) ]
+
 # Regular expression to trim 1st, 2nd etc. to 1 2 etc. when used with ordinals.sub
 ordinals = re.compile( '(?<=\d)(st|nd|rd|th)' )
 
+_month_numbers = { 'january' : 1, 'february' : 2, 'march' : 3, 'april' : 4, 'may' : 5, 'june' : 6, 'july' : 7, 'august' : 8, 'september' : 9, 'october' : 10, 'november' : 11, 'december' : 12 }
+
+# Parse a date of birth like '21st September 2004'
+@functools.lru_cache( maxsize=_DATE_CACHE_SIZE )
 def ParseDateOfBirth( date_of_birth ):
   # Remove ordinal suffixes from numbers.
   date_of_birth = ordinals.sub("", date_of_birth)
-  # Parse the pure date.
-  ts = time.strptime( date_of_birth, "%d %B %Y")
-  return datetime.date( ts.tm_year, ts.tm_mon, ts.tm_mday )
+  # Parse the pure date.  This used to use time.strptime with "%d %B %Y",
+  # which is slow, not thread safe, and depends on the locale.
+  fields = date_of_birth.split()
+  if len( fields ) != 3:
+    raise ValueError( "Unable to parse date of birth: " + date_of_birth )
+  month = _month_numbers.get( fields[1].lower() )
+  if month is None:
+    raise ValueError( "Unable to parse date of birth: " + date_of_birth )
+  return datetime.date( int( fields[2] ), month, int( fields[0] ) )
   
 def CalcAge( date_of_birth, date_to_test ):
-  return date_to_test.year - date_of_birth.year - int((date_to_test.month, date_to_test.day) < (date_of_birth.month, date_of_birth.day))
\ No newline at end of file
+  return date_to_test.year - date_of_birth.year - int((date_to_test.month, date_to_test.day) < (date_of_birth.month, date_of_birth.day))
+
+_EPOCH_ORDINAL = datetime.date( 1970, 1, 1 ).toordinal()
+
+# Batch version of CalcAge for a NumPy array of date.toordinal() dates
+# of birth.  Returns an int64 array of ages on date_to_test.
+def CalcAges( date_of_birth_ordinals, date_to_test ):
+  import numpy
+  dates = (numpy.asarray( date_of_birth_ordinals, dtype=numpy.int64 ) - _EPOCH_ORDINAL).astype( 'datetime64[D]' )
+  months = dates.astype( 'datetime64[M]' )
+  years = dates.astype( 'datetime64[Y]' ).astype( numpy.int64 ) + 1970
+  month_numbers = (months.astype( numpy.int64 ) % 12) + 1
+  days = (dates - months).astype( numpy.int64 ) + 1
+  not_had_birthday = (date_to_test.month < month_numbers) | ((date_to_test.month == month_numbers) & (date_to_test.day < days))
+  return date_to_test.year - years - not_had_birthday.astype( numpy.int64 )
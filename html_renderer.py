@@ -0,0 +1,141 @@
+# Winsford ASC Club Champs Scoring System
+#   html_renderer.py
+#   Renders lots of HTML pages from templates in a thread pool, only
+#   rewriting the pages whose contents have changed.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import collections
+import hashlib
+import os
+import pickle
+import string
+
+from concurrent.futures import ThreadPoolExecutor
+
+import instrumentation
+
+from incremental import write_file_atomically
+
+# Bump this whenever the format of the saved page hashes changes
+_STATE_VERSION = 1
+
+class Template():
+  """A str.format style template, e.g. '<h2>{name}</h2>'.  It's split
+  into literal text and field names once, up front, so that rendering
+  it is just a join.  Values are inserted with str(), and there's no
+  support for format specs or attribute lookups."""
+  def __init__(self, text):
+    # Literal text and field names, alternately
+    self._parts = []
+    for literal, field_name, format_spec, conversion in string.Formatter().parse( text ):
+      if format_spec or conversion:
+        raise RuntimeError( 'Format specs and conversions are not supported in templates: ' + text )
+      self._parts.append( literal )
+      if field_name is not None:
+        self._parts.append( field_name )
+    if len( self._parts ) % 2 == 1:
+      self._parts.append( None )
+
+  def render(self, values):
+    strings = []
+    for i in range( 0, len( self._parts ), 2 ):
+      strings.append( self._parts[i] )
+      field_name = self._parts[i + 1]
+      if field_name is not None:
+        strings.append( str( values[ field_name ] ) )
+    return ''.join( strings )
+
+def _sha1( content ):
+  return hashlib.sha1( content.encode( 'utf-8' ) ).hexdigest()
+
+def _get_stats( path ):
+  stat = os.stat( path )
+  return ( stat.st_size, stat.st_mtime_ns )
+
+class PageRenderer():
+  """Renders pages and writes them out using a pool of threads.
+  Pages are written atomically, and only if their contents have changed,
+  so a sync to the web host only picks up the pages that have.
+  The hash, size and mtime of each page written are saved to state_path,
+  so a page whose hash hasn't changed is skipped without even reading
+  it, as long as nothing else has touched the file since.  Pages without
+  a saved hash are read and compared instead.
+  Call close() once all the pages have been added."""
+  def __init__(self, state_path, num_threads=8):
+    self.state_path = state_path
+    self.num_threads = num_threads
+    self.num_written = 0
+    self.num_unchanged = 0
+    self._previous = {}
+    self._current = {}
+    if os.path.exists( state_path ):
+      with open( state_path, 'rb' ) as f:
+        try:
+          saved = pickle.load( f )
+        except Exception:
+          saved = None
+      if (saved is not None) and (saved.get( 'version' ) == _STATE_VERSION):
+        self._previous = saved[ 'pages' ]
+    self._executor = ThreadPoolExecutor( max_workers=num_threads )
+    self._in_flight = collections.deque()
+
+  # Renders template with values, and writes it to path if it's changed.
+  # Only a few pages per thread are queued up at a time, so the values
+  # for every page needn't all be held in memory at once.
+  def add(self, path, template, values):
+    self._in_flight.append( self._executor.submit( self._write_page, path, template, values, self._previous.get( path ) ) )
+    if len( self._in_flight ) >= self.num_threads * 4:
+      self._finish_page()
+
+  # Runs on one of the threads.  Returns (path, saved entry, was_written)
+  def _write_page(self, path, template, values, previous):
+    content = template.render( values )
+    content_hash = _sha1( content )
+    was_written = True
+    if previous is not None:
+      if (previous[0] == content_hash) and os.path.exists( path ) and (_get_stats( path ) == previous[1]):
+        was_written = False
+    elif os.path.exists( path ):
+      with open( path, 'r' ) as f:
+        was_written = (f.read() != content)
+    if was_written:
+      write_file_atomically( path, content )
+    return path, ( content_hash, _get_stats( path ) ), was_written
+
+  def _finish_page(self):
+    path, entry, was_written = self._in_flight.popleft().result()
+    self._current[ path ] = entry
+    if was_written:
+      self.num_written += 1
+      instrumentation.count( 'html.pages_written' )
+    else:
+      self.num_unchanged += 1
+      instrumentation.count( 'html.pages_unchanged' )
+
+  # Waits for all of the pages to be written, and saves their hashes.
+  # Pages that weren't added this time are forgotten about.
+  def close(self):
+    while len( self._in_flight ) > 0:
+      self._finish_page()
+    self._executor.shutdown()
+    saved = { 'version' : _STATE_VERSION, 'pages' : self._current }
+    temp_path = self.state_path + '.tmp'
+    with open( temp_path, 'wb' ) as f:
+      pickle.dump( saved, f, 2 )
+    os.replace( temp_path, self.state_path )
@@ -0,0 +1,185 @@
+# Winsford ASC Club Champs Scoring System
+#   incremental.py
+#   Support for only redoing the work for swimmers whose data has
+#   changed since the last run, and only rewriting output files whose
+#   contents have changed.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import collections
+import hashlib
+import os
+import pickle
+
+import instrumentation
+
+# Bump this whenever the way results are calculated changes, so that
+# state saved by older code isn't reused.
+_STATE_VERSION = 3
+
+def _sha1( string ):
+  return hashlib.sha1( string.encode( 'utf-8' ) ).hexdigest()
+
+# Hash of everything in a swimmer's block of a swim list that can affect
+# the results for them.
+def hash_swimmer_block( swimmer, swims ):
+  lines = [ str( swimmer ) ]
+  for swim in swims:
+    lines.append( '%d|%d|%s|%d|%d|%r' % (swim.event.event_code, swim.date.toordinal(), swim.meet, swim.asa_swim_id, swim.is_licensed, swim.race_time) )
+  return _sha1( '\n'.join( lines ) )
+
+def _update_hash( sha1, path ):
+  with open( path, 'rb' ) as f:
+    while True:
+      chunk = f.read( 1 << 20 )
+      if not chunk:
+        break
+      sha1.update( chunk )
+
+def hash_files( paths ):
+  sha1 = hashlib.sha1()
+  for path in paths:
+    _update_hash( sha1, path )
+  return sha1.hexdigest()
+
+# SHA-1 of one file, read a chunk at a time so that big swim lists
+# aren't read into memory all at once.
+def hash_file( path ):
+  return hash_files( [ path ] )
+
+# The mtime and size of a file, which are cheap to check before going to
+# the trouble of hashing it.
+def get_file_stats( path ):
+  stat = os.stat( path )
+  return { 'mtime' : stat.st_mtime, 'size' : stat.st_size }
+
+# Writes to path via a temporary file and a rename, so that nothing ever
+# sees a half written file.
+def write_file_atomically( path, content ):
+  temp_path = path + '.tmp'
+  with open( temp_path, 'w' ) as f:
+    f.write( content )
+  os.replace( temp_path, path )
+
+# Writes content to path, unless the file already has exactly that
+# content.  Returns True if the file was written.
+def write_if_changed( path, content ):
+  if os.path.exists( path ):
+    with open( path, 'r' ) as f:
+      if f.read() == content:
+        return False
+  write_file_atomically( path, content )
+  return True
+
+class OutputFile():
+  """Stands in for a file opened for writing.  Everything written is
+  held in memory, and the file is only touched on close() if the
+  contents have changed."""
+  def __init__(self, path):
+    self.path = path
+    self._chunks = []
+    self.was_written = False
+
+  def write(self, string):
+    self._chunks.append( string )
+
+  def close(self):
+    with instrumentation.stage( 'output_files.close' ):
+      self.was_written = write_if_changed( self.path, ''.join( self._chunks ) )
+    if self.was_written:
+      instrumentation.count( 'output_files.written' )
+    else:
+      instrumentation.count( 'output_files.unchanged' )
+
+def open_output_file( path ):
+  return OutputFile( path )
+
+class IncrementalState():
+  """Results from a previous run, keyed by e.g. asa number, along with a
+  hash of the inputs that they were calculated from.
+  All of the results are thrown away if the run parameters (dates,
+  tables etc.) don't match the ones they were saved with.
+  Results must not be None."""
+  def __init__(self, path, parameters):
+    self.path = path
+    self.parameters_hash = _sha1( repr( parameters ) )
+    self._previous = {}
+    self._current = {}
+    self.num_reused = 0
+    self.num_calculated = 0
+    if os.path.exists( path ):
+      with open( path, 'rb' ) as f:
+        try:
+          saved = pickle.load( f )
+        except Exception:
+          saved = None
+      if (saved is not None) and (saved.get( 'version' ) == _STATE_VERSION) and (saved.get( 'parameters_hash' ) == self.parameters_hash):
+        self._previous = saved[ 'results' ]
+
+  # Returns the saved result for key if it was calculated from the same
+  # inputs, otherwise None.
+  def get(self, key, input_hash):
+    entry = self._previous.get( key )
+    if (entry is None) or (entry[0] != input_hash):
+      return None
+    self._current[ key ] = entry
+    self.num_reused += 1
+    return entry[1]
+
+  def put(self, key, input_hash, result):
+    self._current[ key ] = (input_hash, result)
+    self.num_calculated += 1
+
+  # Saves the results that were used or calculated this run.  Anything
+  # that wasn't, e.g. for swimmers that have left, is dropped.
+  def save(self):
+    saved = { 'version' : _STATE_VERSION, 'parameters_hash' : self.parameters_hash, 'results' : self._current }
+    temp_path = self.path + '.tmp'
+    with open( temp_path, 'wb' ) as f:
+      pickle.dump( saved, f, 2 )
+    os.replace( temp_path, self.path )
+
+# Yields a result for each of jobs, in order, reusing results from state
+# wherever the inputs haven't changed.
+# get_key_and_hash( job ) returns the state key and input hash for a job.
+# calculate_all( jobs ) must yield a result for each of the jobs that it's
+# given, in order, e.g. consideration_times.calculate_all_consideration_times.
+# Only the jobs that need calculating are passed on, and the jobs are
+# streamed rather than all being read up front.
+def calculate_incrementally( state, jobs, get_key_and_hash, calculate_all ):
+  # (key, input_hash, saved result or None) for each job pulled from jobs
+  # whose result we haven't yielded yet.
+  pending = collections.deque()
+  def jobs_to_calculate():
+    for job in jobs:
+      key, input_hash = get_key_and_hash( job )
+      result = state.get( key, input_hash )
+      pending.append( (key, input_hash, result) )
+      if result is None:
+        yield job
+
+  for result in calculate_all( jobs_to_calculate() ):
+    # Any reused results queued ahead of this one go first
+    while pending[0][2] is not None:
+      yield pending.popleft()[2]
+    key, input_hash, unused = pending.popleft()
+    state.put( key, input_hash, result )
+    yield result
+  # Everything left was reused
+  while len( pending ) > 0:
+    yield pending.popleft()[2]
@@ -0,0 +1,194 @@
+# Winsford ASC Club Champs Scoring System
+#   instrumentation.py
+#   Optional timers and counters for finding out where a run spends its
+#   time.  Everything is a no-op until enable() is called.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+# Usage...
+#   instrumentation.enable( folder + 'Stats.json' )
+#   with instrumentation.stage( 'write_html' ):
+#     ...
+#   instrumentation.count( 'nt_fallbacks' )
+# At exit a summary table is printed and the stats are written out as
+# JSON.  Stage times are inclusive, so a stage that pulls swimmers from
+# the swim list as it goes includes the time spent in 'parse'.
+# Anything done in worker processes isn't counted.
+
+import atexit
+import json
+import os
+import threading
+import time
+
+enabled = False
+
+_lock = threading.Lock()
+_timers = {} # name -> [ seconds, calls ]
+_counters = {}
+_start_time = None
+_stats_path = None
+_profiler = None
+_thread_profilers = []
+_trace_memory = False
+
+class _Stage():
+  __slots__ = ( 'name', 'start' )
+
+  def __init__(self, name):
+    self.name = name
+
+  def __enter__(self):
+    self.start = time.perf_counter()
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    add_time( self.name, time.perf_counter() - self.start )
+
+class _NullStage():
+  def __enter__(self):
+    pass
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    pass
+
+_null_stage = _NullStage()
+
+# Turns instrumentation on for the rest of the run.
+# stats_path is where the JSON stats are written at exit, if given.
+# profile runs cProfile over the main thread and every thread started
+# after this, such as the pipeline stages and the HTML writers, and writes
+# their combined stats next to stats_path as a .prof file.
+# trace_memory uses tracemalloc to find the peak Python memory use and
+# where it was allocated, which slows everything down a lot.
+def enable( stats_path=None, profile=False, trace_memory=False ):
+  global enabled, _start_time, _stats_path, _profiler, _trace_memory
+  if enabled:
+    return
+  enabled = True
+  _start_time = time.perf_counter()
+  _stats_path = stats_path
+  _trace_memory = trace_memory
+  if trace_memory:
+    import tracemalloc
+    tracemalloc.start()
+  if profile:
+    import cProfile
+    _profiler = cProfile.Profile()
+    _profiler.enable()
+    threading.setprofile( _start_thread_profiler )
+  atexit.register( _at_exit )
+
+# Set with threading.setprofile(), so it's called as each new thread
+# starts, and gives the thread a cProfile of its own, which then takes
+# over as the thread's profile function.  A cProfile only sees the
+# thread that enabled it.
+def _start_thread_profiler( frame, event, arg ):
+  import cProfile
+  profiler = cProfile.Profile()
+  with _lock:
+    _thread_profilers.append( profiler )
+  profiler.enable()
+
+# Context manager that adds the time spent inside it to the named stage
+def stage( name ):
+  if not enabled:
+    return _null_stage
+  return _Stage( name )
+
+def add_time( name, seconds ):
+  with _lock:
+    timer = _timers.get( name )
+    if timer is None:
+      _timers[ name ] = [ seconds, 1 ]
+    else:
+      timer[0] += seconds
+      timer[1] += 1
+
+def count( name, amount=1 ):
+  if not enabled:
+    return
+  with _lock:
+    _counters[ name ] = _counters.get( name, 0 ) + amount
+
+# Yields the items of iterable, adding the time spent producing each one
+# to the named stage.  For timing generators that are consumed a bit at
+# a time, like the swim list readers.
+def timed( name, iterable ):
+  iterator = iter( iterable )
+  while True:
+    start = time.perf_counter()
+    try:
+      item = next( iterator )
+    except StopIteration:
+      add_time( name, time.perf_counter() - start )
+      return
+    add_time( name, time.perf_counter() - start )
+    yield item
+
+# Everything collected so far, in the form that's written out as JSON
+def get_stats():
+  with _lock:
+    stats = {
+      'wall_seconds' : time.perf_counter() - _start_time,
+      'stages' : dict( [ (name, { 'seconds' : timer[0], 'calls' : timer[1] }) for name, timer in _timers.items() ] ),
+      'counters' : dict( _counters ),
+    }
+  if _trace_memory:
+    import tracemalloc
+    current, peak = tracemalloc.get_traced_memory()
+    stats[ 'peak_traced_memory_mb' ] = peak / (1024.0 * 1024.0)
+    top = tracemalloc.take_snapshot().statistics( 'lineno' )[ :10 ]
+    stats[ 'top_allocations' ] = [ { 'where' : str( stat.traceback ), 'mb' : stat.size / (1024.0 * 1024.0), 'count' : stat.count } for stat in top ]
+  return stats
+
+def print_summary( stats ):
+  print( '' )
+  print( 'Finished in %.3fs' % stats[ 'wall_seconds' ] )
+  print( '%-44s %8s %12s %12s' % ('stage', 'calls', 'total s', 'mean ms') )
+  for name, timer in sorted( stats[ 'stages' ].items(), key=lambda x: -x[1][ 'seconds' ] ):
+    print( '%-44s %8d %12.3f %12.3f' % (name, timer[ 'calls' ], timer[ 'seconds' ], 1000.0 * timer[ 'seconds' ] / timer[ 'calls' ]) )
+  if len( stats[ 'counters' ] ) > 0:
+    print( '%-44s %8s' % ('counter', 'count') )
+    for name, value in sorted( stats[ 'counters' ].items() ):
+      print( '%-44s %8d' % (name, value) )
+  if 'peak_traced_memory_mb' in stats:
+    print( 'Peak traced memory %.1fMB.  Biggest allocations still held at the end...' % stats[ 'peak_traced_memory_mb' ] )
+    for allocation in stats[ 'top_allocations' ]:
+      print( '  %8.1fMB %s' % (allocation[ 'mb' ], allocation[ 'where' ]) )
+
+def _at_exit():
+  profile_stats = None
+  if _profiler is not None:
+    import pstats
+    threading.setprofile( None )
+    _profiler.disable()
+    # All of the threads have finished by now
+    profile_stats = pstats.Stats( _profiler )
+    for profiler in _thread_profilers:
+      profile_stats.add( profiler )
+  stats = get_stats()
+  print_summary( stats )
+  if _stats_path is not None:
+    with open( _stats_path, 'w' ) as f:
+      json.dump( stats, f, indent=2, sort_keys=True )
+    if profile_stats is not None:
+      profile_path = os.path.splitext( _stats_path )[0] + '.prof'
+      profile_stats.dump_stats( profile_path )
+      print( 'Profile written to ' + profile_path + ', e.g. python -m pstats ' + profile_path )
+  if profile_stats is not None:
+    profile_stats.sort_stats( 'cumulative' ).print_stats( 20 )
@@ -0,0 +1,127 @@
+# Winsford ASC Club Champs Scoring System
+#   leaderboards.py
+#   Picks out the top few swimmers for each gender and age group, overall
+#   and for each event, for the age group trophies.  Used by scores_report.py.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import heapq
+
+from bisect import bisect_right
+
+from event import short_course_events
+
+num_events = len( short_course_events )
+
+class LeaderboardEntry():
+  def __init__(self, full_name, points, seconds_improved):
+    self.full_name = full_name
+    self.points = points
+    self.seconds_improved = seconds_improved
+
+# Most points first, then most seconds improved, then by name, so that
+# the order never depends on the order the swimmers were read in.
+def _ranking_key( entry ):
+  return ( -entry.points, -entry.seconds_improved, entry.full_name )
+
+# The top k entries, best first.  This is O(n log k) rather than sorting
+# the lot.
+def top_k( entries, k ):
+  return heapq.nsmallest( k, entries, key=_ranking_key )
+
+# e.g. '10 & under', '11-12', '17 & over'
+def get_age_band_name( age_band ):
+  min_age, max_age = age_band
+  if min_age <= 0:
+    return str( max_age ) + ' & under'
+  if max_age >= 99:
+    return str( min_age ) + ' & over'
+  if min_age == max_age:
+    return str( min_age )
+  return str( min_age ) + '-' + str( max_age )
+
+class AgeGroupLeaderboards():
+  """The top num_leaders swimmers for each gender and age band, by total
+  points, and for each gender, age band and event, by points for that
+  race.  age_bands is a list of inclusive (min_age, max_age) ranges,
+  which mustn't overlap.  Swimmers whose age isn't in any of them are
+  left out.
+  Only swimmers and races with something scored (a race time and a
+  consideration time) are ranked."""
+  def __init__(self, age_bands, num_leaders=3):
+    self.age_bands = sorted( age_bands )
+    self.num_leaders = num_leaders
+    self._min_ages = [ age_band[0] for age_band in self.age_bands ]
+    # Keyed by (is_male, age_band)
+    self.overall = {}
+    # Keyed by (is_male, age_band, event_code)
+    self.by_event = {}
+
+  def _find_age_band(self, age):
+    i = bisect_right( self._min_ages, age ) - 1
+    if (i < 0) or (age > self.age_bands[i][1]):
+      return None
+    return self.age_bands[i]
+
+  # all_swimmer_times is a list of scored scores_report.SwimmerTimes
+  def build(self, all_swimmer_times):
+    overall_entries = {}
+    event_entries = {}
+    for swimmer_times in all_swimmer_times:
+      age_band = self._find_age_band( swimmer_times.age )
+      if age_band is None:
+        continue
+      is_male = swimmer_times.swimmer.is_male
+      seconds_improved = 0.0
+      is_scored = False
+      for event_code, race in enumerate( swimmer_times.race_by_event ):
+        if (race is None) or (race.time is None) or (race.consideration_time is None):
+          continue
+        is_scored = True
+        improvement = race.consideration_time - race.time
+        seconds_improved += improvement
+        event_entries.setdefault( (is_male, age_band, event_code), [] ).append( LeaderboardEntry( swimmer_times.full_name, race.points, improvement ) )
+      if is_scored:
+        overall_entries.setdefault( (is_male, age_band), [] ).append( LeaderboardEntry( swimmer_times.full_name, swimmer_times.points, seconds_improved ) )
+
+    self.overall = { key : top_k( entries, self.num_leaders ) for key, entries in overall_entries.items() }
+    self.by_event = { key : top_k( entries, self.num_leaders ) for key, entries in event_entries.items() }
+
+  def _write_leaderboard(self, f, title, leaders):
+    f.write( title + '\n' )
+    for rank, entry in enumerate( leaders, 1 ):
+      f.write( '%d. %s: %d (%.2fs improvement)\n' % (rank, entry.full_name, entry.points, entry.seconds_improved) )
+    f.write( '\n' )
+
+  # Writes each age group's overall leaderboard, followed by its event
+  # leaderboards, girls first.
+  def write(self, f):
+    for is_male in ( False, True ):
+      gender_str = 'Girls'
+      if is_male:
+        gender_str = 'Boys'
+      for age_band in self.age_bands:
+        title = gender_str + ' ' + get_age_band_name( age_band )
+        leaders = self.overall.get( (is_male, age_band) )
+        if leaders is None:
+          continue
+        self._write_leaderboard( f, title, leaders )
+        for event_code in range( 0, num_events ):
+          leaders = self.by_event.get( (is_male, age_band, event_code) )
+          if leaders is not None:
+            self._write_leaderboard( f, title + ' ' + short_course_events[ event_code ].short_name_without_course(), leaders )
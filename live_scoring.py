@@ -0,0 +1,221 @@
+# Winsford ASC Club Champs Scoring System
+#   live_scoring.py
+#   Keeps the Best Boy and Best Girl standings up to date as club champs
+#   results come in, one race at a time.  Used by calculate_live_scores.py.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import heapq
+import os
+import time
+
+
+import helpers
+import instrumentation
+
+from event import Event
+from event import short_course_events
+from race_time import parse_race_time
+from scoring import score_race
+from swim_list_reader import read_swimmer_blocks
+from scores_report import EventCodeAndTime
+from incremental import write_if_changed
+
+num_events = len( short_course_events )
+
+class Leaderboard():
+  """Swimmers sorted by total points, highest first.  Swimmers on equal
+  points stay in the order they were added, just like
+  ScoringEngine.rankings().  It's a heap of (-points, order), and moving a
+  swimmer just pushes their new entry, leaving the old one to be thrown
+  away when it comes to the top, so each move is O(log n)."""
+  def __init__(self):
+    # (-points, order), including out of date entries for swimmers that
+    # have moved since
+    self._heap = []
+    # The current points for each swimmer, by order
+    self._points = {}
+
+  def __len__(self):
+    return len( self._points )
+
+  def add(self, order, points):
+    self._points[ order ] = points
+    heapq.heappush( self._heap, ( -points, order ) )
+
+  def move(self, order, points):
+    self._points[ order ] = points
+    heapq.heappush( self._heap, ( -points, order ) )
+    # Rebuild the heap now and then, rather than let out of date entries
+    # pile up.  That's O(n), but only once every n or so moves.
+    if len( self._heap ) > (2 * len( self._points )) + 16:
+      self._heap = [ ( -points, order ) for order, points in self._points.items() ]
+      heapq.heapify( self._heap )
+
+  # Yields (order, points) for the top num_leaders swimmers, or all of
+  # them if num_leaders is 0.
+  def leaders(self, num_leaders=0):
+    if (num_leaders <= 0) or (num_leaders >= len( self._points )):
+      keys = sorted( ( -points, order ) for order, points in self._points.items() )
+    else:
+      # Pop the leaders off the top, throwing away out of date entries,
+      # and then put them back.  A swimmer that's moved back to points
+      # they had before can have two identical entries, so only one is
+      # kept.
+      heap = self._heap
+      keys = []
+      seen = set()
+      while len( keys ) < num_leaders:
+        key = heapq.heappop( heap )
+        negative_points, order = key
+        if (order not in seen) and (self._points[ order ] == -negative_points):
+          seen.add( order )
+          keys.append( key )
+      for key in keys:
+        heapq.heappush( heap, key )
+    for negative_points, order in keys:
+      yield order, -negative_points
+
+class _LiveSwimmer():
+  def __init__(self, swimmer, full_name, age, races):
+    self.swimmer = swimmer
+    self.full_name = full_name
+    self.age = age
+    self.consideration_times = [ None ] * num_events
+    self.consideration_is_nt = [ False ] * num_events
+    for race in races:
+      self.consideration_times[ race.event_code ] = race.time
+      self.consideration_is_nt[ race.event_code ] = race.is_nt
+    self.points_by_event = [ 0 ] * num_events
+    self.points = 0
+
+class LiveScores():
+  """The Best Boy and Best Girl standings, starting from the consideration
+  times in folder/ConsiderationTimes.txt, with everybody on 0 points.
+  Each race result that's applied rescores just that race, and moves the
+  swimmer on their leaderboard.  A later result for the same swimmer and
+  event replaces the earlier one, just as it does in RaceTimes.txt.
+  The standings are published to LiveScoresBoys.txt and
+  LiveScoresGirls.txt, showing the top num_leaders, or everybody if it's
+  0.
+  Results are matched to swimmers by ASA number.  ScoresReport matches
+  RaceTimes.txt to the consideration times by name, so where swimmers
+  share a name the batch scores merge them and these don't."""
+  def __init__(self, folder, club_champs_date, num_leaders=0):
+    self.folder = folder
+    self.num_leaders = num_leaders
+    self.swimmers = []
+    self.swimmers_by_asa_number = {}
+    self.boys = Leaderboard()
+    self.girls = Leaderboard()
+    with open( folder + 'ConsiderationTimes.txt', 'r' ) as consideration_times_file:
+      for swimmer, races in read_swimmer_blocks( consideration_times_file, EventCodeAndTime ):
+        live_swimmer = _LiveSwimmer( swimmer, swimmer.full_name(), helpers.CalcAge( swimmer.date_of_birth, club_champs_date ), races )
+        order = len( self.swimmers )
+        self.swimmers.append( live_swimmer )
+        self.swimmers_by_asa_number[ swimmer.asa_number ] = order
+        self._get_leaderboard( live_swimmer ).add( order, 0 )
+
+  def _get_leaderboard(self, live_swimmer):
+    if live_swimmer.swimmer.is_male:
+      return self.boys
+    return self.girls
+
+  # Applies a line of the race results feed, 'asa_number|event|time',
+  # e.g. '123456|50 Free|31.25'.  Returns the Leaderboard that changed,
+  # or None if nothing did.  Lines that can't be read, or are for an
+  # unknown event or swimmer, are reported and skipped, so that one bad
+  # line doesn't stop the scoring.
+  def apply_result(self, line):
+    line = line.strip()
+    try:
+      asa_number_str, event_str, time_str = line.split( '|' )
+      asa_number = int( asa_number_str )
+      event = Event.create_from_str( event_str, 'S' )
+      race_time = parse_race_time( time_str )
+    except (ValueError, IndexError, RuntimeError):
+      print( 'Unable to read race result, so ignoring it: ' + line )
+      instrumentation.count( 'live_scores.unreadable_results' )
+      return None
+    if (event is None) or (event.stroke_id is None):
+      print( 'Unknown event, so ignoring race result: ' + line )
+      instrumentation.count( 'live_scores.unreadable_results' )
+      return None
+    order = self.swimmers_by_asa_number.get( asa_number )
+    if order is None:
+      print( 'No consideration times for ' + asa_number_str + ', so ignoring race result: ' + line )
+      instrumentation.count( 'live_scores.results_without_consideration_times' )
+      return None
+    live_swimmer = self.swimmers[ order ]
+    event_code = event.get_short_course_event_code()
+    points = score_race( event_code, live_swimmer.swimmer.is_male, live_swimmer.age, live_swimmer.consideration_times[ event_code ], race_time, live_swimmer.consideration_is_nt[ event_code ] )
+    old_total = live_swimmer.points
+    live_swimmer.points += points - live_swimmer.points_by_event[ event_code ]
+    live_swimmer.points_by_event[ event_code ] = points
+    instrumentation.count( 'live_scores.results' )
+    if live_swimmer.points == old_total:
+      return None
+    leaderboard = self._get_leaderboard( live_swimmer )
+    leaderboard.move( order, live_swimmer.points )
+    return leaderboard
+
+  # Writes out leaderboard, if what's shown of it has changed.  Returns
+  # True if it was written.
+  def publish(self, leaderboard):
+    lines = []
+    rank = 0
+    for order, points in leaderboard.leaders( self.num_leaders ):
+      rank += 1
+      lines.append( str( rank ) + '. ' + self.swimmers[ order ].full_name + ': ' + str( points ) + '\n' )
+    file_name = 'LiveScoresGirls.txt'
+    if leaderboard is self.boys:
+      file_name = 'LiveScoresBoys.txt'
+    return write_if_changed( self.folder + file_name, ''.join( lines ) )
+
+  def publish_all(self):
+    self.publish( self.boys )
+    self.publish( self.girls )
+
+# Yields each line that's appended to the file at path, from the start,
+# waiting poll_interval seconds between checks for more.  Only complete
+# lines are yielded.  If the file is truncated or replaced by a shorter
+# one, it's read again from the start.
+# With follow False, stops at the end of what's there already.
+def read_feed( path, poll_interval=0.1, follow=True ):
+  position = 0
+  partial_line = ''
+  while True:
+    size = os.path.getsize( path ) if os.path.exists( path ) else 0
+    if size < position:
+      position = 0
+      partial_line = ''
+    data = ''
+    if size > position:
+      with open( path, 'r' ) as f:
+        f.seek( position )
+        data = f.read()
+        position = f.tell()
+    lines = (partial_line + data).split( '\n' )
+    partial_line = lines.pop()
+    for line in lines:
+      if len( line.strip() ) > 0:
+        yield line
+    if (len( data ) == 0) and not follow:
+      return
+    if len( data ) == 0:
+      time.sleep( poll_interval )
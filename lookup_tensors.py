@@ -0,0 +1,79 @@
+# Winsford ASC Club Champs Scoring System
+#   lookup_tensors.py
+#   Dense NumPy versions of the qualifying time, NT consideration time
+#   and seconds per point tables, for looking up whole clubs at once.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+# Each table is a float64 array indexed [gender, event, age], where
+# gender is 0 for girls and 1 for boys, event is the short course event
+# code and age runs from 0 to NUM_AGES - 1.  Entries where the scalar
+# lookup would give None (or fail) are NaN.
+# The tensors are filled in by calling the scalar lookup functions for
+# every cell, so the age clamping rules and any quirks are exactly the
+# same as the scalar versions.  All of the tables clamp well below
+# NUM_AGES, so older ages are clamped to the last column.
+
+import numpy
+
+from event import short_course_events
+from qualifying_times import get_qualifying_time
+from nt_consideration_times import get_nt_consideration_time
+from points_table import get_seconds_per_point
+
+NUM_AGES = 100
+
+def _build_tensor( lookup ):
+  num_events = len( short_course_events )
+  tensor = numpy.full( (2, num_events, NUM_AGES), numpy.nan )
+  for gender in range( 0, 2 ):
+    for event_code in range( 0, num_events ):
+      for age in range( 0, NUM_AGES ):
+        try:
+          value = lookup( event_code, gender == 1, age )
+        except (IndexError, TypeError):
+          value = None
+        if value is not None:
+          tensor[ gender, event_code, age ] = value
+  return tensor
+
+qualifying_time_tensor = _build_tensor( get_qualifying_time )
+nt_consideration_time_tensor = _build_tensor( get_nt_consideration_time )
+# The points table is the same for boys and girls, but it's kept the same
+# shape as the others so that they can all be indexed the same way.
+seconds_per_point_tensor = _build_tensor( lambda event_code, is_male, age: get_seconds_per_point( event_code, age ) )
+
+# Looks up tensor for arrays of event codes (either course), genders and
+# ages, which are broadcast against each other.
+def lookup( tensor, event_codes, is_male, ages ):
+  genders = numpy.asarray( is_male ).astype( numpy.intp )
+  event_codes = numpy.asarray( event_codes ) & 0xff
+  ages = numpy.clip( ages, 0, tensor.shape[2] - 1 )
+  return tensor[ genders, event_codes, ages ]
+
+# Batch version of qualifying_times.get_qualifying_time()
+def lookup_qualifying_times( event_codes, is_male, ages ):
+  return lookup( qualifying_time_tensor, event_codes, is_male, ages )
+
+# Batch version of nt_consideration_times.get_nt_consideration_time()
+def lookup_nt_consideration_times( event_codes, is_male, ages ):
+  return lookup( nt_consideration_time_tensor, event_codes, is_male, ages )
+
+# Batch version of points_table.get_seconds_per_point()
+def lookup_seconds_per_point( event_codes, is_male, ages ):
+  return lookup( seconds_per_point_tensor, event_codes, is_male, ages )
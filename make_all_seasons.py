@@ -0,0 +1,74 @@
+# Winsford ASC Club Champs Scoring System
+#   make_all_seasons.py
+#   Makes the consideration times, race times, scores and qualifiers for
+#   lots of seasons at once, e.g. to backfill past years, reading the swim
+#   list only once.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import helpers
+import instrumentation
+
+from season_runner import Season
+from season_runner import run_seasons
+
+folder = 'f:/SwimLists/'
+swim_list_path = folder + 'SwimList.txt'
+use_swim_list_cache = False # Set to True to read SwimList.txt through a memory-mapped copy, SwimList.txt.cache, which is built next to it on the first run.  Needs numpy.
+use_swim_store = False # Set to True to read SwimList.txt through an indexed SQLite copy, SwimList.txt.sqlite, instead.
+maximum_age = 21 # Any swimmer older will be excluded
+num_workers = 1 # Set higher to calculate the consideration times for all of the seasons in that many processes
+chunk_size = 16 # Number of swimmers sent to a worker process at a time
+incremental = False # Set to True to reuse results from the last run for swimmers whose swims haven't changed
+fuzzy_entry_matching = False # Set to True to match swimmers to misspelt names in EntryList.txt, as a last resort
+instrument = False # Set to True to print a summary of where the time went at the end of the run, and write it to SeasonsStats.json
+profile = False # With instrument set, also profile the run with cProfile
+trace_memory = False # With instrument set, also find the peak memory use with tracemalloc, which is very slow
+
+# One of these for each season.  Each season's reports go in its own
+# folder, which needs that season's EntryList.txt in it.
+seasons = [
+{
+  'folder' : folder + '2015/',
+  'club_champs_start_date' : '12/9/2015',
+  'club_champs_date' : '19/9/2015',
+  'club_champs_meet_name' : 'Winsford  Club Championships',
+  'age_on_date' : '31/12/2016',
+  'earliest_pb_date' : '8/6/2015',
+  'level_4_meets' : { "Winsford  Club Championships" },
+  # Swimmers that are in our database that no longer swim for Winsford
+  'excluded_swimmers' : { "Alisha Hawkins", "Ashley Hogg" },
+},
+]
+
+def create_season( settings ):
+  return Season( settings[ 'folder' ],
+    helpers.ParseDate_dmY( settings[ 'club_champs_start_date' ] ),
+    helpers.ParseDate_dmY( settings[ 'club_champs_date' ] ),
+    settings[ 'club_champs_meet_name' ],
+    helpers.ParseDate_dmY( settings[ 'age_on_date' ] ),
+    helpers.ParseDate_dmY( settings[ 'earliest_pb_date' ] ),
+    settings.get( 'level_4_meets', () ),
+    settings.get( 'excluded_swimmers', () ) )
+
+# The worker processes used when num_workers > 1 may import this file, so
+# only do the work when we're run as a script.
+if __name__ == '__main__':
+  if instrument:
+    instrumentation.enable( folder + 'SeasonsStats.json', profile, trace_memory )
+  run_seasons( swim_list_path, [ create_season( settings ) for settings in seasons ], maximum_age, use_swim_list_cache, use_swim_store, num_workers, chunk_size, incremental, fuzzy_entry_matching )
@@ -0,0 +1,61 @@
+# Winsford ASC Club Champs Scoring System
+#   make_county_reports.py
+#   Makes the consideration times, race times, scores and qualifiers for
+#   every club in the county league at once, along with a county summary.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import os
+import helpers
+
+from season_runner import Season
+from club_runner import run_clubs
+
+# One folder per club in here, named after the club, each with its own
+# SwimList.txt and EntryList.txt.  The reports for each club go in its
+# folder, and CountySummary.txt goes in here.
+county_folder = 'f:/CountySwimLists/'
+use_swim_list_cache = False # Set to True to read SwimList.txt through a memory-mapped copy, SwimList.txt.cache, which is built next to it on the first run.  Needs numpy.
+use_swim_store = False # Set to True to read SwimList.txt through an indexed SQLite copy, SwimList.txt.sqlite, instead.
+maximum_age = 21 # Any swimmer older will be excluded
+num_workers = os.cpu_count() # Number of clubs to run at once
+fuzzy_entry_matching = False # Set to True to match swimmers to misspelt names in EntryList.txt, as a last resort
+
+club_champs_start_date_str = '12/9/2015'
+club_champs_date_str = '19/9/2015'
+age_on_date_str = '31/12/2016'
+earliest_pb_date_str = '8/6/2015'
+# The name of each club's club champs meet, by folder name.  Clubs not
+# listed get their folder name followed by ' Club Championships'.
+club_champs_meet_names = {
+"Winsford" : "Winsford  Club Championships"
+}
+
+club_champs_start_date = helpers.ParseDate_dmY( club_champs_start_date_str )
+club_champs_date = helpers.ParseDate_dmY( club_champs_date_str )
+age_on_date = helpers.ParseDate_dmY( age_on_date_str )
+earliest_pb_date = helpers.ParseDate_dmY( earliest_pb_date_str )
+
+def create_season( name, folder ):
+  meet_name = club_champs_meet_names.get( name, name + ' Club Championships' )
+  return Season( folder, club_champs_start_date, club_champs_date, meet_name, age_on_date, earliest_pb_date, [ meet_name ] )
+
+# The worker processes may import this file, so only do the work when
+# we're run as a script.
+if __name__ == '__main__':
+  run_clubs( county_folder, create_season, maximum_age, num_workers, use_swim_list_cache, use_swim_store, fuzzy_entry_matching )
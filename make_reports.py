@@ -0,0 +1,86 @@
+# Winsford ASC Club Champs Scoring System
+#   make_reports.py
+#   Produces the consideration times, club champs race times and
+#   qualifiers reports in one go, reading the swim list only once.
+#   Each report can still be made on its own by running
+#   make_consideration_times.py, extract_club_champs_times.py or
+#   find_qualifiers.py.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import helpers
+import instrumentation
+
+from pipeline import run_pipeline
+from consideration_times_report import ConsiderationTimesReport
+from race_times_report import RaceTimesReport
+from qualifiers_report import QualifiersReport
+
+folder = 'f:/SwimLists/'
+swim_list_path = folder + 'SwimList.txt'
+use_swim_list_cache = False # Set to True to read SwimList.txt through a memory-mapped copy, SwimList.txt.cache, which is built next to it on the first run.  Needs numpy.
+use_swim_store = False # Set to True to read SwimList.txt through an indexed SQLite copy, SwimList.txt.sqlite, instead.
+maximum_age = 21 # Any swimmer older will be excluded
+incremental = False # Set to True to reuse results from the last run for swimmers whose swims haven't changed
+instrument = False # Set to True to print a summary of where the time went at the end of the run, and write it to ReportsStats.json
+profile = False # With instrument set, also profile the run with cProfile
+trace_memory = False # With instrument set, also find the peak memory use with tracemalloc, which is very slow
+
+# Set any of these to False to leave that report out
+make_consideration_times = True
+extract_club_champs_times = True
+find_qualifiers = True
+
+# Consideration times and club champs race times
+club_champs_start_date_str = '12/9/2015'
+club_champs_date_str = '19/9/2015'
+club_champs_meet_name = 'Winsford  Club Championships'
+num_workers = 1 # Set higher to calculate consideration times in that many processes
+chunk_size = 16 # Number of swimmers sent to a worker process at a time
+fuzzy_entry_matching = False # Set to True to match swimmers to misspelt names in EntryList.txt, as a last resort
+
+# Qualifiers
+age_on_date_str = '31/12/2016'
+earliest_pb_date_str = '8/6/2015'
+level_4_meets = {
+"Winsford  Club Championships"
+}
+# Swimmers that are in our database that no longer swim for Winsford
+excluded_swimmers = {
+"Alisha Hawkins",
+"Ashley Hogg"
+}
+
+club_champs_start_date = helpers.ParseDate_dmY( club_champs_start_date_str )
+club_champs_date = helpers.ParseDate_dmY( club_champs_date_str )
+age_on_date = helpers.ParseDate_dmY( age_on_date_str )
+earliest_pb_date = helpers.ParseDate_dmY( earliest_pb_date_str )
+
+# The worker processes used when num_workers > 1 may import this file, so
+# only do the work when we're run as a script.
+if __name__ == '__main__':
+  if instrument:
+    instrumentation.enable( folder + 'ReportsStats.json', profile, trace_memory )
+  reports = []
+  if make_consideration_times:
+    reports.append( ConsiderationTimesReport( folder, club_champs_start_date, club_champs_date, maximum_age, num_workers, chunk_size, incremental, fuzzy_entry_matching ) )
+  if extract_club_champs_times:
+    reports.append( RaceTimesReport( folder, club_champs_start_date, club_champs_date, club_champs_meet_name, maximum_age, fuzzy_entry_matching ) )
+  if find_qualifiers:
+    reports.append( QualifiersReport( folder, age_on_date, earliest_pb_date, maximum_age, level_4_meets, excluded_swimmers, incremental ) )
+  run_pipeline( swim_list_path, reports, use_swim_list_cache, use_swim_store )
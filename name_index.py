@@ -0,0 +1,126 @@
+# Winsford ASC Club Champs Scoring System
+#   name_index.py
+#   Looking up swimmers by name, ignoring differences in case, spacing,
+#   accents and punctuation, with an optional fuzzy fallback for typos.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import collections
+import functools
+import heapq
+import unicodedata
+
+_DASHES = '-‐‑‒–—−'
+_APOSTROPHES = '\'`‘’ʼ´'
+_TRANSLATION = dict( [ (ord( c ), ' ') for c in _DASHES ] + [ (ord( c ), None) for c in _APOSTROPHES + '.' ] )
+
+# Returns name in a form where 'Zoë O’Brien-Smith', 'zoe obrien smith'
+# and ' ZOE  OBrien - Smith' all come out the same.
+@functools.lru_cache( maxsize=65536 )
+def normalize_name( name ):
+  name = unicodedata.normalize( 'NFKD', name )
+  name = ''.join( [ c for c in name if not unicodedata.combining( c ) ] )
+  return ' '.join( name.translate( _TRANSLATION ).casefold().split() )
+
+def _trigrams( normalized_name ):
+  padded = ' ' + normalized_name + ' '
+  return set( [ padded[i:i+3] for i in range( 0, len( padded ) - 2 ) ] )
+
+# Stands in for the key of a name that different keys have been added
+# under
+_AMBIGUOUS = object()
+
+class NameIndex():
+  """Maps names to keys, e.g. entry list names or swimmers.
+  Names are normalized with normalize_name(), so lookups are a single
+  dict access.  If names for different keys normalize to the same thing,
+  that name is ambiguous, and isn't found at all, rather than being
+  matched to whichever was added first or last.
+  find_fuzzy() is for names that aren't found at all.  It compares
+  trigrams, which are only indexed the first time it's called."""
+  def __init__(self):
+    self._keys = {}
+    self._trigram_postings = None
+    self._num_trigrams = None
+
+  def __len__(self):
+    return len( self._keys )
+
+  def add(self, name, key):
+    normalized_name = normalize_name( name )
+    existing_key = self._keys.get( normalized_name )
+    if existing_key is None:
+      self._keys[ normalized_name ] = key
+      self._trigram_postings = None
+    elif existing_key != key:
+      self._keys[ normalized_name ] = _AMBIGUOUS
+
+  # Returns the key for name, or None if there isn't one, or if it's
+  # ambiguous.
+  def find(self, name):
+    key = self._keys.get( normalize_name( name ) )
+    if key is _AMBIGUOUS:
+      return None
+    return key
+
+  # Returns True if name has been added for more than one key.
+  def is_ambiguous(self, name):
+    return self._keys.get( normalize_name( name ) ) is _AMBIGUOUS
+
+  # Returns the key for the name most like name, as long as it shares at
+  # least min_similarity of its trigrams with it (by Jaccard index) and
+  # nothing else is as close, and it isn't ambiguous, otherwise None.
+  # Only names that share a trigram with name are looked at, and only the
+  # max_candidates of those sharing the most are scored.
+  def find_fuzzy(self, name, min_similarity=0.6, max_candidates=16):
+    normalized_name = normalize_name( name )
+    key = self._keys.get( normalized_name )
+    if key is _AMBIGUOUS:
+      return None
+    if key is not None:
+      return key
+    if self._trigram_postings is None:
+      self._index_trigrams()
+
+    trigrams = _trigrams( normalized_name )
+    num_shared = collections.Counter()
+    for trigram in trigrams:
+      num_shared.update( self._trigram_postings.get( trigram, () ) )
+    candidates = heapq.nlargest( max_candidates, num_shared.items(), key=lambda item: item[1] )
+
+    best_similarity = 0.0
+    best_keys = set()
+    for candidate, shared in candidates:
+      similarity = float( shared ) / float( len( trigrams ) + self._num_trigrams[ candidate ] - shared )
+      if similarity > best_similarity:
+        best_similarity = similarity
+        best_keys = set( [ self._keys[ candidate ] ] )
+      elif similarity == best_similarity:
+        best_keys.add( self._keys[ candidate ] )
+    if (best_similarity < min_similarity) or (len( best_keys ) != 1) or (_AMBIGUOUS in best_keys):
+      return None
+    return best_keys.pop()
+
+  def _index_trigrams(self):
+    self._trigram_postings = collections.defaultdict( list )
+    self._num_trigrams = {}
+    for normalized_name in self._keys:
+      trigrams = _trigrams( normalized_name )
+      self._num_trigrams[ normalized_name ] = len( trigrams )
+      for trigram in trigrams:
+        self._trigram_postings[ trigram ].append( normalized_name )
@@ -21,7 +21,7 @@
 
 from event import Event
 from event import short_course_events
-from race_time import RaceTime
+from race_time import parse_race_time
 
 _BOYS_SPREADSHEET_DATA_STR = """50 Free	56.01	56.01	50.01	49.01	46.5	46.01	45.82	45.22
 100 Free	1.33.00	1.33.00	1.33.00	1.33.00	1.29.31	1.27.07	1.25.58	1.24.48
@@ -77,7 +77,7 @@ def _parse_spreadsheet_data( spreadsheet_data ):
       if len( columns[i] ) == 0:
         nt_times_for_event.append( None )
       else:
-        nt_times_for_event.append( float( RaceTime( columns[i] ) ) )
+        nt_times_for_event.append( parse_race_time( columns[i] ) )
   return nt_times_by_event
         
 _boys_nt_consideration_times_by_event = _parse_spreadsheet_data( _BOYS_SPREADSHEET_DATA_STR )
@@ -0,0 +1,159 @@
+# Winsford ASC Club Champs Scoring System
+#   pb_index.py
+#   Per-event indexes of a swimmer's swims, for finding PBs as of a date,
+#   and the first PB after a date, in O(log n).  Used by
+#   consideration_times.py.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import itertools
+
+from bisect import bisect_right
+from operator import attrgetter
+
+from event import short_course_events
+
+num_events = len( short_course_events )
+
+_get_date = attrgetter( 'date' )
+
+class EventPBIndex():
+  """A swimmer's swims in one event, sorted by date, for answering PB
+  questions.  get_time( swim ) gives the time that counts for each swim,
+  e.g. its short course time.
+  Where swims have the same time, the earliest one is the PB, as that's
+  when the time was set.  Swims on the same date keep the order they
+  were given in."""
+  __slots__ = ( 'swims', 'dates', '_get_time', '_pb_times', '_pb_positions', '_arrays' )
+
+  def __init__(self, swims, get_time):
+    self.swims = sorted( swims, key=_get_date )
+    self.dates = list( map( _get_date, self.swims ) )
+    self._get_time = get_time
+    # The PB time as of each swim.  These never go up, so they can be
+    # binary searched.
+    self._pb_times = list( itertools.accumulate( map( get_time, self.swims ), min ) )
+    # The position of the swim that set the PB as of each swim.  On equal
+    # times the earlier swim stays the PB.
+    pb_times = self._pb_times
+    self._pb_positions = [ 0 ] * len( pb_times )
+    pb_position = 0
+    for i in range( 1, len( pb_times ) ):
+      if pb_times[i] < pb_times[ i - 1 ]:
+        pb_position = i
+      self._pb_positions[i] = pb_position
+    # NumPy arrays for the batch queries, built the first time they're
+    # needed.  Only the batch queries need numpy.
+    self._arrays = None
+
+  def __len__(self):
+    return len( self.swims )
+
+  # The position of the PB swim out of the first end swims
+  def _pb_position(self, end):
+    return self._pb_positions[ end - 1 ]
+
+  # The PB swim on or before date, or None.
+  def pb_as_of(self, date):
+    end = bisect_right( self.dates, date )
+    if end == 0:
+      return None
+    return self.swims[ self._pb_position( end ) ]
+
+  # The first swim after date that beats the PB as of date, or None if
+  # there's no such swim, or no PB as of date to beat.
+  def first_pb_after(self, date):
+    end = bisect_right( self.dates, date )
+    if (end == 0) or (end == len( self.dates )):
+      return None
+    pb_time = self._pb_times[ end - 1 ]
+    if not (self._pb_times[-1] < pb_time):
+      return None
+    # Binary search for the first swim where the running PB time drops
+    low = end
+    high = len( self._pb_times ) - 1
+    while low < high:
+      middle = (low + high) // 2
+      if self._pb_times[ middle ] < pb_time:
+        high = middle
+      else:
+        low = middle + 1
+    return self.swims[ low ]
+
+  # Returns NumPy arrays of the date ordinals and times of the swims,
+  # e.g. for looking up the positions returned by the batch queries.
+  def get_date_ordinals_and_times(self):
+    arrays = self._get_arrays()
+    return arrays[0], arrays[1]
+
+  # Batch version of pb_as_of() for a NumPy array of date ordinals.
+  # Returns an array of the positions of the PB swims in swims, with -1
+  # where pb_as_of() would return None.
+  def get_pb_positions_as_of(self, date_ordinals):
+    import numpy
+    if len( self.swims ) == 0:
+      return numpy.full( len( date_ordinals ), -1 )
+    ordinals, times, pb_positions, next_pb_positions = self._get_arrays()
+    ends = numpy.searchsorted( ordinals, date_ordinals, side='right' )
+    return numpy.where( ends > 0, pb_positions[ ends - 1 ], -1 )
+
+  # Batch version of first_pb_after() for a NumPy array of date ordinals.
+  # Returns an array of positions in swims, with -1 where
+  # first_pb_after() would return None.
+  def get_first_pb_positions_after(self, date_ordinals):
+    import numpy
+    if len( self.swims ) == 0:
+      return numpy.full( len( date_ordinals ), -1 )
+    ordinals, times, pb_positions, next_pb_positions = self._get_arrays()
+    ends = numpy.searchsorted( ordinals, date_ordinals, side='right' )
+    return numpy.where( ends > 0, next_pb_positions[ ends - 1 ], -1 )
+
+  def _get_arrays(self):
+    import numpy
+    if self._arrays is None:
+      num_swims = len( self.swims )
+      ordinals = numpy.array( [ date.toordinal() for date in self.dates ], dtype=numpy.int64 )
+      times = numpy.array( list( map( self._get_time, self.swims ) ), dtype=numpy.float64 )
+      pb_times = numpy.array( self._pb_times, dtype=numpy.float64 )
+      positions = numpy.arange( num_swims )
+      # The swims that set a new PB, the position of the PB as of each
+      # swim, and the position of the next new PB after each swim, or -1
+      sets_pb = numpy.ones( num_swims, dtype=numpy.bool_ )
+      sets_pb[1:] = pb_times[1:] < pb_times[:-1]
+      pb_positions = numpy.maximum.accumulate( numpy.where( sets_pb, positions, 0 ) )
+      new_pb_positions = numpy.append( positions[ sets_pb ], -1 )
+      next_pb_positions = new_pb_positions[ numpy.searchsorted( positions[ sets_pb ], positions, side='right' ) ]
+      self._arrays = ( ordinals, times, pb_positions, next_pb_positions )
+    return self._arrays
+
+# Shared by all the events that a swimmer hasn't swum
+_empty_index = EventPBIndex( [], None )
+
+# Returns a list with an EventPBIndex for each short course event code.
+# Long and short course swims go in the same index.
+def index_swims_by_event( swims, get_time ):
+  swims_by_event = []
+  for i in range( 0, num_events ):
+    swims_by_event.append( [] )
+  for swim in swims:
+    swims_by_event[ swim.event.get_short_course_event_code() ].append( swim )
+  indexes = [ _empty_index ] * num_events
+  for event_code, event_swims in enumerate( swims_by_event ):
+    if len( event_swims ) > 0:
+      indexes[ event_code ] = EventPBIndex( event_swims, get_time )
+  return indexes
@@ -0,0 +1,121 @@
+# Winsford ASC Club Champs Scoring System
+#   pipeline.py
+#   Reads the swim list once and feeds every swimmer to any number of
+#   report stages, so that all of the reports come from a single pass.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+# A report stage is any object with
+#   swim_filter - a swim_list_reader.SwimFilter for the swims it needs,
+#                 or None for all of them.
+#   run( blocks ) - consumes an iterable of (swimmer, swims), which have
+#                   been through swim_filter, and writes out its reports.
+# See consideration_times_report.py, race_times_report.py and
+# qualifiers_report.py.
+# 
+# With more than one stage, each stage's run() is given its own thread,
+# and the blocks are handed to it through a bounded queue.  That way the
+# stages can stay written as simple loops over their blocks, and only a
+# few blocks are ever held in memory at once.
+
+import queue
+import threading
+
+from swim_list_reader import combine_filters
+from swim_list_reader import open_swim_list
+
+# Mark the end of the blocks in a stage's queue, either because they've
+# all been read, or because reading the swim list failed.
+_END = object()
+_ABORT = object()
+
+class _StageThread(threading.Thread):
+  def __init__(self, stage, queue_size):
+    threading.Thread.__init__( self )
+    self.stage = stage
+    self.queue = queue.Queue( queue_size )
+    self.finished = False
+    self.error = None
+
+  def _blocks(self):
+    while not self.finished:
+      block = self.queue.get()
+      if (block is _END) or (block is _ABORT):
+        self.finished = True
+        if block is _ABORT:
+          # Stop the stage before it writes out anything incomplete
+          raise RuntimeError( "Reading the swim list failed" )
+        return
+      yield block
+
+  def run(self):
+    try:
+      self.stage.run( self._blocks() )
+    except BaseException as e:
+      self.error = e
+    # Keep taking blocks until the end, even if the stage has failed or
+    # stopped early, so that the reader is never left waiting on us.
+    while not self.finished:
+      block = self.queue.get()
+      self.finished = (block is _END) or (block is _ABORT)
+
+  def put(self, swimmer, swims):
+    swim_filter = self.stage.swim_filter
+    if swim_filter is not None:
+      swims = swim_filter.filter_block( swimmer, swims )
+      if swims is None:
+        return
+    self.queue.put( (swimmer, swims) )
+
+# Runs all of stages over the swim list at swim_list_path, reading it
+# only once.  The swim list is read with the loosest filter that gives
+# every stage all of the swims it needs, then each stage's own filter is
+# applied to the blocks it's given.
+# Each stage sees exactly the same blocks, in the same order, as it would
+# if it were run on its own.
+# use_cache and use_store are as for swim_list_reader.open_swim_list().
+def run_pipeline( swim_list_path, stages, use_cache=False, use_store=False, queue_size=64 ):
+  if len( stages ) == 1:
+    # No need for any threads
+    stage = stages[0]
+    stage.run( open_swim_list( swim_list_path, stage.swim_filter, use_cache, use_store ) )
+    return
+
+  swim_filter = combine_filters( [ stage.swim_filter for stage in stages ] )
+  threads = [ _StageThread( stage, queue_size ) for stage in stages ]
+  for thread in threads:
+    thread.start()
+  succeeded = False
+  try:
+    for swimmer, swims in open_swim_list( swim_list_path, swim_filter, use_cache, use_store ):
+      for thread in threads:
+        thread.put( swimmer, swims )
+    succeeded = True
+  finally:
+    for thread in threads:
+      if succeeded:
+        thread.queue.put( _END )
+      else:
+        thread.queue.put( _ABORT )
+    for thread in threads:
+      thread.join()
+
+  # Pass on the first failure, which still has its traceback
+  for thread in threads:
+    if thread.error is not None:
+      raise thread.error
@@ -0,0 +1,73 @@
+# Winsford ASC Club Champs Scoring System
+#   points_table.py
+#   The number of seconds of improvement that earns each point, by event and age
+#
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+from event import Event
+from event import short_course_events
+
+# Columns are ages 9 to 16.  Swimmers older than 16 use the 16 column.
+_SPREADSHEET_DATA_STR = """50 Free	0.3	0.26	0.22	0.2	0.18	0.17	0.16	0.15
+100 Free	0.75	0.65	0.55	0.5	0.45	0.425	0.4	0.375
+200 Free	1.5	1.3	1.1	1	0.9	0.85	0.8	0.75
+400 Free	3.75	3.25	2.75	2.5	2.25	2.125	2	1.875
+800 Free	6	5.2	4.4	4	3.6	3.4	3.2	3
+1500 Free	12	10.4	8.8	8	7.2	6.8	6.4	6
+50 Breast	0.45	0.39	0.33	0.3	0.27	0.255	0.24	0.225
+100 Breast	1.125	0.975	0.825	0.75	0.675	0.6375	0.6	0.5625
+200 Breast	2.25	1.95	1.65	1.5	1.35	1.275	1.2	1.125
+50 Fly	0.345	0.299	0.253	0.23	0.207	0.1955	0.184	0.1725
+100 Fly	0.8625	0.7475	0.6325	0.575	0.5175	0.48875	0.46	0.43125
+200 Fly	1.725	1.495	1.265	1.15	1.035	0.9775	0.92	0.8625
+50 Back	0.36	0.312	0.264	0.24	0.216	0.204	0.192	0.18
+100 Back	0.9	0.78	0.66	0.6	0.54	0.51	0.48	0.45
+200 Back	1.8	1.56	1.32	1.2	1.08	1.02	0.96	0.9
+100 IM	0.975	0.845	0.715	0.65	0.585	0.5525	0.52	0.4875
+200 IM	1.8	1.56	1.32	1.2	1.08	1.02	0.96	0.9
+400 IM	4.5	3.9	3.3	3	2.7	2.55	2.4	2.25"""
+
+def _parse_spreadsheet_data( spreadsheet_data ):
+  rows = spreadsheet_data.split( '\n' )
+
+  num_events = len( short_course_events )
+  seconds_per_point_by_event = [ None ] * num_events
+  
+  for row in rows:
+    columns = row.split( '\t' )
+    # Parse the event name
+    event_code = Event.create_from_str( columns[0], 'S' ).event_code
+    if len( columns ) != 9:
+      raise RuntimeError( "Unexpected number of columns in spreadsheet data" )
+    seconds_per_point_for_event = []
+    seconds_per_point_by_event[ event_code ] = seconds_per_point_for_event
+    for i in range( 1, 9 ):
+      if len( columns[i] ) == 0:
+        seconds_per_point_for_event.append( None )
+      else:
+        seconds_per_point_for_event.append( float( columns[i] ) )
+  return seconds_per_point_by_event
+        
+seconds_per_point_by_event = _parse_spreadsheet_data( _SPREADSHEET_DATA_STR )
+
+def get_seconds_per_point( event_code, age ):
+  age_for_points = age
+  if age_for_points > 16:
+    age_for_points = 16
+  age_column = age_for_points - 9
+  return seconds_per_point_by_event[ event_code ][ age_column ]
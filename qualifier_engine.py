@@ -0,0 +1,132 @@
+# Winsford ASC Club Champs Scoring System
+#   qualifier_engine.py
+#   Finds the qualifying and near miss long course PBs for every swimmer
+#   in a club at once, using [swimmer, event] matrices.  Used by
+#   qualifiers_report.BatchQualifiersReport.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import numpy
+
+import helpers
+
+from event import short_course_events
+from event_arrays import long_course_race_times
+from lookup_tensors import lookup_qualifying_times
+
+num_events = len( short_course_events )
+
+# Batch version of Swim.truncated_long_course_race_time.  Converted short
+# course times are truncated to 0.1s, in exactly the same way.
+def converted_times( event_codes, race_times ):
+  converted = long_course_race_times( event_codes, race_times )
+  return numpy.where( (numpy.asarray( event_codes ) & 0x100) != 0, converted, numpy.floor( converted * 10 ) * 0.1 )
+
+# Sorts rows by group, then time.  The sort is stable, so rows with equal
+# times stay in row order.
+def _sort_rows( rows, groups, times ):
+  return rows[ numpy.lexsort( ( times[ rows ], groups[ rows ] ) ) ]
+
+# For each of num_groups groups, the first of sorted_rows in that group,
+# or -1 if the group has no rows.  With rows sorted by _sort_rows(), that's
+# the fastest swim, and for ties, the first one in the swim list, just as
+# QualifiersReport picks.
+def _first_rows( sorted_rows, groups, num_groups ):
+  sorted_groups = groups[ sorted_rows ]
+  is_first = numpy.ones( len( sorted_rows ), dtype=numpy.bool_ )
+  is_first[ 1: ] = sorted_groups[ 1: ] != sorted_groups[ :-1 ]
+  first_rows = numpy.full( num_groups, -1, dtype=numpy.int64 )
+  first_rows[ sorted_groups[ is_first ] ] = sorted_rows[ is_first ]
+  return first_rows
+
+class Qualifiers():
+  """[swimmer, event] matrices of each swimmer's long course PB since the
+  earliest PB date, preferring swims that weren't at level 4 meets, and
+  how it compares with their qualifying time.  pb_rows are rows of the
+  swim columns, with -1 where there's no PB, and pb_times and
+  qualifying_times are NaN where there's nothing to compare."""
+  def __init__(self, pb_rows, pb_times, qualifying_times, pb_counts, near_miss_fraction):
+    self.pb_rows = pb_rows
+    self.pb_times = pb_times
+    self.qualifying_times = qualifying_times
+    # Whether each PB was at a meet that counts for qualifying
+    self.pb_counts = pb_counts
+    with numpy.errstate( invalid='ignore' ):
+      self.qualified = pb_times <= qualifying_times
+      self.near_miss = ~self.qualified & (pb_times <= qualifying_times * (1 + near_miss_fraction))
+
+class QualifierEngine():
+  """Holds the swims for a club as columns, one row per swim, with the
+  index of the swimmer each is for.  The best swim for every swimmer
+  and event, with and without level 4 meets, is found up front by
+  sorting all of the swims once, so checking them against the qualifying
+  times for any age_on_date is just a lookup and a compare."""
+  def __init__(self, num_swimmers, swimmer_indexes, event_codes, dates, race_times, is_level_4, earliest_pb_date=None):
+    self.num_swimmers = num_swimmers
+    self.event_codes = numpy.asarray( event_codes )
+    self.dates = numpy.asarray( dates )
+    self.converted_times = converted_times( self.event_codes, race_times )
+    self.is_level_4 = numpy.asarray( is_level_4, dtype=numpy.bool_ )
+
+    groups = (numpy.asarray( swimmer_indexes, dtype=numpy.int64 ) * num_events) + (self.event_codes & 0xff)
+    in_window = numpy.ones( len( self.dates ), dtype=numpy.bool_ )
+    if earliest_pb_date is not None:
+      in_window = self.dates >= earliest_pb_date.toordinal()
+    num_groups = num_swimmers * num_events
+    shape = ( num_swimmers, num_events )
+    # Removing the level 4 swims from the sorted rows leaves them sorted,
+    # so one sort does for both.
+    sorted_rows = _sort_rows( numpy.flatnonzero( in_window ), groups, self.converted_times )
+    self.best_rows = _first_rows( sorted_rows, groups, num_groups ).reshape( shape )
+    sorted_rows = sorted_rows[ ~self.is_level_4[ sorted_rows ] ]
+    self.best_qualifying_rows = _first_rows( sorted_rows, groups, num_groups ).reshape( shape )
+
+  # is_male and ages are arrays with one entry per swimmer.
+  # Swims within near_miss_fraction of the qualifying time, e.g. 0.02 for
+  # 2%, that don't qualify are flagged as near misses.
+  def find_qualifiers(self, is_male, ages, near_miss_fraction=0.02):
+    pb_rows = numpy.where( self.best_qualifying_rows >= 0, self.best_qualifying_rows, self.best_rows )
+    # Row -1 picks up the extra NaN time on the end
+    pb_times = numpy.append( self.converted_times, numpy.nan )[ pb_rows ]
+    pb_counts = (pb_rows >= 0) & ~numpy.append( self.is_level_4, True )[ pb_rows ]
+    qualifying_times = lookup_qualifying_times( numpy.arange( num_events )[ numpy.newaxis, : ], numpy.asarray( is_male )[ :, numpy.newaxis ], numpy.asarray( ages )[ :, numpy.newaxis ] )
+    return Qualifiers( pb_rows, pb_times, qualifying_times, pb_counts, near_miss_fraction )
+
+# Builds a QualifierEngine from the columns of a swim_list_cache.SwimListCache.
+# Returns (engine, swim_rows, swimmer_indexes, ages), where swim_rows are
+# the cache's rows for the engine's swims, and swimmer_indexes are the
+# cache's indexes for the engine's swimmers.  Swimmers older than
+# maximum_age on age_on_date are left out, as SwimFilter would.
+def create_engine_from_cache( cache, age_on_date, earliest_pb_date, maximum_age, level_4_meets ):
+  ages = helpers.CalcAges( cache.swimmers_date_of_birth, age_on_date )
+  swimmer_indexes = numpy.flatnonzero( ages <= maximum_age )
+  first_swim = numpy.asarray( cache.swimmers_first_swim )
+  num_swims_by_swimmer = numpy.diff( first_swim )
+  swim_swimmer_indexes = numpy.repeat( numpy.arange( cache.num_swimmers() ), num_swims_by_swimmer )
+
+  # Only keep the swims for the swimmers we're interested in, renumbering
+  # the swimmers to match
+  positions = numpy.full( cache.num_swimmers(), -1, dtype=numpy.int64 )
+  positions[ swimmer_indexes ] = numpy.arange( len( swimmer_indexes ) )
+  swim_positions = positions[ swim_swimmer_indexes ]
+  rows = numpy.flatnonzero( (swim_positions >= 0) & (numpy.asarray( cache.swims_date ) >= earliest_pb_date.toordinal()) )
+
+  level_4_meet_ids = [ i for i, meet in enumerate( cache.meets ) if meet in level_4_meets ]
+  meet_ids = numpy.asarray( cache.swims_meet )[ rows ]
+  engine = QualifierEngine( len( swimmer_indexes ), swim_positions[ rows ], numpy.asarray( cache.swims_event_code )[ rows ], numpy.asarray( cache.swims_date )[ rows ], numpy.asarray( cache.swims_race_time )[ rows ], numpy.isin( meet_ids, level_4_meet_ids ) )
+  return engine, rows, swimmer_indexes, ages[ swimmer_indexes ]
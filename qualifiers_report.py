@@ -0,0 +1,272 @@
+# Winsford ASC Club Champs Scoring System
+#   qualifiers_report.py
+#   Report stage that lists the swimmers with PBs inside the qualifying
+#   times, in Qualifiers.txt and Qualifiers.html.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import datetime
+import helpers
+import instrumentation
+
+from race_time import format_race_time
+
+from event import short_course_events
+from event import get_event
+from qualifying_times import get_qualifying_time
+from swim_list_reader import SwimFilter
+from incremental import IncrementalState
+from incremental import hash_swimmer_block
+from incremental import open_output_file
+
+num_events = len( short_course_events )
+
+# A swim along with its long course time, and whether it was at a meet
+# that counts for qualifying
+class QualifyingSwim(object):
+  __slots__ = ( 'swim', 'converted_time', 'qualifies' )
+
+  def __init__(self, swim, converted_time, qualifies):
+    self.swim = swim
+    self.converted_time = converted_time
+    self.qualifies = qualifies
+
+def _write_swimmer_heading( text, html, full_name, age ):
+  text.append( full_name + " (" + str(age) + ")\n" )
+  html.append( '<tr class="name"><th colspan="5">' + full_name + " (" + str(age) + ")</th></tr>\n" )
+
+def _write_swim( text, html, event, race_time, meet, date_str, tag_class ):
+  race_time_str = format_race_time( race_time )
+  text.append( "\t" + event.short_name_without_course() + "\t" + race_time_str + "\t" + meet + "\t" + date_str + "\n" )
+  html.append( '<tr class="' + tag_class + '"><td> </td><td>' + event.short_name_without_course() + "</td><td>" + race_time_str + "</td><td>" + meet + "</td><td>" + date_str + "</td></tr>\n" )
+
+class QualifiersReport():
+  """Pipeline stage that finds each swimmer's long course PBs since
+  earliest_pb_date that are inside the qualifying times for their age on
+  age_on_date, and writes Qualifiers.txt and Qualifiers.html to folder.
+  Swims at level_4_meets are listed, but marked as not qualifying."""
+  def __init__(self, folder, age_on_date, earliest_pb_date, maximum_age, level_4_meets, excluded_swimmers, incremental=False):
+    self.folder = folder
+    self.age_on_date = age_on_date
+    self.earliest_pb_date = earliest_pb_date
+    self.maximum_age = maximum_age
+    self.level_4_meets = level_4_meets
+    self.excluded_swimmers = excluded_swimmers
+    self.incremental = incremental
+    # Swims before the qualifying window are never considered, so we don't
+    # even build them.
+    self.swim_filter = SwimFilter( earliest_date=earliest_pb_date, maximum_age=maximum_age, age_on_date=age_on_date )
+    self.num_qualified = 0
+
+  # Returns the (text, html) to write out for the swimmer's qualifying times
+  def process_swimmer(self, swimmer, swims):
+    age = helpers.CalcAge( swimmer.date_of_birth, self.age_on_date )
+    text = []
+    html = []
+
+    full_name = swimmer.full_name()
+    if full_name in self.excluded_swimmers:
+      instrumentation.count( 'qualifiers.swimmers_excluded' )
+      return '', ''
+
+    if age > self.maximum_age:
+      instrumentation.count( 'qualifiers.swimmers_too_old' )
+      return '', ''
+
+    # Find PB in the qualifying window, and qualifying PB.  Where times
+    # are equal, the first swim in the swim list wins.
+    pb_by_event = [ None ] * num_events
+    qual_pb_by_event = [ None ] * num_events
+    for swim in swims:
+      if swim.date >= self.earliest_pb_date:
+        event_code = swim.event.get_short_course_event_code()
+        converted_time = swim.truncated_long_course_race_time
+        qualifying_swim = QualifyingSwim( swim, converted_time, not (swim.meet in self.level_4_meets) )
+
+        pb = pb_by_event[ event_code ]
+        qual_pb = qual_pb_by_event[ event_code ]
+        if qualifying_swim.qualifies and ((qual_pb is None) or (converted_time < qual_pb.converted_time)):
+          qual_pb_by_event[ event_code ] = qualifying_swim
+        if (pb is None) or (converted_time < pb.converted_time):
+          pb_by_event[ event_code ] = qualifying_swim
+
+    printed_name = False
+    for i in range( 0, num_events ):
+      pb = qual_pb_by_event[i]
+      if pb is None:
+        pb = pb_by_event[i]
+      if pb is not None:
+        qt = get_qualifying_time( i, swimmer.is_male, age )
+        if qt is not None:
+          race_time = pb.converted_time
+          if race_time <= qt:
+            tag_class = "qualified"
+            if not pb.qualifies:
+              tag_class = "not-qualified"
+            if not printed_name:
+              _write_swimmer_heading( text, html, full_name, age )
+              printed_name = True
+            swim = pb.swim
+            _write_swim( text, html, swim.event, race_time, swim.meet, swim.date.strftime( '%d/%m/%Y' ), tag_class )
+    if printed_name:
+      text.append( "\n" )
+      instrumentation.count( 'qualifiers.swimmers_qualified' )
+    return ''.join( text ), ''.join( html )
+
+  # blocks is an iterable of (swimmer, swims) that have been through
+  # swim_filter.
+  def run(self, blocks):
+    self.begin()
+    for swimmer, swims in blocks:
+      self.add_swimmer( swimmer, swims )
+    self.finish()
+
+  # run() in pieces, for when the blocks are handed over one at a time:
+  # begin(), then add_swimmer() for each block that passes swim_filter,
+  # then finish().
+  def begin(self):
+    self.qt_file = open_output_file( self.folder + 'Qualifiers.txt' )
+    self.qt_html_file = open_output_file( self.folder + 'Qualifiers.html' )
+    self.qt_html_file.write( '<table>' )
+    self.state = None
+    if self.incremental:
+      # Anything that changes the results for every swimmer goes in the
+      # parameters, so that changing it throws the saved results away.
+      from lookup_tensors import qualifying_time_tensor
+      parameters = ( self.age_on_date, self.earliest_pb_date, self.maximum_age, sorted( self.level_4_meets ), sorted( self.excluded_swimmers ), qualifying_time_tensor.tobytes() )
+      self.state = IncrementalState( self.folder + 'Qualifiers.state', parameters )
+
+  def add_swimmer(self, swimmer, swims):
+    result = None
+    if self.state is not None:
+      input_hash = hash_swimmer_block( swimmer, swims )
+      result = self.state.get( swimmer.asa_number, input_hash )
+    if result is None:
+      with instrumentation.stage( 'qualifiers.search' ):
+        result = self.process_swimmer( swimmer, swims )
+      if self.state is not None:
+        self.state.put( swimmer.asa_number, input_hash, result )
+    text, html = result
+    if len( text ) > 0:
+      self.num_qualified += 1
+    self.qt_file.write( text )
+    self.qt_html_file.write( html )
+
+  def finish(self):
+    if self.state is not None:
+      self.state.save()
+      print( 'Reused ' + str( self.state.num_reused ) + ' swimmers, calculated ' + str( self.state.num_calculated ) )
+
+    self.qt_file.close()
+    self.qt_html_file.write( '</table>' )
+    self.qt_html_file.close()
+
+class BatchQualifiersReport():
+  """Writes the same Qualifiers.txt and Qualifiers.html as QualifiersReport,
+  but for the whole club at once, straight from the columns of a
+  swim_list_cache.SwimListCache, using qualifier_engine.  Needs numpy.
+  Also writes NearMisses.txt, with the PBs that are outside the
+  qualifying time by no more than near_miss_fraction of it.
+  It isn't a pipeline stage, and everything is redone every run."""
+  def __init__(self, folder, age_on_date, earliest_pb_date, maximum_age, level_4_meets, excluded_swimmers, near_miss_fraction=0.02):
+    self.folder = folder
+    self.age_on_date = age_on_date
+    self.earliest_pb_date = earliest_pb_date
+    self.maximum_age = maximum_age
+    self.level_4_meets = level_4_meets
+    self.excluded_swimmers = excluded_swimmers
+    self.near_miss_fraction = near_miss_fraction
+    self.num_qualified = 0
+    self.num_near_missed = 0
+
+  def run(self, cache):
+    import numpy
+    from qualifier_engine import create_engine_from_cache
+    with instrumentation.stage( 'qualifiers.batch_search' ):
+      engine, swim_rows, swimmer_indexes, ages = create_engine_from_cache( cache, self.age_on_date, self.earliest_pb_date, self.maximum_age, self.level_4_meets )
+      is_male = numpy.asarray( cache.swimmers_is_male )[ swimmer_indexes ]
+      qualifiers = engine.find_qualifiers( is_male, ages, self.near_miss_fraction )
+      to_report = numpy.flatnonzero( qualifiers.qualified.any( axis=1 ) | qualifiers.near_miss.any( axis=1 ) )
+
+    with instrumentation.stage( 'qualifiers.write' ):
+      # Pull out everything we need for the swimmers being reported as
+      # plain lists, rather than indexing the arrays one swim at a time
+      pb_rows = qualifiers.pb_rows[ to_report ]
+      cache_rows = numpy.where( pb_rows >= 0, swim_rows[ numpy.maximum( pb_rows, 0 ) ], 0 )
+      event_codes = numpy.asarray( cache.swims_event_code )[ cache_rows ].tolist()
+      meet_ids = numpy.asarray( cache.swims_meet )[ cache_rows ].tolist()
+      dates = numpy.asarray( cache.swims_date )[ cache_rows ].tolist()
+      pb_times = qualifiers.pb_times[ to_report ].tolist()
+      qualifying_times = qualifiers.qualifying_times[ to_report ].tolist()
+      qualified = qualifiers.qualified[ to_report ].tolist()
+      near_miss = qualifiers.near_miss[ to_report ].tolist()
+      pb_counts = qualifiers.pb_counts[ to_report ].tolist()
+      swimmer_indexes = swimmer_indexes[ to_report ].tolist()
+      ages = ages[ to_report ].tolist()
+      # Lots of swims share a date, so each is only formatted once
+      date_strs = {}
+
+      qt_file = open_output_file( self.folder + 'Qualifiers.txt' )
+      qt_html_file = open_output_file( self.folder + 'Qualifiers.html' )
+      near_miss_file = open_output_file( self.folder + 'NearMisses.txt' )
+      qt_html_file.write( '<table>' )
+      for i in range( 0, len( swimmer_indexes ) ):
+        full_name = cache.get_swimmer( swimmer_indexes[i] ).full_name()
+        if full_name in self.excluded_swimmers:
+          instrumentation.count( 'qualifiers.swimmers_excluded' )
+          continue
+        age = ages[i]
+        text = []
+        html = []
+        near_misses = []
+        for event_code in range( 0, num_events ):
+          if not (qualified[i][ event_code ] or near_miss[i][ event_code ]):
+            continue
+          event = get_event( event_codes[i][ event_code ] )
+          meet = cache.meets[ meet_ids[i][ event_code ] ]
+          date_str = date_strs.get( dates[i][ event_code ] )
+          if date_str is None:
+            date_str = datetime.date.fromordinal( dates[i][ event_code ] ).strftime( '%d/%m/%Y' )
+            date_strs[ dates[i][ event_code ] ] = date_str
+          race_time = pb_times[i][ event_code ]
+          if qualified[i][ event_code ]:
+            if len( text ) == 0:
+              _write_swimmer_heading( text, html, full_name, age )
+            tag_class = "qualified"
+            if not pb_counts[i][ event_code ]:
+              tag_class = "not-qualified"
+            _write_swim( text, html, event, race_time, meet, date_str, tag_class )
+          else:
+            if len( near_misses ) == 0:
+              near_misses.append( full_name + " (" + str(age) + ")\n" )
+            qualifying_time = qualifying_times[i][ event_code ]
+            near_misses.append( "\t" + event.short_name_without_course() + "\t" + format_race_time( race_time ) + "\tQT " + format_race_time( qualifying_time ) + "\t+" + ( "%.2f" % (race_time - qualifying_time) ) + "\t" + meet + "\t" + date_str + "\n" )
+        if len( text ) > 0:
+          text.append( "\n" )
+          self.num_qualified += 1
+          instrumentation.count( 'qualifiers.swimmers_qualified' )
+          qt_file.write( ''.join( text ) )
+          qt_html_file.write( ''.join( html ) )
+        if len( near_misses ) > 0:
+          near_misses.append( "\n" )
+          self.num_near_missed += 1
+          near_miss_file.write( ''.join( near_misses ) )
+      qt_file.close()
+      qt_html_file.write( '</table>' )
+      qt_html_file.close()
+      near_miss_file.close()
@@ -21,7 +21,7 @@
 
 from event import Event
 from event import short_course_events
-from race_time import RaceTime
+from race_time import parse_race_time
 
 _min_age = 12
 _max_age = 17
@@ -79,7 +79,7 @@ def _parse_spreadsheet_data( spreadsheet_data ):
       if len( columns[i] ) == 0:
         qt_for_event.append( None )
       else:
-        qt_for_event.append( float( RaceTime( columns[i] ) ) )
+        qt_for_event.append( parse_race_time( columns[i] ) )
   return qt_by_event
         
 _boys_qt_by_event = _parse_spreadsheet_data( _BOYS_SPREADSHEET_DATA_STR )
@@ -21,26 +21,63 @@
 # with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 
+import functools
+
+# Times get parsed over and over again, e.g. the same NT and qualifying
+# times for lots of swimmers, so parsing is memoized.  Formatted times
+# are mostly all different, so it's cheaper to format them every time.
+_CACHE_SIZE = 65536
+
+# Parses a time in m:ss.ff, mm.ss.ff or plain seconds form, returning
+# the number of seconds as a float.
+@functools.lru_cache( maxsize=_CACHE_SIZE )
+def parse_race_time( time ):
+  num_dots = time.count('.')
+  if num_dots > 2:
+    raise RuntimeError( "Unable to parse race time: " + time )
+  elif num_dots == 2:
+    fields = time.split( '.' )
+    if len(fields) != 3:
+      raise RuntimeError( "Unable to parse race time: " + time )
+    # mm.ss.ff
+    return (int( fields[0] ) * 60) + int( fields[1] ) + float( '0.' + fields[2] )
+  parts = time.split( ":" )
+  num_parts = len( parts )
+  if num_parts == 1:
+    return float( time )
+  elif num_parts == 2:
+    return (float( parts[0] ) * 60) + float( parts[1] )
+  raise RuntimeError( "Unable to parse race time: " + time )
+
+# Formats a number of seconds in m:ss.ff form, exactly as
+# str( RaceTime( seconds ) ) does, but without making a RaceTime.
+def format_race_time( seconds ):
+  minutes = int( seconds / 60 )
+  if minutes > 0:
+    seconds = seconds - float( minutes * 60 );
+    return "%d:%05.2f" % (minutes, seconds)
+  return "%05.2f" % seconds
+
+# Batch version of format_race_time.  Returns a list of strings,
+# formatting each distinct time only once.
+def format_race_times( seconds ):
+  strings_by_time = {}
+  strings = []
+  for time in seconds:
+    string = strings_by_time.get( time )
+    if string is None:
+      string = format_race_time( time )
+      # 0.0 and -0.0 are the same key, but are formatted differently
+      if time != 0.0:
+        strings_by_time[ time ] = string
+    strings.append( string )
+  return strings
+
 class RaceTime():
   # Constructor.  Can be passed time as a string or as a float.
   def __init__(self, time):
     if type(time) is str:
-      num_dots = time.count('.')
-      if num_dots > 2:
-        raise RuntimeError( "Unable to parse race time: " + time )
-      elif num_dots == 2:
-        fields = time.split( '.' )
-        if len(fields) != 3:
-          raise RuntimeError( "Unable to parse race time: " + time )
-        # mm.ss.ff
-        self.seconds = (int( fields[0] ) * 60) + int( fields[1] ) + float( '0.' + fields[2] )
-      else:
-        parts = time.split( ":" )
-        num_parts = len( parts )
-        if num_parts == 1:
-          self.seconds = float( time )
-        elif num_parts == 2:
-          self.seconds = (float( parts[0] ) * 60) + float( parts[1] )
+      self.seconds = parse_race_time( time )
     elif type(time) is float:
       self.seconds = time
   
@@ -48,11 +85,7 @@ class RaceTime():
   def __str__(self):
     if self.seconds is None:
       return "Error"
-    minutes = int( self.seconds / 60 )
-    if minutes > 0:
-      seconds = self.seconds - float( minutes * 60 );
-      return "%d:%05.2f" % (minutes, seconds)
-    return "%05.2f" % self.seconds
+    return format_race_time( self.seconds )
 
   # Cast to float
   def __float__(self):
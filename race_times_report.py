@@ -0,0 +1,125 @@
+# Winsford ASC Club Champs Scoring System
+#   race_times_report.py
+#   Report stage that pulls each entered swimmer's club champs swims
+#   out of the swim list, and writes them to RaceTimes.txt.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import helpers
+import instrumentation
+
+from race_time import format_race_time
+
+from event import short_course_events
+from swim_list_reader import SwimFilter
+from entry_list import read_entry_list
+from entry_list import find_entry
+from entry_list import write_missing_entries
+from incremental import open_output_file
+
+num_events = len( short_course_events )
+
+class SwimmerTimes():
+  def __init__(self, swimmer, full_name):
+    self.swimmer = swimmer
+    self.full_name = full_name
+    self.consideration_times = []
+    self.swim_by_event = []
+
+class RaceTimesReport():
+  """Pipeline stage that finds the club champs swims for everybody in
+  EntryList.txt, and writes RaceTimes.txt and
+  MissingEntriesForRaceTimes.txt to folder."""
+  def __init__(self, folder, club_champs_start_date, club_champs_end_date, club_champs_meet_name, maximum_age, fuzzy_entry_matching=False):
+    self.folder = folder
+    self.club_champs_start_date = club_champs_start_date
+    self.club_champs_end_date = club_champs_end_date
+    self.club_champs_meet_name = club_champs_meet_name
+    self.maximum_age = maximum_age
+    self.fuzzy_entry_matching = fuzzy_entry_matching
+    # We only need the club champs swims, so filter out everything else
+    # before it's parsed.
+    self.swim_filter = SwimFilter( earliest_date=club_champs_start_date, latest_date=club_champs_end_date, meet=club_champs_meet_name, maximum_age=maximum_age, age_on_date=club_champs_end_date, report_too_old=True )
+    self.all_swimmer_times = []
+    self.entries = {}
+
+  def process_swimmer(self, swimmer, swims):
+    age = helpers.CalcAge( swimmer.date_of_birth, self.club_champs_end_date )
+
+    full_name = find_entry( self.entries, swimmer, self.fuzzy_entry_matching )
+    if full_name is None:
+      print( 'Excluding ' + swimmer.alternate_name() + ', ' + str( age ) + '. Not in entry list.' )
+      instrumentation.count( 'race_times.swimmers_not_entered' )
+      return
+
+    if age > self.maximum_age:
+      print( 'Excluding ' + full_name + ', ' + str( age ) + '. Too old.' )
+      instrumentation.count( 'race_times.swimmers_too_old' )
+      return
+
+    self.entries[ full_name ] = True
+
+    # Categorise swims by event
+    swim_by_event = []
+    for i in range( 0, num_events ):
+      swim_by_event.append( None )
+    for swim in swims:
+      # Append to the list according to short course event code
+      if (swim.meet == self.club_champs_meet_name) and (swim.date >= self.club_champs_start_date) and( swim.date <= self.club_champs_end_date):
+        # This is a club champs swim
+        swim_by_event[ swim.event.get_short_course_event_code() ] = swim
+
+    swimmer_times = SwimmerTimes( swimmer, full_name )
+    swimmer_times.swim_by_event = swim_by_event
+    self.all_swimmer_times.append( swimmer_times )
+
+    print( full_name + ', ' + str( age ) )
+
+  # blocks is an iterable of (swimmer, swims) that have been through
+  # swim_filter.
+  def run(self, blocks):
+    with instrumentation.stage( 'race_times.calculate' ):
+      self.calculate( blocks )
+    with instrumentation.stage( 'race_times.write' ):
+      self.write()
+
+  # Reads the entry list, ready for process_swimmer()
+  def begin(self):
+    self.entries = read_entry_list( self.folder + 'EntryList.txt' )
+
+  def calculate(self, blocks):
+    self.begin()
+    for swimmer, swims in blocks:
+      self.process_swimmer( swimmer, swims )
+
+  def write(self):
+    print( 'Writing file' )
+    race_times_file = open_output_file( self.folder + 'RaceTimes.txt' )
+    first = True
+    for swimmer_times in self.all_swimmer_times:
+      if not first:
+        race_times_file.write( '\n' )
+      swimmer = swimmer_times.swimmer
+      race_times_file.write( str( swimmer ) + '\n' )
+      for swim in swimmer_times.swim_by_event:
+        if swim is not None:
+          race_times_file.write( swim.event.short_name_without_course() + '|' + format_race_time( swim.race_time ) + '\n' )
+      first = False
+    race_times_file.close()
+
+    write_missing_entries( self.folder + 'MissingEntriesForRaceTimes.txt', self.entries )
@@ -0,0 +1,251 @@
+# Winsford ASC Club Champs Scoring System
+#   scores_report.py
+#   Scores every swimmer's club champs races against their consideration
+#   times, and writes out the boys' and girls' scores.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import os
+
+import helpers
+import instrumentation
+import numpy
+
+from swim_list_reader import read_swimmer_blocks
+from race_time import parse_race_time
+from race_time import format_race_time
+from event import Event
+
+from event import short_course_events
+from scoring import ScoringEngine
+from lookup_tensors import seconds_per_point_tensor
+from incremental import IncrementalState
+from incremental import hash_files
+from incremental import open_output_file
+from name_index import NameIndex
+from leaderboards import AgeGroupLeaderboards
+
+num_events = len( short_course_events )
+
+class EventCodeAndTime():
+  def __init__(self, line):
+    tokens = line.split( "|" )
+    num_tokens = len( tokens )
+    assert( (num_tokens == 2) or (num_tokens == 3) )
+    
+    self.event_code = Event.create_from_str( tokens[0], "S" ).get_short_course_event_code()
+    self.time = parse_race_time( tokens[1] )
+    if num_tokens == 3:
+      self.is_nt = (tokens[2] == 'nt\n')
+    else:
+      self.is_nt = False
+
+class RaceConsideration():
+  def __init__(self, event_code, consideration_time, race_time, consideration_is_nt ):
+    self.event = short_course_events[ event_code ]
+    self.consideration_time = consideration_time
+    self.time = race_time
+    self.consideration_is_nt = consideration_is_nt
+    
+class SwimmerTimes():
+  def __init__(self, swimmer, full_name, club_champs_date):
+    self.swimmer = swimmer
+    self.full_name = full_name
+    self.race_by_event = []
+    self.age = helpers.CalcAge( swimmer.date_of_birth, club_champs_date )
+
+    for i in range( 0, num_events ):
+      self.race_by_event.append( None )
+
+class ScoresReport():
+  """Reads ConsiderationTimes.txt and RaceTimes.txt from folder, and
+  writes ScoresBoys.txt, ScoresGirls.txt and MissingConsiderationTimes.txt.
+  If age_bands is given, AgeGroupLeaderboards.txt is written too, with
+  the top num_leaders swimmers for each age group, overall and by event.
+  run() does the lot, or read_times(), score() and write() can be called
+  in turn."""
+  def __init__(self, folder, club_champs_date, incremental=False, age_bands=None, num_leaders=3):
+    self.folder = folder
+    self.club_champs_date = club_champs_date
+    self.incremental = incremental
+    self.age_bands = age_bands
+    self.num_leaders = num_leaders
+    self.swimmer_times_by_name = {}
+    # Finds swimmer_times_by_name keys by full or known as name, ignoring
+    # case, accents, spacing and punctuation.  Names that more than one
+    # swimmer has aren't found.
+    self.swimmer_name_index = NameIndex()
+    self.unmatched_swimmer_names = []
+    self.sorted_scores_boys = []
+    self.sorted_scores_girls = []
+    self.all_swimmer_times = []
+
+  def _process_swimmer(self, swimmer, races):
+    full_name = swimmer.full_name()
+    swimmer_times = SwimmerTimes( swimmer, full_name, self.club_champs_date )
+    self.swimmer_times_by_name[ full_name ] = swimmer_times
+    self.swimmer_name_index.add( full_name, full_name )
+    self.swimmer_name_index.add( swimmer.alternate_name(), full_name )
+    
+    # Categorise swims by event
+    for race in races:
+      swimmer_times.race_by_event[ race.event_code ] = RaceConsideration( race.event_code, race.time, None, race.is_nt )
+   
+    print( full_name )
+
+  def _add_races_for_swimmer(self, swimmer, races):
+    full_name = swimmer.full_name()
+    swimmer_times = self.swimmer_times_by_name.get( full_name )
+    if swimmer_times is None:
+      name = self.swimmer_name_index.find( full_name )
+      if (name is None) and not self.swimmer_name_index.is_ambiguous( full_name ):
+        name = self.swimmer_name_index.find( swimmer.alternate_name() )
+      if name is None:
+        if self.swimmer_name_index.is_ambiguous( full_name ) or self.swimmer_name_index.is_ambiguous( swimmer.alternate_name() ):
+          print( 'Not matching ' + full_name + ' to any consideration times, as more than one swimmer has that name' )
+          instrumentation.count( 'scores.ambiguous_names' )
+        self.unmatched_swimmer_names.append( full_name )
+        instrumentation.count( 'scores.swimmers_without_consideration_times' )
+        return
+      swimmer_times = self.swimmer_times_by_name[ name ]
+    
+    for race in races:
+      if swimmer_times.race_by_event[ race.event_code ] is None:
+        swimmer_times.race_by_event[ race.event_code ] = RaceConsideration( race.event_code, None, race.time, True )
+      else:
+        swimmer_times.race_by_event[ race.event_code ].time = race.time
+   
+    print( full_name )
+
+  def read_times(self):
+    # Read the consideration times list
+    with open( self.folder + 'ConsiderationTimes.txt', 'r' ) as consideration_times_file:
+      for swimmer, races in read_swimmer_blocks( consideration_times_file, EventCodeAndTime ):
+        self._process_swimmer( swimmer, races )
+
+    # Read the race times
+    with open( self.folder + 'RaceTimes.txt', 'r' ) as race_times_file:
+      for swimmer, races in read_swimmer_blocks( race_times_file, EventCodeAndTime ):
+        self._add_races_for_swimmer( swimmer, races )
+
+  def score(self):
+    all_swimmer_times = list( self.swimmer_times_by_name.values() )
+    num_swimmers = len( all_swimmer_times )
+    consideration_times = numpy.full( (num_swimmers, num_events), numpy.nan )
+    race_times = numpy.full( (num_swimmers, num_events), numpy.nan )
+    consideration_is_nt = numpy.zeros( (num_swimmers, num_events), dtype=numpy.bool_ )
+    for swimmer_index, swimmer_times in enumerate( all_swimmer_times ):
+      for race in swimmer_times.race_by_event:
+        if race is not None:
+          event_code = race.event.get_short_course_event_code()
+          if race.consideration_time is not None:
+            consideration_times[ swimmer_index, event_code ] = race.consideration_time
+            consideration_is_nt[ swimmer_index, event_code ] = race.consideration_is_nt
+          if race.time is not None:
+            race_times[ swimmer_index, event_code ] = race.time
+    is_male = [ swimmer_times.swimmer.is_male for swimmer_times in all_swimmer_times ]
+    ages = [ swimmer_times.age for swimmer_times in all_swimmer_times ]
+    scoring_engine = ScoringEngine( is_male, ages, consideration_times, race_times, consideration_is_nt )
+    points, total_points = scoring_engine.score()
+
+    # Copy the points back onto the races for the output files
+    for swimmer_index, swimmer_times in enumerate( all_swimmer_times ):
+      swimmer_times.points = int( total_points[ swimmer_index ] )
+      for race in swimmer_times.race_by_event:
+        if race is not None:
+          race.points = int( points[ swimmer_index, race.event.get_short_course_event_code() ] )
+    self.all_swimmer_times = all_swimmer_times
+
+    boys, girls = scoring_engine.rankings( total_points )
+    self.sorted_scores_boys = [ all_swimmer_times[i] for i in boys ]
+    self.sorted_scores_girls = [ all_swimmer_times[i] for i in girls ]
+
+  def _write_scores(self, sorted_scores, file_name):
+    print( 'Writing file' )
+    scores_file = open_output_file( self.folder + file_name )
+    first = True
+    for swimmer_times in sorted_scores:
+      if not first:
+        scores_file.write( '\n' )
+      swimmer = swimmer_times.swimmer
+      age_for_points = swimmer_times.age
+      if age_for_points > 16:
+        age_for_points = 16
+      age_column = age_for_points - 9
+      scores_file.write( swimmer_times.full_name + ': ' + str( swimmer_times.points ) + '\n' )
+      for race in swimmer_times.race_by_event:
+        if (race is not None) and (race.time is not None):
+          if race.consideration_time is not None:
+            nt_str = ''
+            if race.consideration_is_nt:
+              nt_str = ' (NT)'
+            scores_file.write( race.event.short_name_without_course() + ': Consideration Time' + nt_str + ': ' + format_race_time( race.consideration_time )+ ', Race Time:' + format_race_time( race.time ) + ', Points: ' + str( race.points ) + '\n' )
+          else:
+            scores_file.write( race.event.short_name_without_course() + ': Missing Consideration Time, Race Time:' + format_race_time( race.time ) + '\n' )
+            
+      first = False
+    scores_file.close()    
+
+  def _get_output_file_names(self):
+    file_names = [ 'ScoresBoys.txt', 'ScoresGirls.txt', 'MissingConsiderationTimes.txt' ]
+    if self.age_bands is not None:
+      file_names.append( 'AgeGroupLeaderboards.txt' )
+    return file_names
+
+  def write(self):
+    self._write_scores( self.sorted_scores_boys, "ScoresBoys.txt" )
+    self._write_scores( self.sorted_scores_girls, "ScoresGirls.txt" )
+  
+    # Write out the list of entries that we haven't processed any data for
+    missing_consideration_times_file = open_output_file( self.folder + 'MissingConsiderationTimes.txt' )
+    for name in self.unmatched_swimmer_names:
+      missing_consideration_times_file.write( name + '\n' )
+    missing_consideration_times_file.close()
+
+    if self.age_bands is not None:
+      leaderboards = AgeGroupLeaderboards( self.age_bands, self.num_leaders )
+      with instrumentation.stage( 'scores.leaderboards' ):
+        leaderboards.build( self.all_swimmer_times )
+      leaderboards_file = open_output_file( self.folder + 'AgeGroupLeaderboards.txt' )
+      leaderboards.write( leaderboards_file )
+      leaderboards_file.close()
+
+  def run(self):
+    # Scoring the whole club is cheap, so it's always done, and the
+    # rankings are there for anything that wants them afterwards.  It's
+    # only the writing that's skipped, if nothing has changed and the
+    # outputs are all still there.
+    with instrumentation.stage( 'scores.read_times' ):
+      self.read_times()
+    with instrumentation.stage( 'scores.score' ):
+      self.score()
+
+    if self.incremental:
+      state = IncrementalState( self.folder + 'Scores.state', ( self.club_champs_date, seconds_per_point_tensor.tobytes(), self.age_bands, self.num_leaders ) )
+      inputs_hash = hash_files( [ self.folder + 'ConsiderationTimes.txt', self.folder + 'RaceTimes.txt' ] )
+      outputs_exist = all( [ os.path.exists( self.folder + file_name ) for file_name in self._get_output_file_names() ] )
+      if outputs_exist and (state.get( 'inputs', inputs_hash ) is not None):
+        print( 'ConsiderationTimes.txt and RaceTimes.txt are unchanged since the last run' )
+        return
+
+    with instrumentation.stage( 'scores.write' ):
+      self.write()
+
+    if self.incremental:
+      state.put( 'inputs', inputs_hash, True )
+      state.save()
@@ -0,0 +1,97 @@
+# Winsford ASC Club Champs Scoring System
+#   scoring.py
+#   Scores every swimmer's improvement on their consideration times in
+#   one go, using [swimmer, event] matrices.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import numpy
+
+from event import short_course_events
+from lookup_tensors import lookup
+from lookup_tensors import seconds_per_point_tensor
+
+MAX_POINTS = 10
+# Swimmers can't get full marks for an event where we had to use a
+# consideration time from the NT table, as we can't measure an improvement.
+MAX_NT_POINTS = 5
+
+class ScoringEngine():
+  """Holds the consideration and race times for a set of swimmers as
+  [swimmer, event] matrices, with NaN where there's no time.
+  Scoring is then a handful of array operations, so whole leagues can
+  be re-scored against different points tables cheaply."""
+  def __init__(self, is_male, ages, consideration_times, race_times, consideration_is_nt):
+    self.is_male = numpy.asarray( is_male, dtype=numpy.bool_ )
+    self.ages = numpy.asarray( ages, dtype=numpy.intp )
+    self.consideration_times = numpy.asarray( consideration_times, dtype=numpy.float64 )
+    self.race_times = numpy.asarray( race_times, dtype=numpy.float64 )
+    self.consideration_is_nt = numpy.asarray( consideration_is_nt, dtype=numpy.bool_ )
+
+    # None of this depends on the points table
+    self.improvement = self.consideration_times - self.race_times
+    self.is_scored = ~numpy.isnan( self.improvement )
+    self.max_points = numpy.where( self.consideration_is_nt, MAX_NT_POINTS, MAX_POINTS )
+    self.event_codes = numpy.arange( len( short_course_events ) )
+
+  def num_swimmers(self):
+    return len( self.ages )
+
+  # Returns (points, total_points).
+  # points is an integer [swimmer, event] matrix, which is 0 wherever
+  # either time is missing, or the points table has no entry.
+  # total_points is the sum for each swimmer.
+  # seconds_per_point is a [gender, event, age] tensor, defaulting to
+  # the one from points_table.py.
+  def score(self, seconds_per_point=None):
+    if seconds_per_point is None:
+      seconds_per_point = seconds_per_point_tensor
+    seconds_per_point_by_swimmer = lookup( seconds_per_point, self.event_codes[ numpy.newaxis, : ], self.is_male[ :, numpy.newaxis ], self.ages[ :, numpy.newaxis ] )
+    with numpy.errstate( invalid='ignore' ):
+      points = numpy.ceil( self.improvement / seconds_per_point_by_swimmer )
+    points = numpy.clip( points, 0, self.max_points )
+    points = numpy.where( self.is_scored & ~numpy.isnan( points ), points, 0 ).astype( numpy.int64 )
+    return points, points.sum( axis=1 )
+
+  # Returns the indices of the boys and of the girls, each sorted by
+  # total_points, highest first.  Swimmers on equal points keep their
+  # original order, just like list.sort( reverse=True ).
+  def rankings(self, total_points):
+    boys = numpy.flatnonzero( self.is_male )
+    girls = numpy.flatnonzero( ~self.is_male )
+    boys = boys[ numpy.argsort( -total_points[ boys ], kind='stable' ) ]
+    girls = girls[ numpy.argsort( -total_points[ girls ], kind='stable' ) ]
+    return boys, girls
+
+# Scores a single race, exactly as ScoringEngine.score() would, for
+# when races come in one at a time.  Either time can be None, in which
+# case the race scores nothing.
+def score_race( event_code, is_male, age, consideration_time, race_time, consideration_is_nt, seconds_per_point=None ):
+  if (consideration_time is None) or (race_time is None):
+    return 0
+  if seconds_per_point is None:
+    seconds_per_point = seconds_per_point_tensor
+  improvement = numpy.float64( consideration_time ) - numpy.float64( race_time )
+  with numpy.errstate( divide='ignore', invalid='ignore' ):
+    points = numpy.ceil( improvement / lookup( seconds_per_point, event_code, is_male, age ) )
+  if numpy.isnan( points ):
+    return 0
+  max_points = MAX_POINTS
+  if consideration_is_nt:
+    max_points = MAX_NT_POINTS
+  return int( min( max( points, 0 ), max_points ) )
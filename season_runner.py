@@ -0,0 +1,174 @@
+# Winsford ASC Club Champs Scoring System
+#   season_runner.py
+#   Runs all of the reports for any number of seasons, from a single read
+#   of the swim list.  Used by make_all_seasons.py.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import collections
+import os
+
+import instrumentation
+
+from pipeline import run_pipeline
+from consideration_times_report import ConsiderationTimesReport
+from race_times_report import RaceTimesReport
+from qualifiers_report import QualifiersReport
+from scores_report import ScoresReport
+from swim_list_reader import combine_filters
+from consideration_times import calculate_all_seasons_consideration_times
+
+class Season():
+  """The settings for one season's club champs and qualifiers, which are
+  what used to be edited in the scripts each year.  All of the season's
+  reports go in folder, which must have that season's EntryList.txt in
+  it for the consideration times, race times and scores to be done."""
+  def __init__(self, folder, club_champs_start_date, club_champs_date, club_champs_meet_name, age_on_date, earliest_pb_date, level_4_meets=(), excluded_swimmers=()):
+    self.folder = folder
+    self.club_champs_start_date = club_champs_start_date
+    self.club_champs_date = club_champs_date
+    self.club_champs_meet_name = club_champs_meet_name
+    self.age_on_date = age_on_date
+    self.earliest_pb_date = earliest_pb_date
+    self.level_4_meets = set( level_4_meets )
+    self.excluded_swimmers = set( excluded_swimmers )
+
+  def has_entry_list(self):
+    return os.path.exists( self.folder + 'EntryList.txt' )
+
+class SeasonReports():
+  """The reports that were run for a season, for looking at the results.
+  Any that weren't run are None."""
+  def __init__(self, season):
+    self.season = season
+    self.consideration_times = None
+    self.race_times = None
+    self.qualifiers = None
+    self.scores = None
+
+class _AllSeasonsStage():
+  """Pipeline stage that runs the consideration times, race times and
+  qualifiers reports for every season a swimmer at a time, rather than
+  each report being its own stage.  That way each swimmer's PB indexes
+  are built once and queried for every season's dates, and there are no
+  threads fighting over the blocks."""
+  def __init__(self, all_season_reports, num_workers, chunk_size):
+    self.consideration_times_reports = [ r.consideration_times for r in all_season_reports if r.consideration_times is not None ]
+    self.race_times_reports = [ r.race_times for r in all_season_reports if r.race_times is not None ]
+    self.qualifiers_reports = [ r.qualifiers for r in all_season_reports ]
+    self.num_workers = num_workers
+    self.chunk_size = chunk_size
+    self.swim_filter = combine_filters( [ report.swim_filter for report in self.consideration_times_reports + self.race_times_reports + self.qualifiers_reports ] )
+    # The (report, SwimmerTimes, key, input hash) to fill in with each
+    # season's results for the consideration times jobs in flight
+    self._pending = collections.deque()
+
+  # Does the race times and qualifiers for each block, and yields the
+  # consideration times jobs for calculate_all_seasons_consideration_times()
+  # for those that have entered any season and aren't reusing their saved
+  # results.
+  def _jobs(self, blocks):
+    for swimmer, swims in blocks:
+      targets = []
+      seasons = []
+      for report in self.consideration_times_reports:
+        season_swims = report.swim_filter.filter_block( swimmer, swims )
+        if season_swims is None:
+          continue
+        age = report.enter_swimmer( swimmer )
+        if age is None:
+          continue
+        swimmer_times = report.all_swimmer_times[-1]
+        key = None
+        input_hash = None
+        if report.state is not None:
+          key, input_hash = report.get_key_and_hash( swimmer, season_swims )
+          consideration_times = report.state.get( key, input_hash )
+          if consideration_times is not None:
+            swimmer_times.consideration_times = consideration_times
+            continue
+        targets.append( (report, swimmer_times, key, input_hash) )
+        # Swims on or after the start of the season's club champs are
+        # never looked at, so the swimmer's swims can all go in the one
+        # set of indexes.
+        seasons.append( (age, report.club_champs_start_date, report.consideration_date) )
+
+      for report in self.race_times_reports:
+        season_swims = report.swim_filter.filter_block( swimmer, swims )
+        if season_swims is not None:
+          report.process_swimmer( swimmer, season_swims )
+
+      for report in self.qualifiers_reports:
+        season_swims = report.swim_filter.filter_block( swimmer, swims )
+        if season_swims is not None:
+          report.add_swimmer( swimmer, season_swims )
+
+      if len( seasons ) > 0:
+        self._pending.append( targets )
+        yield swimmer, swims, seasons
+
+  def run(self, blocks):
+    for report in self.consideration_times_reports + self.race_times_reports + self.qualifiers_reports:
+      report.begin()
+
+    with instrumentation.stage( 'seasons.calculate' ):
+      for results in calculate_all_seasons_consideration_times( self._jobs( blocks ), self.num_workers, self.chunk_size ):
+        for (report, swimmer_times, key, input_hash), consideration_times in zip( self._pending.popleft(), results ):
+          swimmer_times.consideration_times = consideration_times
+          if report.state is not None:
+            report.state.put( key, input_hash, consideration_times )
+
+    for report in self.qualifiers_reports:
+      report.finish()
+    for report in self.consideration_times_reports:
+      report.finish()
+      report.write()
+    for report in self.race_times_reports:
+      with instrumentation.stage( 'race_times.write' ):
+        report.write()
+
+# Runs the consideration times, race times and qualifiers reports for
+# all of seasons in one pass over the swim list at swim_list_path, so
+# it's only read and parsed once, and each swimmer's PBs are only indexed
+# once, and then the scores for each season.
+# Seasons without an EntryList.txt only get the qualifiers.
+# Returns a SeasonReports for each season.
+# num_workers, chunk_size, incremental and fuzzy_entry_matching are as
+# for make_reports.py, and apply to each season.
+def run_seasons( swim_list_path, seasons, maximum_age, use_cache=False, use_store=False, num_workers=1, chunk_size=16, incremental=False, fuzzy_entry_matching=False ):
+  all_season_reports = []
+  for season in seasons:
+    season_reports = SeasonReports( season )
+    all_season_reports.append( season_reports )
+    os.makedirs( season.folder + 'individual_consideration_times_' + str( season.club_champs_date.year ), exist_ok=True )
+    if season.has_entry_list():
+      season_reports.consideration_times = ConsiderationTimesReport( season.folder, season.club_champs_start_date, season.club_champs_date, maximum_age, num_workers, chunk_size, incremental, fuzzy_entry_matching )
+      season_reports.race_times = RaceTimesReport( season.folder, season.club_champs_start_date, season.club_champs_date, season.club_champs_meet_name, maximum_age, fuzzy_entry_matching )
+    else:
+      print( 'No EntryList.txt in ' + season.folder + ', so only finding qualifiers' )
+    season_reports.qualifiers = QualifiersReport( season.folder, season.age_on_date, season.earliest_pb_date, maximum_age, season.level_4_meets, season.excluded_swimmers, incremental )
+
+  with instrumentation.stage( 'seasons.reports' ):
+    run_pipeline( swim_list_path, [ _AllSeasonsStage( all_season_reports, num_workers, chunk_size ) ], use_cache, use_store )
+  with instrumentation.stage( 'seasons.scores' ):
+    for season_reports in all_season_reports:
+      if season_reports.race_times is not None:
+        season = season_reports.season
+        season_reports.scores = ScoresReport( season.folder, season.club_champs_date, incremental )
+        season_reports.scores.run()
+  return all_season_reports
@@ -31,14 +31,43 @@
 # Prefix an _ to indicate privateness
 
 import logging
+import math
 import time
 import datetime
 import helpers
-from event import Event
-    
-class Swim():
-  def __init__(self, line):
-    tokens = line.split( "|" )
+from event import get_event
+from event import convert_race_time
+
+class SwimInterner():
+  """Interning tables for one read of a swim list, so that the many swims
+  that share a swimmer, meet or date also share one int, string or date
+  object, rather than each holding its own copy.  A reader makes a new
+  one for each read, so the tables go once the read is done, rather than
+  growing for as long as the process lives."""
+  __slots__ = ( 'asa_numbers', 'meets', 'dates' )
+
+  def __init__(self):
+    self.asa_numbers = {}
+    self.meets = {}
+    self.dates = {}
+
+class Swim(object):
+  # There are a lot of these, so no per-instance __dict__.
+  # The event is one of the shared instances from the Event registry.
+  # For long course swims the short course time is None until it's first
+  # asked for, so scripts that never use it don't pay for the conversion.
+  # The long course times aren't kept at all; convert_race_time() is
+  # memoized, so they're cheap to work out each time.
+  __slots__ = ( 'asa_number', 'event', 'date', 'meet', 'asa_swim_id', 'is_licensed', 'race_time', '_short_course_race_time' )
+
+  # Constructor.  Passed in a row of text describing the swim, or that
+  # row already split on '|' characters, and optionally the SwimInterner
+  # for the read it's part of.
+  def __init__(self, line, interner=None):
+    if type(line) is list:
+      tokens = line
+    else:
+      tokens = line.split( "|" )
     num_tokens = len( tokens )
     
     # Figure out what version data we have
@@ -47,25 +76,78 @@ class Swim():
       version = int( tokens[0][1:] )
 
     if version == 1:
-      self.asa_number = int( tokens[1] )
-      self.event = Event( int( tokens[2] ) )
-      self.date = helpers.ParseDate_dmY( tokens[3] )
-      self.meet = tokens[4]
+      asa_number = int( tokens[1] )
+      date = helpers.ParseDate_dmY( tokens[3] )
+      meet = tokens[4]
+      if interner is not None:
+        asa_number = interner.asa_numbers.setdefault( asa_number, asa_number )
+        date = interner.dates.setdefault( date, date )
+        meet = interner.meets.setdefault( meet, meet )
+      self.asa_number = asa_number
+      self.event = get_event( int( tokens[2] ) )
+      self.date = date
+      self.meet = meet
       self.asa_swim_id = int( tokens[5] )
       # Splits are in tokens[6]
       self.is_licensed = True
       if tokens[7] == 'n':
         self.is_licensed = False
       self.race_time = float( tokens[8] )
-      
-      self.short_course_race_time = self.race_time
-      if self.event.is_long_course():
-        self.short_course_race_time = self.event.convert_time( self.race_time )
-        
-      #print( str( self.short_course_race_time ) )
+      self._short_course_race_time = None
+      if not (self.event.event_code & 0x100):
+        self._short_course_race_time = self.race_time
     else:
       raise RuntimeError( "Unhandled swim version" )
 
+  # Alternative constructor for when the swim has already been parsed,
+  # e.g. when reading it back out of a SwimListCache.
+  @classmethod
+  def create(cls, asa_number, event_code, date, meet, asa_swim_id, is_licensed, race_time, short_course_race_time, interner=None):
+    swim = cls.__new__( cls )
+    if interner is not None:
+      asa_number = interner.asa_numbers.setdefault( asa_number, asa_number )
+      date = interner.dates.setdefault( date, date )
+      meet = interner.meets.setdefault( meet, meet )
+    swim.asa_number = asa_number
+    swim.event = get_event( event_code )
+    swim.date = date
+    swim.meet = meet
+    swim.asa_swim_id = asa_swim_id
+    swim.is_licensed = is_licensed
+    swim.race_time = race_time
+    swim._short_course_race_time = short_course_race_time
+    return swim
+
+  # The race time, converted to short course if the swim was long course
+  @property
+  def short_course_race_time(self):
+    race_time = self._short_course_race_time
+    if race_time is None:
+      race_time = convert_race_time( self.event.event_code, self.race_time )
+      self._short_course_race_time = race_time
+    return race_time
+
+  # The race time, converted to long course if the swim was short course
+  @property
+  def long_course_race_time(self):
+    event_code = self.event.event_code
+    if event_code & 0x100:
+      return self.race_time
+    return convert_race_time( event_code, self.race_time )
+
+  # long_course_race_time, but with converted times truncated to 0.1s,
+  # which is how they're compared with qualifying times
+  @property
+  def truncated_long_course_race_time(self):
+    event_code = self.event.event_code
+    if event_code & 0x100:
+      return self.race_time
+    return math.floor( convert_race_time( event_code, self.race_time ) * 10 ) * 0.1
+
+  # The swim date as a day number, as stored by the SwimListCache
+  def date_ordinal(self):
+    return self.date.toordinal()
+
   # Returns the asa number of the swimmer that this swim is for.
   def get_asa_swim_id(self):
     if self.asa_swim_id == -1:
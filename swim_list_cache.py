@@ -0,0 +1,256 @@
+# Winsford ASC Club Champs Scoring System
+#   swim_list_cache.py
+#   Compiled, memory-mapped columnar cache of SwimList.txt, so that we
+#   only pay for parsing the text file when it changes.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+# The cache lives in a folder next to the swim list, e.g.
+# SwimList.txt.cache/, and contains...
+#   meta.json    The version of the cache format, and the mtime, size
+#                and SHA-1 of the swim list it was built from.
+#   meets.txt    Interned meet names, one per line.  Swims refer to
+#                these by index.
+#   swimmers.txt One Swimmer per line, in str( swimmer ) format.
+#   *.npy        One fixed-width NumPy column per field, loaded with
+#                mmap_mode='r' so that nothing is read until it's used.
+# Swims for swimmer i are rows swimmers_first_swim[i] to
+# swimmers_first_swim[i+1] of the swims_* columns.
+
+import datetime
+import json
+import os
+import shutil
+
+import numpy
+
+import helpers
+
+from swim import Swim
+from swim import SwimInterner
+from swimmer import Swimmer
+from swim_list_reader import read_swimmer_blocks
+from event_arrays import short_course_race_times
+from incremental import hash_file
+from incremental import get_file_stats
+
+_CACHE_VERSION = 1
+
+_SWIM_COLUMNS = (
+( 'swims_asa_number', numpy.int32 ),
+( 'swims_event_code', numpy.int16 ),
+( 'swims_date', numpy.int32 ), # date.toordinal()
+( 'swims_meet', numpy.int32 ), # Index into meets
+( 'swims_asa_swim_id', numpy.int64 ),
+( 'swims_is_licensed', numpy.bool_ ),
+( 'swims_race_time', numpy.float64 ),
+( 'swims_short_course_race_time', numpy.float64 ),
+)
+
+_SWIMMER_COLUMNS = (
+( 'swimmers_asa_number', numpy.int32 ),
+( 'swimmers_is_male', numpy.bool_ ),
+( 'swimmers_date_of_birth', numpy.int32 ), # date.toordinal()
+( 'swimmers_first_swim', numpy.int64 ), # One longer than the number of swimmers
+)
+
+def get_cache_folder( swim_list_path ):
+  return swim_list_path + '.cache'
+
+class SwimListCache():
+  """Columns of every swim in a swim list, plus a table of swimmers.
+  Use load_swim_list_cache() rather than constructing one directly."""
+  def __init__(self, cache_folder):
+    for name, dtype in _SWIM_COLUMNS + _SWIMMER_COLUMNS:
+      setattr( self, name, numpy.load( os.path.join( cache_folder, name + '.npy' ), mmap_mode='r' ) )
+    with open( os.path.join( cache_folder, 'meets.txt' ), 'r' ) as f:
+      self.meets = f.read().split( '\n' )[:-1]
+    with open( os.path.join( cache_folder, 'swimmers.txt' ), 'r' ) as f:
+      self.swimmer_lines = f.read().split( '\n' )[:-1]
+
+  def num_swimmers(self):
+    return len( self.swimmer_lines )
+
+  def num_swims(self):
+    return len( self.swims_race_time )
+
+  def get_swimmer(self, swimmer_index):
+    return Swimmer( self.swimmer_lines[ swimmer_index ] )
+
+  # Builds Swim objects for the given rows of the swims_* columns.
+  # Pass the same SwimInterner for every call in one read.
+  def get_swims(self, rows, interner=None):
+    asa_numbers = self.swims_asa_number[ rows ].tolist()
+    event_codes = self.swims_event_code[ rows ].tolist()
+    dates = self.swims_date[ rows ].tolist()
+    meet_ids = self.swims_meet[ rows ].tolist()
+    asa_swim_ids = self.swims_asa_swim_id[ rows ].tolist()
+    is_licenseds = self.swims_is_licensed[ rows ].tolist()
+    race_times = self.swims_race_time[ rows ].tolist()
+    short_course_race_times = self.swims_short_course_race_time[ rows ].tolist()
+    meets = self.meets
+    date_from_ordinal = datetime.date.fromordinal
+    swims = []
+    for i in range( 0, len( race_times ) ):
+      swims.append( Swim.create( asa_numbers[i], event_codes[i], date_from_ordinal( dates[i] ), meets[ meet_ids[i] ], asa_swim_ids[i], is_licenseds[i], race_times[i], short_course_race_times[i], interner ) )
+    return swims
+
+  # Equivalent of SwimFilter.accepts_tokens() for every swim at once.
+  # Returns a boolean array, or None if everything is accepted.
+  def _swim_mask( self, swim_filter ):
+    mask = None
+    def combine( mask, test ):
+      if mask is None:
+        return test
+      return mask & test
+    if swim_filter.meet is not None:
+      if swim_filter.meet in self.meets:
+        mask = combine( mask, self.swims_meet == self.meets.index( swim_filter.meet ) )
+      else:
+        mask = numpy.zeros( self.num_swims(), dtype=numpy.bool_ )
+    if swim_filter.event_codes is not None:
+      mask = combine( mask, numpy.isin( self.swims_event_code & 0xff, list( swim_filter.event_codes ) ) )
+    if swim_filter.earliest_date is not None:
+      mask = combine( mask, self.swims_date >= swim_filter.earliest_date.toordinal() )
+    if swim_filter.latest_date is not None:
+      mask = combine( mask, self.swims_date <= swim_filter.latest_date.toordinal() )
+    return mask
+
+  # Yields (swimmer, swims) for each swimmer, exactly as
+  # swim_list_reader.read_swim_list() would for the source file.
+  def read_swim_list( self, swim_filter=None ):
+    first_swim = self.swimmers_first_swim.tolist()
+    interner = SwimInterner()
+    accepted_rows = None
+    if swim_filter is not None:
+      mask = self._swim_mask( swim_filter )
+      if mask is not None:
+        accepted_rows = numpy.flatnonzero( mask )
+        # Where each swimmer's accepted rows start within accepted_rows
+        first_accepted = numpy.searchsorted( accepted_rows, self.swimmers_first_swim ).tolist()
+    for i in range( 0, self.num_swimmers() ):
+      swimmer = self.get_swimmer( i )
+      if (swim_filter is not None) and not swim_filter.accepts_swimmer( swimmer ):
+        continue
+      if accepted_rows is None:
+        rows = slice( first_swim[i], first_swim[i + 1] )
+      else:
+        rows = accepted_rows[ first_accepted[i] : first_accepted[i + 1] ]
+      yield swimmer, self.get_swims( rows, interner )
+
+# Splits a swim line into its fields, checking that it's a version we
+# understand, just as the Swim constructor would.
+def _split_swim_line( line ):
+  tokens = line.split( "|" )
+  if (not tokens[0].startswith( "V" )) or (int( tokens[0][1:] ) != 1):
+    raise RuntimeError( "Unhandled swim version" )
+  return tokens
+
+def _write_cache( swim_list_path, cache_folder, meta ):
+  columns = {}
+  for name, dtype in _SWIM_COLUMNS + _SWIMMER_COLUMNS:
+    columns[ name ] = []
+  date_strings = []
+  meet_ids = {}
+  meets = []
+  swimmer_lines = []
+  num_swims = 0
+  # The swims go straight into the columns without building Swim objects,
+  # and the dates are all parsed in one go at the end.
+  with open( swim_list_path, 'r' ) as swim_list_file:
+    for swimmer, swims in read_swimmer_blocks( swim_list_file, _split_swim_line ):
+      swimmer_lines.append( str( swimmer ) )
+      columns[ 'swimmers_asa_number' ].append( swimmer.asa_number )
+      columns[ 'swimmers_is_male' ].append( swimmer.is_male )
+      columns[ 'swimmers_date_of_birth' ].append( swimmer.date_of_birth.toordinal() )
+      columns[ 'swimmers_first_swim' ].append( num_swims )
+      for tokens in swims:
+        meet = tokens[4]
+        meet_id = meet_ids.get( meet )
+        if meet_id is None:
+          meet_id = len( meets )
+          meet_ids[ meet ] = meet_id
+          meets.append( meet )
+        columns[ 'swims_asa_number' ].append( int( tokens[1] ) )
+        columns[ 'swims_event_code' ].append( int( tokens[2] ) )
+        date_strings.append( tokens[3] )
+        columns[ 'swims_meet' ].append( meet_id )
+        columns[ 'swims_asa_swim_id' ].append( int( tokens[5] ) )
+        columns[ 'swims_is_licensed' ].append( tokens[7] != 'n' )
+        columns[ 'swims_race_time' ].append( float( tokens[8] ) )
+      num_swims += len( swims )
+  columns[ 'swimmers_first_swim' ].append( num_swims )
+  columns[ 'swims_date' ] = helpers.ParseDates_dmY_ToOrdinals( date_strings )
+  columns[ 'swims_short_course_race_time' ] = short_course_race_times( columns[ 'swims_event_code' ], columns[ 'swims_race_time' ] )
+
+  # Build into a temporary folder and then swap it in, so that a run that
+  # dies part way through never leaves a half written cache behind.
+  temp_folder = cache_folder + '.tmp'
+  if os.path.exists( temp_folder ):
+    shutil.rmtree( temp_folder )
+  os.mkdir( temp_folder )
+  for name, dtype in _SWIM_COLUMNS + _SWIMMER_COLUMNS:
+    numpy.save( os.path.join( temp_folder, name + '.npy' ), numpy.array( columns[ name ], dtype=dtype ) )
+  with open( os.path.join( temp_folder, 'meets.txt' ), 'w' ) as f:
+    for meet in meets:
+      f.write( meet + '\n' )
+  with open( os.path.join( temp_folder, 'swimmers.txt' ), 'w' ) as f:
+    for line in swimmer_lines:
+      f.write( line + '\n' )
+  _write_meta( temp_folder, meta )
+  if os.path.exists( cache_folder ):
+    shutil.rmtree( cache_folder )
+  os.rename( temp_folder, cache_folder )
+
+def _read_meta( cache_folder ):
+  try:
+    with open( os.path.join( cache_folder, 'meta.json' ), 'r' ) as f:
+      return json.load( f )
+  except (IOError, OSError, ValueError):
+    return None
+
+def _write_meta( cache_folder, meta ):
+  with open( os.path.join( cache_folder, 'meta.json' ), 'w' ) as f:
+    json.dump( meta, f )
+
+# Returns a SwimListCache for the swim list at swim_list_path, building
+# or rebuilding the cache first if it's missing or out of date.
+# An unchanged mtime and size is trusted unless verify_hash is set.
+# A changed mtime only triggers a rebuild if the contents have changed.
+def load_swim_list_cache( swim_list_path, verify_hash=False ):
+  cache_folder = get_cache_folder( swim_list_path )
+  stats = get_file_stats( swim_list_path )
+  meta = _read_meta( cache_folder )
+  if (meta is not None) and (meta.get( 'version' ) == _CACHE_VERSION) and (meta.get( 'size' ) == stats[ 'size' ]):
+    if (meta.get( 'mtime' ) == stats[ 'mtime' ]) and not verify_hash:
+      return SwimListCache( cache_folder )
+    if meta.get( 'sha1' ) == hash_file( swim_list_path ):
+      if meta.get( 'mtime' ) != stats[ 'mtime' ]:
+        # Touched but not changed.  Remember the new mtime so that we
+        # don't have to hash it again next time.
+        meta[ 'mtime' ] = stats[ 'mtime' ]
+        _write_meta( cache_folder, meta )
+      return SwimListCache( cache_folder )
+
+  meta = { 'version' : _CACHE_VERSION, 'mtime' : stats[ 'mtime' ], 'size' : stats[ 'size' ], 'sha1' : hash_file( swim_list_path ) }
+  _write_cache( swim_list_path, cache_folder, meta )
+  return SwimListCache( cache_folder )
+
+# Drop-in replacement for read_swim_list() that reads through the cache
+def read_swim_list_cached( swim_list_path, swim_filter=None ):
+  return load_swim_list_cache( swim_list_path ).read_swim_list( swim_filter )
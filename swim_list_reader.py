@@ -0,0 +1,225 @@
+# Winsford ASC Club Champs Scoring System
+#   swim_list_reader.py
+#   Streaming reader for SwimList.txt style files, which are blocks
+#   of a Swimmer line followed by one line per swim, with blocks
+#   separated by empty lines.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import helpers
+import instrumentation
+
+from swim import Swim
+from swim import SwimInterner
+from swimmer import Swimmer
+
+class SwimFilter():
+  """Filters applied to the raw rows of a swim list, before any Swim
+  objects are built.  Any filter left as None is not applied.
+  earliest_date and latest_date are both inclusive.
+  event_codes are short course event codes, so they match swims in
+  either course.
+  maximum_age drops whole swimmers (and all their swims) whose age on
+  age_on_date is greater than maximum_age.  With report_too_old set, each
+  swimmer dropped that way is printed, as the reports used to when they
+  excluded them themselves."""
+  def __init__(self, earliest_date=None, latest_date=None, meet=None, event_codes=None, maximum_age=None, age_on_date=None, report_too_old=False):
+    if (maximum_age is not None) and (age_on_date is None):
+      raise RuntimeError( "SwimFilter needs an age_on_date to apply a maximum_age" )
+    self.earliest_date = earliest_date
+    self.latest_date = latest_date
+    self.meet = meet
+    self.event_codes = None
+    if event_codes is not None:
+      self.event_codes = frozenset( event_codes )
+    self.maximum_age = maximum_age
+    self.age_on_date = age_on_date
+    self.report_too_old = report_too_old
+
+  def accepts_swimmer(self, swimmer):
+    if self.maximum_age is None:
+      return True
+    age = helpers.CalcAge( swimmer.date_of_birth, self.age_on_date )
+    if age <= self.maximum_age:
+      return True
+    if self.report_too_old:
+      print( 'Excluding ' + swimmer.full_name() + ', ' + str( age ) + '. Too old.' )
+    instrumentation.count( 'swim_filter.swimmers_rejected_by_age' )
+    return False
+
+  # Passed a swim line that has already been split on '|'.
+  # The cheap string and integer tests go first so that we only parse
+  # the date for rows that might survive.
+  def accepts_tokens(self, tokens):
+    if (self.meet is not None) and (tokens[4] != self.meet):
+      return False
+    if (self.event_codes is not None) and ((int( tokens[2] ) & 0xff) not in self.event_codes):
+      return False
+    if (self.earliest_date is not None) or (self.latest_date is not None):
+      date = helpers.ParseDate_dmY( tokens[3] )
+      if (self.earliest_date is not None) and (date < self.earliest_date):
+        return False
+      if (self.latest_date is not None) and (date > self.latest_date):
+        return False
+    return True
+
+  # The same tests as accepts_tokens(), for a swim that's already built
+  def accepts_swim(self, swim):
+    if (self.meet is not None) and (swim.meet != self.meet):
+      return False
+    if (self.event_codes is not None) and (swim.event.get_short_course_event_code() not in self.event_codes):
+      return False
+    if (self.earliest_date is not None) and (swim.date < self.earliest_date):
+      return False
+    if (self.latest_date is not None) and (swim.date > self.latest_date):
+      return False
+    return True
+
+  # Applies the filter to a (swimmer, swims) block that was read with a
+  # looser filter.  Returns the accepted swims, or None if the swimmer
+  # isn't accepted at all.
+  def filter_block(self, swimmer, swims):
+    if not self.accepts_swimmer( swimmer ):
+      return None
+    return [ swim for swim in swims if self.accepts_swim( swim ) ]
+
+# Returns a SwimFilter that accepts everything that any of swim_filters
+# accepts, or None if that means there's nothing that can be filtered out.
+# A None in swim_filters accepts everything.
+def combine_filters( swim_filters ):
+  if (len( swim_filters ) == 0) or (None in swim_filters):
+    return None
+  earliest_dates = [ f.earliest_date for f in swim_filters ]
+  latest_dates = [ f.latest_date for f in swim_filters ]
+  meets = set( [ f.meet for f in swim_filters ] )
+  event_codes = [ f.event_codes for f in swim_filters ]
+  age_on_dates = set( [ f.age_on_date for f in swim_filters ] )
+  maximum_ages = [ f.maximum_age for f in swim_filters ]
+  report_too_old = True in [ f.report_too_old for f in swim_filters ]
+
+  earliest_date = None
+  if not None in earliest_dates:
+    earliest_date = min( earliest_dates )
+  latest_date = None
+  if not None in latest_dates:
+    latest_date = max( latest_dates )
+  meet = None
+  if len( meets ) == 1:
+    meet = meets.pop()
+  all_event_codes = None
+  if not None in event_codes:
+    all_event_codes = frozenset().union( *event_codes )
+  # Ages on different dates can't be compared, so only swimmers that
+  # are too old on the same date for all of the filters can be dropped.
+  maximum_age = None
+  age_on_date = None
+  if (len( age_on_dates ) == 1) and (not None in maximum_ages):
+    maximum_age = max( maximum_ages )
+    age_on_date = age_on_dates.pop()
+
+  if (earliest_date is None) and (latest_date is None) and (meet is None) and (all_event_codes is None) and (maximum_age is None):
+    return None
+  return SwimFilter( earliest_date, latest_date, meet, all_event_codes, maximum_age, age_on_date, report_too_old )
+
+# Generic reader for files made of blocks of a Swimmer line followed by
+# item lines, with an empty line between blocks.  create_item is called
+# with each item line.
+# Yields (swimmer, items) for each block, in file order.
+def read_swimmer_blocks( lines, create_item ):
+  swimmer = None
+  items = []
+  for line in lines:
+    if swimmer is not None:
+      if len( line ) <= 1:
+        # Empty line.  So we've finished reading all the items for a swimmer
+        yield swimmer, items
+        swimmer = None
+        items = []
+      else:
+        items.append( create_item( line ) )
+    elif len( line ) > 1:
+      # Expect the line to be a Swimmer
+      swimmer = Swimmer( line )
+
+  # We won't have yielded the final swimmer if the file doesn't end with
+  # an empty line.
+  if swimmer is not None:
+    yield swimmer, items
+
+# Reads a SwimList.txt file, yielding (swimmer, swims) for each swimmer
+# in file order.  Swims are only built for rows accepted by swim_filter,
+# and swimmers rejected by swim_filter are skipped without their swim
+# rows even being split.
+def read_swim_list( lines, swim_filter=None ):
+  interner = SwimInterner()
+  if swim_filter is None:
+    for swimmer, swims in read_swimmer_blocks( lines, lambda line: Swim( line, interner ) ):
+      yield swimmer, swims
+    return
+
+  swimmer = None
+  skipping = False
+  swims = []
+  for line in lines:
+    if (swimmer is not None) or skipping:
+      if len( line ) <= 1:
+        # Empty line.  So we've finished reading all the swims for a swimmer
+        if not skipping:
+          yield swimmer, swims
+        swimmer = None
+        skipping = False
+        swims = []
+      elif not skipping:
+        tokens = line.split( "|" )
+        if swim_filter.accepts_tokens( tokens ):
+          swims.append( Swim( tokens, interner ) )
+    elif len( line ) > 1:
+      # Expect the line to be a Swimmer
+      swimmer = Swimmer( line )
+      if not swim_filter.accepts_swimmer( swimmer ):
+        swimmer = None
+        skipping = True
+
+  # We won't have yielded the final swimmer if the file doesn't end with
+  # an empty line.
+  if swimmer is not None:
+    yield swimmer, swims
+
+# Opens the swim list at swim_list_path and reads it as read_swim_list()
+# would.  With use_cache set, it's read through a compiled
+# swim_list_cache.SwimListCache instead, which needs numpy.
+# With use_store set, it's read through an indexed swim_store.SwimStore,
+# so that only the rows that swim_filter accepts are read at all.
+def open_swim_list( swim_list_path, swim_filter=None, use_cache=False, use_store=False ):
+  if use_store:
+    from swim_store import read_swim_list_from_store
+    blocks = read_swim_list_from_store( swim_list_path, swim_filter )
+  elif use_cache:
+    from swim_list_cache import read_swim_list_cached
+    blocks = read_swim_list_cached( swim_list_path, swim_filter )
+  else:
+    blocks = read_swim_list( open( swim_list_path, 'r' ), swim_filter )
+  if instrumentation.enabled:
+    blocks = _instrumented( blocks )
+  return blocks
+
+def _instrumented( blocks ):
+  for swimmer, swims in instrumentation.timed( 'parse', blocks ):
+    instrumentation.count( 'swimmers_read' )
+    instrumentation.count( 'swims_read', len( swims ) )
+    yield swimmer, swims
@@ -0,0 +1,332 @@
+# Winsford ASC Club Champs Scoring System
+#   swim_store.py
+#   An indexed SQLite copy of a swim list, so that questions about a
+#   handful of swims can be answered without reading the whole list.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+# The store lives next to the swim list, e.g. SwimList.txt.sqlite, and
+# contains...
+#   meta      The version of the store format, and the mtime, size and
+#             SHA-1 of the swim list it was built from.
+#   swimmers  One row per swimmer, in swim list order.
+#   swims     One row per swim, in swim list order, indexed on
+#             (asa_number, event_code, date) and (event_code, date).
+# Dates are stored as date.toordinal() day numbers.
+
+import calendar
+import datetime
+import json
+import os
+import sqlite3
+
+from swim import Swim
+from swim import SwimInterner
+from swimmer import Swimmer
+from swim_list_reader import read_swim_list
+from incremental import hash_file
+from incremental import get_file_stats
+
+_STORE_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE meta (
+  key TEXT PRIMARY KEY,
+  value TEXT
+);
+CREATE TABLE swimmers (
+  swimmer_id INTEGER PRIMARY KEY,
+  asa_number INTEGER,
+  last_name TEXT,
+  first_name TEXT,
+  known_as TEXT,
+  is_male INTEGER,
+  date_of_birth INTEGER
+);
+CREATE TABLE swims (
+  swim_id INTEGER PRIMARY KEY,
+  swimmer_id INTEGER,
+  asa_number INTEGER,
+  event_code INTEGER,
+  date INTEGER,
+  meet TEXT,
+  asa_swim_id INTEGER,
+  is_licensed INTEGER,
+  race_time REAL,
+  short_course_race_time REAL
+);
+"""
+
+# Built after the bulk load, which is quicker than keeping them up to
+# date row by row.
+_INDEXES = """
+CREATE INDEX swims_by_swimmer_event_date ON swims ( asa_number, event_code, date );
+CREATE INDEX swims_by_event_date ON swims ( event_code, date );
+"""
+
+_SWIMMER_FIELDS = 'w.swimmer_id, w.asa_number, w.last_name, w.first_name, w.known_as, w.is_male, w.date_of_birth'
+_SWIM_FIELDS = 's.swimmer_id, s.asa_number, s.event_code, s.date, s.meet, s.asa_swim_id, s.is_licensed, s.race_time, s.short_course_race_time'
+
+def get_store_path( swim_list_path ):
+  return swim_list_path + '.sqlite'
+
+# The latest date of birth for which helpers.CalcAge( date_of_birth, on_date )
+# is at least age.
+def _latest_date_of_birth( age, on_date ):
+  year = on_date.year - age
+  if (on_date.month == 2) and (on_date.day == 29) and not calendar.isleap( year ):
+    # Somebody born on 28th Feb has had their birthday by the 29th
+    return datetime.date( year, 2, 28 )
+  return datetime.date( year, on_date.month, on_date.day )
+
+class _Conditions():
+  """The WHERE clauses for a query, kept apart for the swims and swimmers
+  tables, along with their parameters."""
+  def __init__(self, earliest_date=None, latest_date=None, meet=None, event_codes=None, asa_number=None, is_male=None, minimum_age=None, maximum_age=None, age_on_date=None):
+    if ((minimum_age is not None) or (maximum_age is not None)) and (age_on_date is None):
+      raise RuntimeError( "Querying by age needs an age_on_date" )
+    self.swim_clauses = []
+    self.swim_params = []
+    self.swimmer_clauses = []
+    self.swimmer_params = []
+    if asa_number is not None:
+      self.swim_clauses.append( 's.asa_number = ?' )
+      self.swim_params.append( asa_number )
+      self.swimmer_clauses.append( 'w.asa_number = ?' )
+      self.swimmer_params.append( asa_number )
+    if event_codes is not None:
+      # Short course event codes match swims in either course
+      codes = []
+      for event_code in sorted( event_codes ):
+        codes.append( event_code )
+        codes.append( event_code | 0x100 )
+      self.swim_clauses.append( 's.event_code IN (' + ', '.join( [ '?' ] * len( codes ) ) + ')' )
+      self.swim_params.extend( codes )
+    if earliest_date is not None:
+      self.swim_clauses.append( 's.date >= ?' )
+      self.swim_params.append( earliest_date.toordinal() )
+    if latest_date is not None:
+      self.swim_clauses.append( 's.date <= ?' )
+      self.swim_params.append( latest_date.toordinal() )
+    if meet is not None:
+      self.swim_clauses.append( 's.meet = ?' )
+      self.swim_params.append( meet )
+    if is_male is not None:
+      self.swimmer_clauses.append( 'w.is_male = ?' )
+      self.swimmer_params.append( int( is_male ) )
+    if minimum_age is not None:
+      self.swimmer_clauses.append( 'w.date_of_birth <= ?' )
+      self.swimmer_params.append( _latest_date_of_birth( minimum_age, age_on_date ).toordinal() )
+    if maximum_age is not None:
+      self.swimmer_clauses.append( 'w.date_of_birth > ?' )
+      self.swimmer_params.append( _latest_date_of_birth( maximum_age + 1, age_on_date ).toordinal() )
+
+  def swimmers_query(self):
+    sql = 'SELECT ' + _SWIMMER_FIELDS + ' FROM swimmers w'
+    if len( self.swimmer_clauses ) > 0:
+      sql += ' WHERE ' + ' AND '.join( self.swimmer_clauses )
+    return sql + ' ORDER BY w.swimmer_id', self.swimmer_params
+
+  def swims_query(self):
+    sql = 'SELECT ' + _SWIM_FIELDS + ' FROM swims s'
+    # Only join the swimmers if we have to, so that the swims indexes
+    # are free to be used.
+    if len( self.swimmer_clauses ) > 0:
+      sql += ' JOIN swimmers w ON w.swimmer_id = s.swimmer_id'
+    clauses = self.swim_clauses + self.swimmer_clauses
+    if len( clauses ) > 0:
+      sql += ' WHERE ' + ' AND '.join( clauses )
+    return sql + ' ORDER BY s.swim_id', self.swim_params + self.swimmer_params
+
+def _create_swimmer( row ):
+  return Swimmer.create( row[1], row[2], row[3], row[4], row[5] != 0, datetime.date.fromordinal( row[6] ) )
+
+def _create_swim( row, interner=None ):
+  return Swim.create( row[1], row[2], datetime.date.fromordinal( row[3] ), row[4], row[5], row[6] != 0, row[7], row[8], interner )
+
+class SwimStore():
+  """Query interface to a swim store.  Use load_swim_store() rather than
+  constructing one directly.
+  The query methods all take any of these keyword arguments, which are
+  ANDed together.  Any left as None aren't applied.
+    earliest_date, latest_date  Inclusive range of swim dates.
+    meet                        Meet name.
+    event_codes                 Short course event codes, which match
+                                swims in either course.
+    asa_number                  Just the one swimmer.
+    is_male                     True for boys, False for girls.
+    minimum_age, maximum_age    Inclusive range of ages on age_on_date.
+  For example, all the 100 Back swims by 12 year old girls since June...
+    store.query_swims( event_codes=[ back_100 ], is_male=False, minimum_age=12, maximum_age=12, age_on_date=today, earliest_date=june )"""
+  def __init__(self, store_path):
+    self.connection = sqlite3.connect( store_path )
+
+  def close(self):
+    self.connection.close()
+
+  def num_swimmers(self):
+    return self.connection.execute( 'SELECT COUNT(*) FROM swimmers' ).fetchone()[0]
+
+  def num_swims(self):
+    return self.connection.execute( 'SELECT COUNT(*) FROM swims' ).fetchone()[0]
+
+  # Returns the Swimmer with the given asa number, or None
+  def get_swimmer(self, asa_number):
+    swimmers = self.query_swimmers( asa_number=asa_number )
+    if len( swimmers ) == 0:
+      return None
+    return swimmers[0]
+
+  # Returns a list of Swimmers, in swim list order.  Only the swimmer
+  # arguments (asa_number, is_male and the ages) are used.
+  def query_swimmers(self, **kwargs):
+    sql, params = _Conditions( **kwargs ).swimmers_query()
+    return [ _create_swimmer( row ) for row in self.connection.execute( sql, params ) ]
+
+  # Returns a list of Swims, in swim list order
+  def query_swims(self, **kwargs):
+    sql, params = _Conditions( **kwargs ).swims_query()
+    return [ _create_swim( row ) for row in self.connection.execute( sql, params ) ]
+
+  # Returns the same swims as query_swims(), but as a dict of NumPy
+  # columns named after the Swim fields, without building any Swims.
+  # Dates are date.toordinal() day numbers and meet is an object array of
+  # strings.  Needs numpy.
+  def query_swim_arrays(self, **kwargs):
+    import numpy
+    sql, params = _Conditions( **kwargs ).swims_query()
+    rows = self.connection.execute( sql, params ).fetchall()
+    columns = list( zip( *rows ) )
+    if len( columns ) == 0:
+      columns = [ () ] * 9
+    return {
+      'asa_number' : numpy.array( columns[1], dtype=numpy.int32 ),
+      'event_code' : numpy.array( columns[2], dtype=numpy.int16 ),
+      'date' : numpy.array( columns[3], dtype=numpy.int32 ),
+      'meet' : numpy.array( columns[4], dtype=object ),
+      'asa_swim_id' : numpy.array( columns[5], dtype=numpy.int64 ),
+      'is_licensed' : numpy.array( columns[6], dtype=numpy.bool_ ),
+      'race_time' : numpy.array( columns[7], dtype=numpy.float64 ),
+      'short_course_race_time' : numpy.array( columns[8], dtype=numpy.float64 ),
+    }
+
+  # Yields (swimmer, swims) for each swimmer, exactly as
+  # swim_list_reader.read_swim_list() would for the source file, but
+  # only the swim rows that swim_filter accepts are ever read from the
+  # store.  Every swimmer row is read, so that swim_filter gets to see,
+  # and report, the swimmers it drops for being too old.
+  def read_swim_list(self, swim_filter=None):
+    if swim_filter is None:
+      conditions = _Conditions()
+    else:
+      conditions = _Conditions( earliest_date=swim_filter.earliest_date, latest_date=swim_filter.latest_date, meet=swim_filter.meet, event_codes=swim_filter.event_codes, maximum_age=swim_filter.maximum_age, age_on_date=swim_filter.age_on_date )
+    sql, params = _Conditions().swimmers_query()
+    swimmer_rows = self.connection.execute( sql, params )
+    sql, params = conditions.swims_query()
+    swim_rows = self.connection.execute( sql, params )
+
+    # Both are in swim list order, so the swims for each swimmer follow on
+    # from the last swimmer's.
+    swim_row = swim_rows.fetchone()
+    interner = SwimInterner()
+    for swimmer_row in swimmer_rows:
+      swimmer = _create_swimmer( swimmer_row )
+      # The swims query has already left out the swims of any swimmer
+      # that's too old
+      if (swim_filter is not None) and not swim_filter.accepts_swimmer( swimmer ):
+        continue
+      swimmer_id = swimmer_row[0]
+      swims = []
+      while (swim_row is not None) and (swim_row[0] == swimmer_id):
+        swims.append( _create_swim( swim_row, interner ) )
+        swim_row = swim_rows.fetchone()
+      yield swimmer, swims
+
+def _read_meta( connection ):
+  try:
+    row = connection.execute( "SELECT value FROM meta WHERE key = 'source'" ).fetchone()
+  except sqlite3.DatabaseError:
+    return None
+  if row is None:
+    return None
+  return json.loads( row[0] )
+
+def _write_meta( connection, meta ):
+  with connection:
+    connection.execute( "INSERT OR REPLACE INTO meta ( key, value ) VALUES ( 'source', ? )", ( json.dumps( meta ), ) )
+
+def _write_store( swim_list_path, store_path, meta ):
+  # Build into a temporary file and then swap it in, so that a run that
+  # dies part way through never leaves a half written store behind.
+  temp_path = store_path + '.tmp'
+  if os.path.exists( temp_path ):
+    os.remove( temp_path )
+  connection = sqlite3.connect( temp_path )
+  # Nothing can be lost that we can't just build again
+  connection.execute( 'PRAGMA journal_mode = OFF' )
+  connection.execute( 'PRAGMA synchronous = OFF' )
+  connection.executescript( _SCHEMA )
+
+  swimmer_rows = []
+  def swim_rows( swim_list_file ):
+    for swimmer, swims in read_swim_list( swim_list_file ):
+      swimmer_id = len( swimmer_rows )
+      swimmer_rows.append( ( swimmer_id, swimmer.asa_number, swimmer.last_name, swimmer.first_name, swimmer.known_as, int( swimmer.is_male ), swimmer.date_of_birth.toordinal() ) )
+      for swim in swims:
+        yield ( swimmer_id, swim.asa_number, swim.event.event_code, swim.date.toordinal(), swim.meet, swim.asa_swim_id, int( swim.is_licensed ), swim.race_time, swim.short_course_race_time )
+
+  # All in one transaction
+  with connection:
+    with open( swim_list_path, 'r' ) as swim_list_file:
+      connection.executemany( 'INSERT INTO swims ( swimmer_id, asa_number, event_code, date, meet, asa_swim_id, is_licensed, race_time, short_course_race_time ) VALUES ( ?, ?, ?, ?, ?, ?, ?, ?, ? )', swim_rows( swim_list_file ) )
+    connection.executemany( 'INSERT INTO swimmers ( swimmer_id, asa_number, last_name, first_name, known_as, is_male, date_of_birth ) VALUES ( ?, ?, ?, ?, ?, ?, ? )', swimmer_rows )
+  connection.executescript( _INDEXES )
+  connection.execute( 'ANALYZE' )
+  _write_meta( connection, meta )
+  connection.close()
+  os.replace( temp_path, store_path )
+
+# Returns a SwimStore for the swim list at swim_list_path, building or
+# rebuilding the store first if it's missing or out of date.
+# An unchanged mtime and size is trusted unless verify_hash is set.
+# A changed mtime only triggers a rebuild if the contents have changed.
+def load_swim_store( swim_list_path, verify_hash=False ):
+  store_path = get_store_path( swim_list_path )
+  stats = get_file_stats( swim_list_path )
+  if os.path.exists( store_path ):
+    store = SwimStore( store_path )
+    meta = _read_meta( store.connection )
+    if (meta is not None) and (meta.get( 'version' ) == _STORE_VERSION) and (meta.get( 'size' ) == stats[ 'size' ]):
+      if (meta.get( 'mtime' ) == stats[ 'mtime' ]) and not verify_hash:
+        return store
+      if meta.get( 'sha1' ) == hash_file( swim_list_path ):
+        if meta.get( 'mtime' ) != stats[ 'mtime' ]:
+          # Touched but not changed.  Remember the new mtime so that we
+          # don't have to hash it again next time.
+          meta[ 'mtime' ] = stats[ 'mtime' ]
+          _write_meta( store.connection, meta )
+        return store
+    store.close()
+
+  meta = { 'version' : _STORE_VERSION, 'mtime' : stats[ 'mtime' ], 'size' : stats[ 'size' ], 'sha1' : hash_file( swim_list_path ) }
+  _write_store( swim_list_path, store_path, meta )
+  return SwimStore( store_path )
+
+# Drop-in replacement for read_swim_list() that reads through the store
+def read_swim_list_from_store( swim_list_path, swim_filter=None ):
+  return load_swim_store( swim_list_path ).read_swim_list( swim_filter )
@@ -22,7 +22,9 @@
 import datetime
 import helpers
 
-class Swimmer():
+class Swimmer(object):
+  __slots__ = ( 'is_male', 'asa_number', 'last_name', 'first_name', 'known_as', 'date_of_birth' )
+
   # Constructor.  Passed in a row of text describing the swimmer.
   def __init__(self, str):
     tokens = str.split( '|' )
@@ -35,6 +37,19 @@ class Swimmer():
     self.first_name = tokens[2]
     self.known_as = tokens[3]
     self.date_of_birth = helpers.ParseDate_dmY( tokens[5] )
+
+  # Alternative constructor for when the swimmer has already been parsed,
+  # e.g. when reading it back out of a SwimStore.
+  @classmethod
+  def create(cls, asa_number, last_name, first_name, known_as, is_male, date_of_birth):
+    swimmer = cls.__new__( cls )
+    swimmer.is_male = is_male
+    swimmer.asa_number = asa_number
+    swimmer.last_name = last_name
+    swimmer.first_name = first_name
+    swimmer.known_as = known_as
+    swimmer.date_of_birth = date_of_birth
+    return swimmer
     
   def full_name(self):
     return self.first_name + " " + self.last_name
@@ -0,0 +1,229 @@
+# Winsford ASC Club Champs Scoring System
+#   synthetic_data.py
+#   Generates realistic looking, but made up, swim data for testing how
+#   the scripts cope with much bigger clubs than ours.  Writes
+#   SwimList.txt, EntryList.txt, ConsiderationTimes.txt and RaceTimes.txt.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import datetime
+import os
+import random
+
+import helpers
+
+from race_time import format_race_time
+from event import get_event
+from event import short_course_events
+
+folder = 'f:/SwimLists/synthetic/'
+num_swimmers = 1000
+seed = 1
+club_champs_start_date_str = '12/9/2015'
+club_champs_date_str = '19/9/2015'
+
+CLUB_CHAMPS_MEET_NAME = 'Winsford  Club Championships'
+
+_BOYS_FIRST_NAMES = ( 'Adam', 'Alex', 'Ben', 'Callum', 'Charlie', 'Dan', 'Ethan', 'Finn', 'George', 'Harry', 'Isaac', 'Jack', 'Jacob', 'James', 'Josh', 'Leo', 'Liam', 'Luke', 'Matthew', 'Max', 'Noah', 'Oliver', 'Oscar', 'Sam', 'Thomas', 'Tom', 'William', 'Zach' )
+_GIRLS_FIRST_NAMES = ( 'Abbie', 'Amelia', 'Amy', 'Bethany', 'Chloe', 'Ella', 'Ellie', 'Emily', 'Emma', 'Erin', 'Eve', 'Grace', 'Hannah', 'Holly', 'Isabelle', 'Jessica', 'Katie', 'Lily', 'Lucy', 'Megan', 'Mia', 'Molly', 'Olivia', 'Rebecca', 'Sophie', 'Zoe' )
+_LAST_NAMES = ( 'Allen', 'Bailey', 'Baker', 'Bell', 'Brown', 'Clarke', 'Cooper', 'Davies', 'Edwards', 'Evans', 'Green', 'Hall', 'Harris', 'Hill', 'Hughes', 'Jackson', 'James', 'Johnson', 'Jones', 'King', 'Lee', 'Lewis', 'Martin', 'Moore', 'Morris', 'Parker', 'Phillips', 'Roberts', 'Robinson', 'Scott', 'Smith', 'Taylor', 'Thomas', 'Thompson', 'Turner', 'Walker', 'Ward', 'White', 'Williams', 'Wilson', 'Wood', 'Wright', 'Young' )
+# The name a swimmer might be known as instead of their first name
+_NICKNAMES = { 'Alex' : 'Al', 'Daniel' : 'Dan', 'Matthew' : 'Matt', 'Thomas' : 'Tom', 'William' : 'Will', 'Rebecca' : 'Becky', 'Isabelle' : 'Izzy', 'Jessica' : 'Jess', 'Katie' : 'Kate', 'Samuel' : 'Sam' }
+
+# (name, is long course)
+_MEETS = (
+( 'Cheshire County Championships', False ),
+( 'Cheshire County Championships LC', True ),
+( 'North West Regional Championships', True ),
+( 'North Midlands Championships', True ),
+( 'Northwich Open Meet', False ),
+( 'Crewe Sprint Gala', False ),
+( 'Chester Open', False ),
+( 'Warrington Warriors Open', False ),
+( 'Stockport Metro Long Course Open', True ),
+( 'Macclesfield Spring Open', False ),
+( 'Wigan Wasps Open', False ),
+( 'Salford Summer Meet', True ),
+( 'Knutsford Development Gala', False ),
+( 'Winsford Time Trials', False ),
+)
+
+# Typical short course time for a 16 year old boy, and how likely each
+# event is to be swum, by short course event code
+_BASE_TIMES_AND_WEIGHTS = (
+( 26.5, 10 ), # 50 Free
+( 57.0, 10 ), # 100 Free
+( 124.0, 6 ), # 200 Free
+( 265.0, 3 ), # 400 Free
+( 550.0, 1 ), # 800 Free
+( 1050.0, 1 ), # 1500 Free
+( 33.0, 6 ), # 50 Breast
+( 72.0, 6 ), # 100 Breast
+( 158.0, 3 ), # 200 Breast
+( 28.5, 6 ), # 50 Fly
+( 63.0, 4 ), # 100 Fly
+( 142.0, 2 ), # 200 Fly
+( 30.0, 6 ), # 50 Back
+( 65.0, 6 ), # 100 Back
+( 140.0, 3 ), # 200 Back
+( 140.0, 4 ), # 200 IM
+( 300.0, 2 ), # 400 IM
+( 65.0, 4 ), # 100 IM
+)
+
+_HISTORY_YEARS = 4 # How far back before the club champs swims go
+_MEETS_PER_YEAR = 3
+_LICENSED_FRACTION = 0.85
+_ENTERED_FRACTION = 0.6
+_NT_FRACTION = 0.15 # Of consideration times that come from the NT table
+
+def _date_str( date ):
+  return '%02d/%02d/%d' % (date.day, date.month, date.year)
+
+# How much slower than a 16 year old boy
+def _age_factor( age, is_male ):
+  factor = 1.0 + (0.09 * max( 0, 16 - age ))
+  if not is_male:
+    factor *= 1.08
+  return factor
+
+class _SyntheticSwimmer():
+  def __init__(self, rng, asa_number, club_champs_date):
+    self.asa_number = asa_number
+    self.is_male = rng.random() < 0.5
+    if self.is_male:
+      self.first_name = rng.choice( _BOYS_FIRST_NAMES )
+    else:
+      self.first_name = rng.choice( _GIRLS_FIRST_NAMES )
+    self.known_as = self.first_name
+    if (self.first_name in _NICKNAMES) and (rng.random() < 0.3):
+      self.known_as = _NICKNAMES[ self.first_name ]
+    self.last_name = rng.choice( _LAST_NAMES )
+    # Mostly 8 to 18, with a few older ones that get excluded
+    age_days = rng.randint( 8 * 365, 19 * 365 )
+    if rng.random() < 0.05:
+      age_days = rng.randint( 19 * 365, 30 * 365 )
+    self.date_of_birth = club_champs_date - datetime.timedelta( days=age_days )
+    self.talent = min( 1.3, max( 0.85, rng.gauss( 1.0, 0.07 ) ) )
+
+  def __str__(self):
+    gender = 'F'
+    if self.is_male:
+      gender = 'M'
+    return str( self.asa_number ) + '|' + self.last_name + '|' + self.first_name + '|' + self.known_as + '|' + gender + '|' + _date_str( self.date_of_birth )
+
+  def full_name(self):
+    return self.first_name + ' ' + self.last_name
+
+  # A plausible short course time for the swimmer in the event on date
+  def short_course_time(self, rng, event_code, date):
+    age = helpers.CalcAge( self.date_of_birth, date )
+    base_time = _BASE_TIMES_AND_WEIGHTS[ event_code ][0]
+    return base_time * _age_factor( age, self.is_male ) * self.talent * rng.gauss( 1.0, 0.02 )
+
+def _choose_events( rng, num_events ):
+  weights = [ x[1] for x in _BASE_TIMES_AND_WEIGHTS ]
+  event_codes = set()
+  while len( event_codes ) < num_events:
+    event_codes.add( rng.choices( range( 0, len( weights ) ), weights )[0] )
+  return sorted( event_codes )
+
+# Writes SwimList.txt, EntryList.txt, ConsiderationTimes.txt and
+# RaceTimes.txt for num_swimmers made up swimmers to folder.
+# The same seed always gives the same files.
+def generate( folder, num_swimmers, seed=1, club_champs_start_date=datetime.date( 2015, 9, 12 ), club_champs_date=datetime.date( 2015, 9, 19 ) ):
+  rng = random.Random( seed )
+  if not os.path.exists( folder ):
+    os.makedirs( folder )
+  history_start = club_champs_date - datetime.timedelta( days=_HISTORY_YEARS * 365 )
+  # A few months after the club champs as well, for the qualifiers
+  history_end = club_champs_date + datetime.timedelta( days=120 )
+  club_champs_days = (club_champs_date - club_champs_start_date).days
+  consideration_date = datetime.date( club_champs_date.year - 1, club_champs_date.month, club_champs_date.day )
+  asa_swim_id = 1000000
+
+  swim_list_file = open( folder + 'SwimList.txt', 'w' )
+  entry_list_file = open( folder + 'EntryList.txt', 'w' )
+  consideration_times_file = open( folder + 'ConsiderationTimes.txt', 'w' )
+  race_times_file = open( folder + 'RaceTimes.txt', 'w' )
+  first = True
+  first_entered = True
+  for i in range( 0, num_swimmers ):
+    swimmer = _SyntheticSwimmer( rng, 100000 + i, club_champs_date )
+    is_entered = (rng.random() < _ENTERED_FRACTION) and (helpers.CalcAge( swimmer.date_of_birth, club_champs_date ) <= 21)
+    lines = []
+    if not first:
+      lines.append( '' )
+    first = False
+    lines.append( str( swimmer ) )
+
+    # Ordinary meets, which swimmers start going to at about 8
+    career_start = max( history_start, swimmer.date_of_birth + datetime.timedelta( days=8 * 365 ) )
+    career_days = (history_end - career_start).days
+    num_meets = 0
+    if career_days > 0:
+      num_meets = int( rng.expovariate( 1.0 / (_MEETS_PER_YEAR * career_days / 365.0) ) + 0.5 )
+    for m in range( 0, num_meets ):
+      meet, is_long_course = rng.choice( _MEETS )
+      date = career_start + datetime.timedelta( days=rng.randrange( 0, career_days ) )
+      for event_code in _choose_events( rng, rng.randint( 1, 4 ) ):
+        race_time = swimmer.short_course_time( rng, event_code, date )
+        if is_long_course:
+          race_time = get_event( event_code ).convert_time( race_time )
+          event_code |= 0x100
+        licensed = 'n'
+        if rng.random() < _LICENSED_FRACTION:
+          licensed = 'y'
+        lines.append( 'V1|%d|%d|%s|%s|%d||%s|%.2f' % (swimmer.asa_number, event_code, _date_str( date ), meet, asa_swim_id, licensed, race_time) )
+        asa_swim_id += 1
+
+    if is_entered:
+      entry_list_file.write( swimmer.last_name + ',' + swimmer.first_name + '\n' )
+      if not first_entered:
+        consideration_times_file.write( '\n' )
+        race_times_file.write( '\n' )
+      first_entered = False
+      consideration_times_file.write( str( swimmer ) + '\n' )
+      race_times_file.write( str( swimmer ) + '\n' )
+      for event_code in _choose_events( rng, rng.randint( 3, 8 ) ):
+        event = short_course_events[ event_code ]
+        consideration_time = swimmer.short_course_time( rng, event_code, consideration_date )
+        is_pb_str = 'pb'
+        if rng.random() < _NT_FRACTION:
+          consideration_time *= 1.1
+          is_pb_str = 'nt'
+        consideration_times_file.write( event.short_name_without_course() + '|' + format_race_time( consideration_time ) + '|' + is_pb_str + '\n' )
+        # The club champs swim itself
+        date = club_champs_start_date + datetime.timedelta( days=rng.randint( 0, club_champs_days ) )
+        race_time = float( '%.2f' % swimmer.short_course_time( rng, event_code, date ) )
+        lines.append( 'V1|%d|%d|%s|%s|%d||y|%.2f' % (swimmer.asa_number, event_code, _date_str( date ), CLUB_CHAMPS_MEET_NAME, asa_swim_id, race_time) )
+        asa_swim_id += 1
+        race_times_file.write( event.short_name_without_course() + '|' + format_race_time( race_time ) + '\n' )
+    elif rng.random() < 0.01:
+      # Somebody on the entry list that we've no swims for
+      entry_list_file.write( swimmer.last_name + 'son,' + swimmer.first_name + '\n' )
+
+    swim_list_file.write( '\n'.join( lines ) + '\n' )
+
+  swim_list_file.close()
+  entry_list_file.close()
+  consideration_times_file.close()
+  race_times_file.close()
+
+if __name__ == '__main__':
+  generate( folder, num_swimmers, seed, helpers.ParseDate_dmY( club_champs_start_date_str ), helpers.ParseDate_dmY( club_champs_date_str ) )
@@ -0,0 +1,61 @@
+# Winsford ASC Club Champs Scoring System
+#   test_entry_list.py
+#   Tests for matching swimmers to the entry list in entry_list.py.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import unittest
+
+from entry_list import EntryList
+from entry_list import find_entry
+from swimmer import Swimmer
+
+def _create_swimmer( asa_number, last_name, first_name, known_as ):
+  return Swimmer( str( asa_number ) + '|' + last_name + '|' + first_name + '|' + known_as + '|F|01/01/2003' )
+
+# Matches swimmer like the reports do, marking the entry as taken
+def _enter( entries, swimmer, fuzzy=False ):
+  entry = find_entry( entries, swimmer, fuzzy )
+  if entry is not None:
+    entries[ entry ] = True
+  return entry
+
+class TestFindEntry(unittest.TestCase):
+  def setUp(self):
+    self.entries = EntryList()
+    self.entries.add( "Zoe O'Brien" )
+    self.entries.add( 'Elizabeth Smith' )
+
+  def test_two_swimmers_that_normalize_to_one_entry(self):
+    self.assertEqual( _enter( self.entries, _create_swimmer( 1, 'OBrien', 'Zoë', 'Zoë' ) ), "Zoe O'Brien" )
+    self.assertIsNone( _enter( self.entries, _create_swimmer( 2, 'OBRIEN', 'ZOE', 'ZOE' ) ) )
+
+  def test_two_swimmers_known_as_one_entry(self):
+    self.assertEqual( _enter( self.entries, _create_swimmer( 1, 'Smith', 'Beth', 'Elizabeth' ) ), 'Elizabeth Smith' )
+    self.assertIsNone( _enter( self.entries, _create_swimmer( 2, 'Smith', 'Liz', 'Elizabeth' ) ) )
+
+  def test_two_swimmers_spelt_like_one_entry(self):
+    self.assertEqual( _enter( self.entries, _create_swimmer( 1, 'OBrienn', 'Zoe', 'Zoe' ), True ), "Zoe O'Brien" )
+    self.assertIsNone( _enter( self.entries, _create_swimmer( 2, 'OBriens', 'Zoe', 'Zoe' ), True ) )
+
+  def test_exact_full_name_still_matches_a_taken_entry(self):
+    self.assertEqual( _enter( self.entries, _create_swimmer( 1, 'OBrien', 'Zoë', 'Zoë' ) ), "Zoe O'Brien" )
+    self.assertEqual( _enter( self.entries, _create_swimmer( 2, "O'Brien", 'Zoe', 'Zoe' ) ), "Zoe O'Brien" )
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,72 @@
+# Winsford ASC Club Champs Scoring System
+#   test_event_arrays.py
+#   Tests that the batch course conversions in event_arrays.py give exactly
+#   the same times as Event.convert_time().
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import unittest
+
+import numpy
+
+from event import get_event
+from event import short_course_events
+from event import long_course_events
+from event_arrays import convert_times
+from event_arrays import long_course_race_times
+from event_arrays import short_course_race_times
+
+# A spread of times for every event in both courses
+def _event_codes_and_times():
+  event_codes = []
+  race_times = []
+  for event in short_course_events + long_course_events:
+    for race_time in [ 14.71, 28.0, 31.25, 65.43, 139.99, 301.07, 1012.5 ]:
+      event_codes.append( event.event_code )
+      race_times.append( race_time )
+  return event_codes, race_times
+
+class TestEventArrays(unittest.TestCase):
+  def test_convert_times_matches_convert_time(self):
+    event_codes, race_times = _event_codes_and_times()
+    converted = convert_times( event_codes, race_times ).tolist()
+    for i in range( 0, len( race_times ) ):
+      self.assertEqual( converted[i], get_event( event_codes[i] ).convert_time( race_times[i] ) )
+
+  def test_long_course_race_times_matches_convert_time(self):
+    event_codes, race_times = _event_codes_and_times()
+    long_course = long_course_race_times( numpy.array( event_codes ), numpy.array( race_times ) ).tolist()
+    for i in range( 0, len( race_times ) ):
+      event = get_event( event_codes[i] )
+      if event.is_long_course():
+        self.assertEqual( long_course[i], race_times[i] )
+      else:
+        self.assertEqual( long_course[i], event.convert_time( race_times[i] ) )
+
+  def test_short_course_race_times_matches_convert_time(self):
+    event_codes, race_times = _event_codes_and_times()
+    short_course = short_course_race_times( numpy.array( event_codes ), numpy.array( race_times ) ).tolist()
+    for i in range( 0, len( race_times ) ):
+      event = get_event( event_codes[i] )
+      if event.is_long_course():
+        self.assertEqual( short_course[i], event.convert_time( race_times[i] ) )
+      else:
+        self.assertEqual( short_course[i], race_times[i] )
+
+if __name__ == '__main__':
+  unittest.main()
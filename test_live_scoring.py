@@ -0,0 +1,83 @@
+# Winsford ASC Club Champs Scoring System
+#   test_live_scoring.py
+#   Tests for live_scoring.py, including that swimmers are kept apart by
+#   ASA number, even when they share a name.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+from live_scoring import LiveScores
+from scoring import score_race
+
+_CLUB_CHAMPS_DATE = datetime.date( 2015, 9, 19 )
+
+# Two different swimmers called William Martin, and one other
+_CONSIDERATION_TIMES = """100001|Martin|William|William|M|01/01/2003
+50 Free|40.00|pb
+
+100002|Martin|William|William|M|01/06/2003
+50 Free|40.00|pb
+
+100003|Jones|Cara|Cara|F|01/01/2003
+50 Free|40.00|pb
+"""
+
+class TestLiveScoring(unittest.TestCase):
+  def setUp(self):
+    self.folder = tempfile.mkdtemp() + os.sep
+    with open( self.folder + 'ConsiderationTimes.txt', 'w' ) as f:
+      f.write( _CONSIDERATION_TIMES )
+    self.live_scores = LiveScores( self.folder, _CLUB_CHAMPS_DATE )
+
+  def tearDown(self):
+    shutil.rmtree( self.folder )
+
+  def _read_standings(self, file_name):
+    with open( self.folder + file_name, 'r' ) as f:
+      return f.read().splitlines()
+
+  # Live scoring keys swimmers by ASA number, so swimmers that share a
+  # name are scored separately.  The batch ScoresReport joins RaceTimes.txt
+  # to ConsiderationTimes.txt by name instead, and would merge them.
+  def test_swimmers_with_the_same_name_are_scored_separately(self):
+    self.live_scores.apply_result( '100001|50 Free|38.00' )
+    self.live_scores.apply_result( '100002|50 Free|39.50' )
+    self.live_scores.publish_all()
+    points_1 = score_race( 0, True, 12, 40.0, 38.0, False )
+    points_2 = score_race( 0, True, 12, 40.0, 39.5, False )
+    self.assertGreater( points_1, points_2 )
+    self.assertEqual( self._read_standings( 'LiveScoresBoys.txt' ), [ '1. William Martin: ' + str( points_1 ), '2. William Martin: ' + str( points_2 ) ] )
+
+  def test_later_result_replaces_earlier_one(self):
+    self.live_scores.apply_result( '100003|50 Free|38.00' )
+    self.live_scores.apply_result( '100003|50 Free|39.50' )
+    self.live_scores.publish_all()
+    self.assertEqual( self._read_standings( 'LiveScoresGirls.txt' ), [ '1. Cara Jones: ' + str( score_race( 0, False, 12, 40.0, 39.5, False ) ) ] )
+
+  def test_bad_lines_are_skipped(self):
+    for line in [ '999999|50 Free|38.00', 'abc|50 Free|38.00', '100003|51 Free|38.00', '100003|50 Free|abc', '100003|50 Free' ]:
+      self.assertIsNone( self.live_scores.apply_result( line ) )
+    self.assertIsNotNone( self.live_scores.apply_result( '100003|50 Free|38.00' ) )
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,96 @@
+# Winsford ASC Club Champs Scoring System
+#   test_qualifier_engine.py
+#   Tests that QualifierEngine in qualifier_engine.py picks the same PBs
+#   as QualifiersReport in qualifiers_report.py.
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import datetime
+import unittest
+
+from qualifier_engine import QualifierEngine
+from qualifiers_report import QualifiersReport
+from qualifiers_report import _write_swimmer_heading
+from qualifiers_report import _write_swim
+from swim import Swim
+from swimmer import Swimmer
+
+_AGE_ON_DATE = datetime.date( 2015, 12, 31 )
+_EARLIEST_PB_DATE = datetime.date( 2015, 1, 1 )
+_LEVEL_4_MEETS = [ 'Level 4 Gala' ]
+
+# A 12 year old boy.  Event codes are long course (0x100) unless noted.
+_SWIMMER = '100001|Martin|William|William|M|01/01/2003'
+_SWIMS = [
+  # 50 Free: a tie, so the first in the swim list wins, and a faster swim
+  # from before the qualifying window
+  'V1|100001|256|01/03/2015|Meet A|1||y|31.00',
+  'V1|100001|256|01/04/2015|Meet B|2||y|31.00',
+  'V1|100001|256|01/06/2014|Meet C|3||y|30.00',
+  # 100 Free: only inside the QT at a level 4 meet
+  'V1|100001|257|01/05/2015|Level 4 Gala|4||y|69.00',
+  # 200 Free: short course, so converted and truncated
+  'V1|100001|2|01/05/2015|Meet A|5||y|128.00',
+  # 50 Breast: the level 4 swim is faster, but the other one still counts
+  'V1|100001|262|01/05/2015|Level 4 Gala|6||y|36.00',
+  'V1|100001|262|01/07/2015|Meet B|7||y|37.00',
+]
+
+class TestQualifierEngine(unittest.TestCase):
+  def setUp(self):
+    self.swimmer = Swimmer( _SWIMMER )
+    self.swims = [ Swim( line ) for line in _SWIMS ]
+    self.report = QualifiersReport( None, _AGE_ON_DATE, _EARLIEST_PB_DATE, 21, _LEVEL_4_MEETS, [] )
+    engine = QualifierEngine( 1, [ 0 ] * len( self.swims ), [ swim.event.event_code for swim in self.swims ], [ swim.date.toordinal() for swim in self.swims ], [ swim.race_time for swim in self.swims ], [ swim.meet in _LEVEL_4_MEETS for swim in self.swims ], _EARLIEST_PB_DATE )
+    self.qualifiers = engine.find_qualifiers( [ True ], [ 12 ] )
+
+  # Writes out the engine's qualifiers, just as QualifiersReport would
+  def _engine_text_and_html(self):
+    text = []
+    html = []
+    qualifiers = self.qualifiers
+    for event_code in range( 0, qualifiers.qualified.shape[1] ):
+      if qualifiers.qualified[ 0, event_code ]:
+        if len( text ) == 0:
+          _write_swimmer_heading( text, html, self.swimmer.full_name(), 12 )
+        tag_class = "qualified"
+        if not qualifiers.pb_counts[ 0, event_code ]:
+          tag_class = "not-qualified"
+        swim = self.swims[ qualifiers.pb_rows[ 0, event_code ] ]
+        _write_swim( text, html, swim.event, float( qualifiers.pb_times[ 0, event_code ] ), swim.meet, swim.date.strftime( '%d/%m/%Y' ), tag_class )
+    if len( text ) > 0:
+      text.append( "\n" )
+    return ''.join( text ), ''.join( html )
+
+  def test_same_as_qualifiers_report(self):
+    self.assertEqual( self._engine_text_and_html(), self.report.process_swimmer( self.swimmer, self.swims ) )
+
+  def test_tie_picks_first_swim(self):
+    self.assertEqual( self.qualifiers.pb_rows[ 0, 0 ], 0 )
+
+  def test_level_4_only_pb(self):
+    self.assertEqual( self.qualifiers.pb_rows[ 0, 1 ], 3 )
+    self.assertTrue( self.qualifiers.qualified[ 0, 1 ] )
+    self.assertFalse( self.qualifiers.pb_counts[ 0, 1 ] )
+
+  def test_qualifying_swim_preferred_to_faster_level_4_swim(self):
+    self.assertEqual( self.qualifiers.pb_rows[ 0, 6 ], 6 )
+    self.assertTrue( self.qualifiers.pb_counts[ 0, 6 ] )
+
+if __name__ == '__main__':
+  unittest.main()
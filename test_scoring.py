@@ -0,0 +1,89 @@
+# Winsford ASC Club Champs Scoring System
+#   test_scoring.py
+#   Tests that ScoringEngine in scoring.py gives every swimmer the same
+#   points as scoring their races one at a time with score_race().
+# 
+# Copyright (C) 2014 Oliver Wright
+#    oli.wright.github@gmail.com
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program (file LICENSE); if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+import random
+import unittest
+
+import numpy
+
+from event import short_course_events
+from scoring import ScoringEngine
+from scoring import score_race
+
+num_events = len( short_course_events )
+
+class TestScoringEngine(unittest.TestCase):
+  def setUp(self):
+    # Boys and girls of all ages, with missing times, races slower than
+    # the consideration time, and improvements big enough to hit the caps
+    rng = random.Random( 1 )
+    self.is_male = []
+    self.ages = []
+    self.consideration_times = []
+    self.race_times = []
+    self.consideration_is_nt = []
+    for swimmer in range( 0, 40 ):
+      self.is_male.append( (swimmer % 2) == 0 )
+      self.ages.append( 8 + (swimmer % 12) )
+      consideration_times = []
+      race_times = []
+      consideration_is_nt = []
+      for event_code in range( 0, num_events ):
+        consideration_time = None
+        race_time = None
+        if rng.random() < 0.8:
+          consideration_time = round( rng.uniform( 25.0, 400.0 ), 2 )
+        if rng.random() < 0.6:
+          if consideration_time is None:
+            race_time = round( rng.uniform( 25.0, 400.0 ), 2 )
+          else:
+            race_time = round( consideration_time + rng.uniform( -5.0, 2.0 ), 2 )
+        consideration_times.append( consideration_time )
+        race_times.append( race_time )
+        consideration_is_nt.append( rng.random() < 0.3 )
+      self.consideration_times.append( consideration_times )
+      self.race_times.append( race_times )
+      self.consideration_is_nt.append( consideration_is_nt )
+
+  def _create_engine(self):
+    def to_array( times ):
+      return [ [ numpy.nan if time is None else time for time in row ] for row in times ]
+    return ScoringEngine( self.is_male, self.ages, to_array( self.consideration_times ), to_array( self.race_times ), self.consideration_is_nt )
+
+  def test_points_match_score_race(self):
+    points, total_points = self._create_engine().score()
+    for swimmer in range( 0, len( self.ages ) ):
+      expected_points = [ score_race( event_code, self.is_male[ swimmer ], self.ages[ swimmer ], self.consideration_times[ swimmer ][ event_code ], self.race_times[ swimmer ][ event_code ], self.consideration_is_nt[ swimmer ][ event_code ] ) for event_code in range( 0, num_events ) ]
+      self.assertEqual( points[ swimmer ].tolist(), expected_points )
+      self.assertEqual( total_points[ swimmer ], sum( expected_points ) )
+
+  def test_rankings_are_stable(self):
+    engine = self._create_engine()
+    points, total_points = engine.score()
+    boys, girls = engine.rankings( total_points )
+    for is_male, ranking in [ ( True, boys ), ( False, girls ) ]:
+      swimmers = [ swimmer for swimmer in range( 0, len( self.ages ) ) if self.is_male[ swimmer ] == is_male ]
+      swimmers.sort( key=lambda swimmer: total_points[ swimmer ], reverse=True )
+      self.assertEqual( ranking.tolist(), swimmers )
+
+if __name__ == '__main__':
+  unittest.main()